@@ -0,0 +1,310 @@
+"""오프라인에서 재현 가능한 분석기 / API 성능 벤치마크
+
+사용법:
+    python -m benchmarks.run analyzer --output results/analyzer.json
+    python -m benchmarks.run http --concurrency 1 8 32 --output results/http.json
+    python -m benchmarks.run compare results/baseline.json results/analyzer.json
+
+--model-dir를 지정하지 않으면 무작위 초기화된 작은 GPT-2 스타일 모델과 토크나이저를
+로컬에서 생성하므로 네트워크나 허깅페이스 다운로드가 필요 없다. 결과는 실행 환경
+정보와 함께 JSON으로 저장되며 compare로 이전 실행과 비교해 회귀를 찾을 수 있다.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+
+from src.perplexity_analyzer.analyzer import PerplexityAnalyzer
+from src.perplexity_analyzer.testing import save_tiny_model
+
+# 합성 자소서 문장 생성용 어휘
+_SUBJECTS = ["저는", "이를 통해 저는", "또한 저는", "입사 후에는", "대학 시절", "프로젝트에서"]
+_OBJECTS = ["데이터 분석 역량을", "팀워크의 중요성을", "문제 해결 능력을", "고객 중심의 사고를",
+            "새로운 기술을", "책임감을", "리더십을", "소통 능력을"]
+_VERBS = ["키웠습니다", "배웠습니다", "발휘하겠습니다", "경험했습니다", "쌓았습니다", "증명했습니다"]
+_DETAILS = ["", "3개월 동안", "동아리 활동을 하며", "인턴십 기간에", "여러 번의 실패 끝에", "매일 꾸준히"]
+
+
+def make_sentence(rng: random.Random) -> str:
+    parts = [rng.choice(_SUBJECTS), rng.choice(_DETAILS), rng.choice(_OBJECTS), rng.choice(_VERBS)]
+    return ' '.join(p for p in parts if p)
+
+
+def make_corpus(num_docs: int, sentences_per_doc: int, seed: int = 0) -> List[str]:
+    """고정된 시드로 합성 문서 생성"""
+    rng = random.Random(seed)
+    return ['. '.join(make_sentence(rng) for _ in range(sentences_per_doc)) + '.' for _ in range(num_docs)]
+
+
+def latency_summary(latencies: List[float], sentences: int) -> Dict:
+    """지연시간 목록(초)을 처리량과 백분위수(ms)로 요약"""
+    values = np.array(latencies)
+    total = float(values.sum())
+    return {
+        'runs': len(latencies),
+        'sentences': sentences,
+        'sentences_per_second': sentences / total if total > 0 else 0.0,
+        'mean_ms': float(values.mean() * 1000),
+        'p50_ms': float(np.percentile(values, 50) * 1000),
+        'p95_ms': float(np.percentile(values, 95) * 1000),
+        'p99_ms': float(np.percentile(values, 99) * 1000),
+    }
+
+
+def _measure(func: Callable, inputs: List, warmup: int = 2) -> List[float]:
+    for item in inputs[:warmup]:
+        func(item)
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_analyzer(analyzer: PerplexityAnalyzer, doc_sizes: List[int], repeats: int,
+                   batch_docs: int, seed: int = 0) -> List[Dict]:
+    """calculate_perplexity, analyze_sentences, analyze_batch 벤치마크"""
+    results = []
+    
+    sentences = [make_sentence(random.Random(seed + i)) for i in range(repeats * 4)]
+    latencies = _measure(analyzer.calculate_perplexity, sentences)
+    results.append({'name': 'calculate_perplexity', **latency_summary(latencies, len(sentences))})
+    
+    for size in doc_sizes:
+        docs = make_corpus(repeats, size, seed=seed + size)
+        latencies = _measure(analyzer.analyze_sentences, docs)
+        results.append({'name': f'analyze_sentences[{size}]', **latency_summary(latencies, repeats * size)})
+        
+        batches = [make_corpus(batch_docs, size, seed=seed + size + i) for i in range(max(1, repeats // 4))]
+        latencies = _measure(analyzer.analyze_batch, batches, warmup=1)
+        results.append({
+            'name': f'analyze_batch[{batch_docs}x{size}]',
+            **latency_summary(latencies, len(batches) * batch_docs * size)
+        })
+    
+    return results
+
+
+def bench_http(url: str, texts: List[str], concurrency: int, sentences_per_text: int) -> Dict:
+    """/analyze 엔드포인트에 지정한 동시성으로 요청을 보내 지연시간 측정"""
+    def send(text: str) -> float:
+        body = json.dumps({'text': text}).encode('utf-8')
+        request = urllib.request.Request(
+            f"{url}/analyze", data=body, headers={'Content-Type': 'application/json'}
+        )
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=300) as response:
+            response.read()
+        return time.perf_counter() - start
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, texts[:concurrency]))  # 워밍업
+        start = time.perf_counter()
+        latencies = list(pool.map(send, texts))
+        wall = time.perf_counter() - start
+    
+    summary = latency_summary(latencies, len(texts) * sentences_per_text)
+    # 동시 요청에서는 처리량을 벽시계 시간 기준으로 계산
+    summary['sentences_per_second'] = len(texts) * sentences_per_text / wall
+    summary['requests_per_second'] = len(texts) / wall
+    return {'name': f'http_analyze[c={concurrency}]', 'concurrency': concurrency, **summary}
+
+
+class _LocalServer:
+    """src.api.main:app을 현재 프로세스의 스레드에서 uvicorn으로 실행"""
+    
+    def __init__(self, model_dir: str, model_name: str):
+        import uvicorn
+        
+        os.environ['MODEL_PATH'] = model_dir
+        os.environ['MODEL_NAME'] = model_name
+        os.environ.setdefault('PPL_CACHE_SIZE', '0')
+        
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        
+        from src.api.main import app
+        self.server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=self.port, log_level='warning'))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+    
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("Benchmark server failed to start")
+            time.sleep(0.05)
+        # 모델은 백그라운드에서 로드되므로 /ready가 200이 될 때까지 대기
+        while True:
+            try:
+                with urllib.request.urlopen(f"{self.url}/ready") as response:
+                    if response.status == 200:
+                        return self
+            except urllib.error.HTTPError as e:
+                if json.loads(e.read()).get('model_status') == 'failed':
+                    raise RuntimeError("Benchmark server failed to load the model")
+            time.sleep(0.05)
+    
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def compare_results(baseline: Dict, current: Dict, tolerance: float) -> List[Dict]:
+    """같은 이름의 벤치마크끼리 비교해 처리량 감소 또는 p95 증가가 tolerance를 넘는 항목 반환"""
+    baseline_by_name = {r['name']: r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        base = baseline_by_name.get(result['name'])
+        if base is None:
+            continue
+        throughput_change = result['sentences_per_second'] / base['sentences_per_second'] - 1
+        p95_change = result['p95_ms'] / base['p95_ms'] - 1
+        if throughput_change < -tolerance or p95_change > tolerance:
+            regressions.append({
+                'name': result['name'],
+                'throughput_change': throughput_change,
+                'p95_change': p95_change,
+            })
+    return regressions
+
+
+def _environment(args: argparse.Namespace) -> Dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'torch_threads': torch.get_num_threads(),
+        'config': {k: v for k, v in vars(args).items() if k != 'func'},
+    }
+
+
+def _model_dir(args: argparse.Namespace, tmp: str) -> str:
+    if args.model_dir:
+        return args.model_dir
+    corpus = make_corpus(200, 5, seed=args.seed)
+    return save_tiny_model(
+        os.path.join(tmp, 'model'), n_layer=args.n_layer, n_embd=args.n_embd, n_head=args.n_head,
+        n_positions=args.max_length, vocab_size=args.vocab_size, corpus=corpus, seed=args.seed
+    )
+
+
+def _write(report: Dict, output: Optional[str]):
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+
+def run_analyzer(args: argparse.Namespace):
+    torch.manual_seed(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        analyzer = PerplexityAnalyzer(
+            model_name='bench', model_path=_model_dir(args, tmp), max_length=args.max_length,
+            batch_size=args.batch_size, cache_size=0, precision=args.precision, backend=args.backend
+        )
+        results = bench_analyzer(analyzer, args.doc_sizes, args.repeats, args.batch_docs, seed=args.seed)
+    _write({'environment': _environment(args), 'results': results}, args.output)
+
+
+def run_http(args: argparse.Namespace):
+    texts = make_corpus(args.requests, args.sentences_per_doc, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            results = [bench_http(args.url, texts, c, args.sentences_per_doc) for c in args.concurrency]
+        else:
+            with _LocalServer(_model_dir(args, tmp), 'bench') as server:
+                results = [bench_http(server.url, texts, c, args.sentences_per_doc) for c in args.concurrency]
+    _write({'environment': _environment(args), 'results': results}, args.output)
+
+
+def run_compare(args: argparse.Namespace):
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    
+    regressions = compare_results(baseline, current, args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r['name']}: throughput {r['throughput_change']:+.1%}, p95 {r['p95_change']:+.1%}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perplexity analyzer and API benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    def add_model_args(sub):
+        sub.add_argument("--model-dir", help="Local model directory (default: build a tiny random model)")
+        sub.add_argument("--n-layer", type=int, default=4)
+        sub.add_argument("--n-embd", type=int, default=128)
+        sub.add_argument("--n-head", type=int, default=4)
+        sub.add_argument("--vocab-size", type=int, default=2000)
+        sub.add_argument("--max-length", type=int, default=512)
+        sub.add_argument("--seed", type=int, default=0)
+        sub.add_argument("--output", help="Write machine-readable results to this JSON file")
+    
+    analyzer_parser = subparsers.add_parser('analyzer', help="Benchmark PerplexityAnalyzer methods")
+    add_model_args(analyzer_parser)
+    analyzer_parser.add_argument("--doc-sizes", type=int, nargs="+", default=[5, 20, 80],
+                                 help="Sentences per document")
+    analyzer_parser.add_argument("--repeats", type=int, default=20)
+    analyzer_parser.add_argument("--batch-docs", type=int, default=16, help="Documents per analyze_batch call")
+    analyzer_parser.add_argument("--batch-size", type=int, default=16)
+    analyzer_parser.add_argument("--precision", default="fp32", choices=["fp32", "bf16", "int8"])
+    analyzer_parser.add_argument("--backend", choices=["torch", "onnx"])
+    analyzer_parser.set_defaults(func=run_analyzer)
+    
+    http_parser = subparsers.add_parser('http', help="Load-test the /analyze endpoint")
+    add_model_args(http_parser)
+    http_parser.add_argument("--url", help="Target a running server instead of starting one in-process")
+    http_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    http_parser.add_argument("--requests", type=int, default=200)
+    http_parser.add_argument("--sentences-per-doc", type=int, default=20)
+    http_parser.set_defaults(func=run_http)
+    
+    compare_parser = subparsers.add_parser('compare', help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1,
+                                help="Allowed relative throughput drop / p95 increase")
+    compare_parser.set_defaults(func=run_compare)
+    
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
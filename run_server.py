@@ -5,26 +5,62 @@ Resume AI Filter API 서버 실행 스크립트
 
 import os
 import sys
+import glob
+import tempfile
 import subprocess
-import multiprocessing
 
-def get_worker_count():
-    """CPU 코어 수에 따른 워커 수 계산"""
-    cpu_count = multiprocessing.cpu_count()
-    # CPU 코어 수의 2배 또는 최소 2개
-    return max(2, min(cpu_count * 2, 8))
+from src.perplexity_analyzer.cpu_plan import WorkerPlan, autotune, effective_cpu_count, plan_workers
 
-def run_server(host="0.0.0.0", port=8000, workers=None, reload=False):
+DEFAULT_PLAN_FILE = "worker_plan.json"
+DEFAULT_JOB_DB = "jobs.sqlite3"
+
+def get_worker_plan(workers=None, threads_per_worker=None, pin=False, plan_file=None, tune=False):
+    """워커 수 x 워커당 torch 스레드 수 결정
+    
+    cgroup CPU 할당량을 반영한 CPU 수를 기준으로 계획하며, 워커 수나 스레드 수를
+    지정하지 않았으면 autotune으로 저장한 계획 파일을 재사용한다.
+    """
+    if tune:
+        print("Autotuning worker plan...")
+        plan = autotune(
+            {
+                "model_name": os.environ.get("MODEL_NAME", "kogpt2"),
+                "model_path": os.environ.get("MODEL_PATH") or None,
+                "precision": os.environ.get("MODEL_PRECISION", "fp32"),
+            },
+            pin=pin
+        )
+        if plan_file:
+            plan.save(plan_file)
+            print(f"Saved worker plan to {plan_file}")
+        return plan
+    
+    if workers is None and threads_per_worker is None and plan_file and os.path.exists(plan_file):
+        plan = WorkerPlan.load(plan_file)
+        if plan.cpus == effective_cpu_count():
+            return plan
+        print(f"Warning: {plan_file} was tuned for {plan.cpus} CPUs, planning again")
+    
+    return plan_workers(workers, threads_per_worker, pin=pin)
+
+def run_server(host="0.0.0.0", port=8000, workers=None, reload=False, preload=False,
+               threads_per_worker=None, pin=False, plan_file=DEFAULT_PLAN_FILE, tune=False):
     """서버 실행"""
     
-    if workers is None:
-        workers = get_worker_count()
+    plan = get_worker_plan(workers, threads_per_worker, pin, plan_file, tune)
+    workers = plan.workers
+    
+    if preload and reload:
+        print("Warning: --preload is ignored with --reload")
+        preload = False
     
     print(f"Starting Resume AI Filter API server...")
     print(f"Host: {host}")
     print(f"Port: {port}")
-    print(f"Workers: {workers}")
+    print(f"Workers: {workers} x {plan.threads_per_worker} torch threads ({plan.cpus} CPUs available)")
+    print(f"CPU pinning: {plan.cpu_sets if plan.cpu_sets else 'off'}")
     print(f"Reload: {reload}")
+    print(f"Preload (shared weights): {preload}")
     print("-" * 50)
     
     # gunicorn 명령어 구성
@@ -34,6 +70,7 @@ def run_server(host="0.0.0.0", port=8000, workers=None, reload=False):
         "--bind", f"{host}:{port}",
         "--workers", str(workers),
         "--worker-class", "uvicorn.workers.UvicornWorker",
+        "--config", "python:src.api.gunicorn_conf",
         "--access-logfile", "-",
         "--error-logfile", "-",
         "--log-level", "info",
@@ -43,8 +80,27 @@ def run_server(host="0.0.0.0", port=8000, workers=None, reload=False):
     if reload:
         cmd.extend(["--reload"])
     
+    # 마스터에서 모델을 한 번만 로드하고 fork하여 워커들이 가중치를 공유
+    env = os.environ.copy()
+    # 워커마다 torch가 모든 코어를 쓰지 않도록 스레드 수와 CPU 집합 전달
+    env.update(plan.env())
+    
+    # 모든 워커의 Prometheus 메트릭을 /metrics에서 합산하기 위한 공유 디렉터리
+    metrics_dir = env.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+            os.remove(path)
+    else:
+        env["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="resume-filter-metrics-")
+    # 워커들이 같은 작업 큐를 공유하고 재시작 후에도 작업이 남도록 파일에 저장
+    env.setdefault("JOB_DB_PATH", DEFAULT_JOB_DB)
+    if preload:
+        cmd.extend(["--preload"])
+        env["PRELOAD_MODEL"] = "1"
+    
     try:
-        subprocess.run(cmd, check=True)
+        subprocess.run(cmd, check=True, env=env)
     except KeyboardInterrupt:
         print("\nServer stopped by user")
     except FileNotFoundError:
@@ -62,7 +118,15 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="0.0.0.0", help="Host address")
     parser.add_argument("--port", type=int, default=8000, help="Port number")
     parser.add_argument("--workers", type=int, help="Number of worker processes")
+    parser.add_argument("--threads-per-worker", type=int, help="torch intra-op threads per worker")
+    parser.add_argument("--pin-cpus", action="store_true", help="Pin each worker to its own CPUs")
+    parser.add_argument("--autotune", action="store_true",
+                        help="Benchmark worker x thread splits, save the fastest to --plan-file and use it")
+    parser.add_argument("--plan-file", default=DEFAULT_PLAN_FILE,
+                        help="Worker plan written by --autotune and reused on later starts")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload (development)")
+    parser.add_argument("--preload", action="store_true",
+                        help="Load the model once before forking so workers share its weights")
     
     args = parser.parse_args()
     
@@ -70,5 +134,10 @@ if __name__ == "__main__":
         host=args.host,
         port=args.port,
         workers=args.workers,
-        reload=args.reload
+        reload=args.reload,
+        preload=args.preload,
+        threads_per_worker=args.threads_per_worker,
+        pin=args.pin_cpus,
+        plan_file=args.plan_file,
+        tune=args.autotune
     )
\ No newline at end of file
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import math
+import threading
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+from fastapi import HTTPException, Request
+
+from ..perplexity_analyzer.utils import estimate_token_count
+from .metrics import CANCELLED_REQUESTS, INFLIGHT_REQUESTS, INFLIGHT_TOKENS, REJECTED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 기한이 없을 때 클라이언트 연결 종료를 확인하는 간격 (초)
+DISCONNECT_POLL_SECONDS = 0.25
+
+
+def estimate_tokens(texts: Iterable[str]) -> int:
+    """토크나이저 없이 추정한 텍스트(또는 분할된 문장)들의 토큰 수 합"""
+    return sum(estimate_token_count(text) for text in texts if text)
+
+
+class Reservation:
+    """admit()으로 예약한 토큰 (취소된 요청은 진행 중인 추론이 끝날 때까지 유지)"""
+    
+    __slots__ = ('tokens', 'deferred')
+    
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.deferred = False
+
+
+class AdmissionController:
+    """요청의 예상 토큰 수로 요청 크기와 워커의 동시 처리량을 제한
+    
+    요청 하나의 토큰 수가 max_request_tokens를 넘으면 413, 이미 처리 중인 요청들의
+    토큰 합에 더해 max_inflight_tokens를 넘게 되면 429(Retry-After)로 즉시 거절한다.
+    과부하에서 추론 큐 대기가 끝없이 길어지는 대신 초과분만 빠르게 실패시킨다.
+    처리 중인 요청이 없으면 요청 한도 이내의 요청은 항상 받는다. 한도가 0이면 제한하지 않는다.
+    
+    카운터는 워커의 이벤트 루프에서만 바뀌므로 잠금 없이 사용한다.
+    """
+    
+    def __init__(self, max_request_tokens: int = 16384, max_inflight_tokens: int = 65536,
+                 retry_after_seconds: float = 1.0):
+        """
+        Args:
+            max_request_tokens: 요청 하나의 최대 예상 토큰 수 (0이면 제한 없음)
+            max_inflight_tokens: 동시에 처리하는 요청들의 최대 예상 토큰 합 (0이면 제한 없음)
+            retry_after_seconds: 429 응답의 Retry-After 값 (초)
+        """
+        self.max_request_tokens = max_request_tokens
+        self.max_inflight_tokens = max_inflight_tokens
+        self.retry_after_seconds = retry_after_seconds
+        
+        self.inflight_tokens = 0
+        self.inflight_requests = 0
+        self._stats = {'admitted': 0, 'rejected_too_large': 0, 'rejected_overloaded': 0, 'cancelled': 0}
+    
+    def check_size(self, tokens: int, hint: str = ''):
+        """요청 크기 한도 확인 (넘으면 413)"""
+        if self.max_request_tokens and tokens > self.max_request_tokens:
+            self._stats['rejected_too_large'] += 1
+            REJECTED_REQUESTS.labels(reason='too_large').inc()
+            raise HTTPException(
+                status_code=413,
+                detail=f"Request is too large: about {tokens} tokens (limit {self.max_request_tokens}){hint}"
+            )
+    
+    @contextmanager
+    def admit(self, tokens: int, hint: str = '') -> Iterator[Reservation]:
+        """요청을 처리하는 동안 토큰을 예약 (크기 초과는 413, 처리 용량 초과는 429)
+        
+        release_when_done으로 넘긴 예약은 블록을 벗어나도 해제하지 않는다.
+        """
+        self.check_size(tokens, hint)
+        if (self.max_inflight_tokens and self.inflight_requests
+                and self.inflight_tokens + tokens > self.max_inflight_tokens):
+            self._stats['rejected_overloaded'] += 1
+            REJECTED_REQUESTS.labels(reason='overloaded').inc()
+            raise HTTPException(
+                status_code=429,
+                detail=f"Server is busy ({self.inflight_tokens} tokens in flight), retry later",
+                headers={'Retry-After': str(max(1, math.ceil(self.retry_after_seconds)))}
+            )
+        
+        self._stats['admitted'] += 1
+        reservation = Reservation(tokens)
+        self._reserve(tokens, 1)
+        try:
+            yield reservation
+        finally:
+            if not reservation.deferred:
+                self._reserve(-tokens, -1)
+    
+    def release_when_done(self, reservation: Reservation, task: asyncio.Future):
+        """취소된 요청의 예약을 작업이 실제로 끝날 때 해제
+        
+        추론 스레드에서 이미 실행 중인 마이크로 배치는 취소해도 끝까지 실행되므로,
+        응답을 보낸 뒤에도 그 동안은 처리 중인 부하로 계산한다.
+        """
+        reservation.deferred = True
+        
+        def release(done: asyncio.Future):
+            if not done.cancelled():
+                # 취소로 끝난 작업의 예외(ScoringCancelled 등)는 버림
+                done.exception()
+            self._reserve(-reservation.tokens, -1)
+        
+        task.add_done_callback(release)
+    
+    def _reserve(self, tokens: int, requests: int):
+        self.inflight_tokens += tokens
+        self.inflight_requests += requests
+        INFLIGHT_TOKENS.inc(tokens)
+        INFLIGHT_REQUESTS.inc(requests)
+    
+    def record_cancelled(self, reason: str):
+        self._stats['cancelled'] += 1
+        CANCELLED_REQUESTS.labels(reason=reason).inc()
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self._stats,
+            'inflight_tokens': self.inflight_tokens,
+            'inflight_requests': self.inflight_requests,
+        }
+
+
+async def run_with_deadline(admission: AdmissionController, http_request: Request,
+                            deadline_ms: Optional[float],
+                            work: Callable[[threading.Event], Awaitable[T]],
+                            reservation: Optional[Reservation] = None) -> T:
+    """기한이 지나거나 클라이언트 연결이 끊기면 남은 점수화를 취소
+    
+    work는 cancel 이벤트를 받아 분석을 수행하는 코루틴 함수다. 취소되면 이벤트를
+    설정해 추론 스레드에서 실행 중인 분석기가 다음 마이크로 배치 전에 멈추게 하고,
+    아직 추론 큐에서 기다리는 문장은 점수화되지 않는다. reservation이 주어지면
+    작업을 중단시키지 않고 바로 응답하며, 실행 중인 마이크로 배치가 끝나 작업이
+    멈출 때까지 예약한 토큰을 유지한다.
+    
+    Raises:
+        HTTPException: 기한이 지나면 504, 연결이 끊겼으면 499
+    """
+    cancel = threading.Event()
+    task = asyncio.ensure_future(work(cancel))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_ms / 1000.0 if deadline_ms else None
+    
+    reason = None
+    try:
+        while reason is None:
+            timeout = DISCONNECT_POLL_SECONDS
+            if deadline is not None:
+                timeout = min(timeout, deadline - loop.time())
+            if timeout > 0:
+                done, _ = await asyncio.wait({task}, timeout=timeout)
+                if done:
+                    return task.result()
+            
+            if deadline is not None and loop.time() >= deadline:
+                reason = 'deadline'
+            elif await http_request.is_disconnected():
+                reason = 'disconnected'
+    except asyncio.CancelledError:
+        # 요청 처리 자체가 취소된 경우 (서버 종료 등)
+        cancel.set()
+        task.cancel()
+        raise
+    
+    cancel.set()
+    if reservation is not None:
+        admission.release_when_done(reservation, task)
+    else:
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            # 취소되거나 ScoringCancelled로 끝난 작업의 결과는 버림
+            pass
+    admission.record_cancelled(reason)
+    logger.info(f"Cancelled remaining scoring ({reason})")
+    
+    if reason == 'deadline':
+        raise HTTPException(status_code=504, detail=f"Deadline of {deadline_ms:g} ms exceeded")
+    raise HTTPException(status_code=499, detail="Client disconnected")
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
+
+from ..perplexity_analyzer.utils import estimate_token_count
+from .metrics import SampledProfiler
+
+if TYPE_CHECKING:
+    from ..perplexity_analyzer.analyzer import PerplexityAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingRequest:
+    analyzer: 'PerplexityAnalyzer'
+    sentences: List[str]
+    tokens: int
+    future: asyncio.Future
+    enqueued_at: float
+    # 기한 초과나 연결 종료시 설정되는 요청의 cancel 이벤트
+    cancel: Optional[threading.Event] = None
+    
+    def cancelled(self) -> bool:
+        return self.future.done() or (self.cancel is not None and self.cancel.is_set())
+
+
+class _GroupCancel:
+    """함께 점수화하는 요청이 모두 취소되었을 때만 설정된 것으로 보는 cancel 이벤트"""
+    
+    def __init__(self, events: List[threading.Event]):
+        self.events = events
+    
+    def is_set(self) -> bool:
+        return all(event.is_set() for event in self.events)
+
+
+class InferenceBatcher:
+    """동시 요청들의 문장을 모아 하나의 forward로 점수화하는 프로세스 내 추론 큐
+    
+    모델 연산은 단일 전용 스레드에서 실행되어 이벤트 루프를 막지 않는다.
+    첫 요청이 도착하면 max_wait_ms 동안 또는 누적 토큰이 max_batch_tokens에
+    도달할 때까지 다른 요청을 모은 뒤 함께 점수화하고, 각 요청의 future로
+    해당 결과만 돌려준다. 여러 모델을 사용하면 같은 모델의 요청끼리 합친다.
+    """
+    
+    def __init__(self, analyzer: 'PerplexityAnalyzer', max_batch_tokens: int = 4096,
+                 max_wait_ms: float = 5.0, profiler: Optional[SampledProfiler] = None):
+        self.analyzer = analyzer
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait_ms / 1000.0
+        self.profiler = profiler
+        
+        # 모델 연산 직렬화를 위한 단일 스레드 executor
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        """배치 처리 루프 시작"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """배치 처리 루프 종료 및 대기 중인 요청 취소"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        while self._queue is not None and not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.cancel()
+        
+        self._executor.shutdown(wait=True)
+    
+    async def score(self, sentences: List[str], analyzer: Optional['PerplexityAnalyzer'] = None,
+                    cancel: Optional[threading.Event] = None) -> List[float]:
+        """문장 목록의 perplexity를 다른 요청과 합쳐 계산 (analyzer 기본값은 생성시 지정한 분석기)
+        
+        cancel이 설정된 요청은 아직 점수화하지 않았으면 건너뛰고, 함께 묶인 요청이 모두
+        취소되면 진행 중인 점수화도 다음 마이크로 배치 전에 멈춘다.
+        """
+        if not sentences:
+            return []
+        if self._queue is None:
+            raise RuntimeError("InferenceBatcher is not started")
+        
+        future = asyncio.get_running_loop().create_future()
+        tokens = sum(estimate_token_count(s) for s in sentences)
+        await self._queue.put(
+            _PendingRequest(analyzer or self.analyzer, sentences, tokens, future, time.perf_counter(), cancel)
+        )
+        
+        return await future
+    
+    async def run_exclusive(self, func: Callable, *args) -> Any:
+        """모델을 사용하는 임의의 작업을 추론 스레드에서 실행 (배치 분석 등)"""
+        submitted_at = time.perf_counter()
+        
+        def call():
+            self.analyzer.instrumentation.observe_queue_wait(time.perf_counter() - submitted_at)
+            return func(*args)
+        
+        return await self._execute(call)
+    
+    async def _execute(self, func: Callable) -> Any:
+        if self.profiler is not None:
+            func = self.profiler.wrap(func)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func)
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            pending = [await self._queue.get()]
+            tokens = pending[0].tokens
+            deadline = loop.time() + self.max_wait
+            
+            # 토큰 예산이나 대기 시간이 다할 때까지 요청 수집
+            while tokens < self.max_batch_tokens:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(request)
+                tokens += request.tokens
+            
+            await self._flush(pending)
+    
+    async def _flush(self, pending: List[_PendingRequest]):
+        # 모델별로 나누어 점수화
+        groups = {}
+        for p in pending:
+            groups.setdefault(id(p.analyzer), []).append(p)
+        for group in groups.values():
+            await self._flush_group(group)
+    
+    async def _flush_group(self, pending: List[_PendingRequest]):
+        # 이미 취소된 요청(기한 초과, 클라이언트 연결 종료 등)은 제외
+        for p in pending:
+            if p.cancelled() and not p.future.done():
+                p.future.cancel()
+        pending = [p for p in pending if not p.future.done()]
+        if not pending:
+            return
+        
+        analyzer = pending[0].analyzer
+        sentences = [s for p in pending for s in p.sentences]
+        cancel = None
+        if all(p.cancel is not None for p in pending):
+            cancel = _GroupCancel([p.cancel for p in pending])
+        
+        def score():
+            started_at = time.perf_counter()
+            for p in pending:
+                analyzer.instrumentation.observe_queue_wait(started_at - p.enqueued_at)
+            return analyzer.calculate_perplexities(sentences, cancel=cancel)
+        
+        try:
+            perplexities = await self._execute(score)
+        except Exception as e:
+            if cancel is not None and cancel.is_set():
+                # 모든 요청이 취소되어 남은 마이크로 배치를 건너뜀 (ScoringCancelled)
+                logger.info(f"Batched inference cancelled: {e}")
+                for p in pending:
+                    if not p.future.done():
+                        p.future.cancel()
+                return
+            logger.error(f"Batched inference error: {e}")
+            for p in pending:
+                if not p.future.done():
+                    p.future.set_exception(e)
+            return
+        
+        offset = 0
+        for p in pending:
+            if not p.future.done():
+                p.future.set_result(perplexities[offset:offset + len(p.sentences)])
+            offset += len(p.sentences)
@@ -0,0 +1,146 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    return value.lower() in ('1', 'true', 'yes') if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+@dataclass
+class Settings:
+    """환경변수로 조정 가능한 API 서버 설정"""
+    
+    # 사용할 모델명
+    model_name: str = 'kogpt2'
+    # 허깅페이스 대신 사용할 로컬 모델 디렉터리
+    model_path: Optional[str] = None
+    # 여러 모델 사용시 'kogpt2:hangul,gpt2:latin' 형식 (문자 체계로 자동 선택, 기본 모델은 model_name)
+    models: Optional[str] = None
+    # 모델별 perplexity 임계값 'kogpt2=28,gpt2=35'
+    model_thresholds: Optional[str] = None
+    # 모델별 로컬 디렉터리 'gpt2=/models/gpt2'
+    model_paths: Optional[str] = None
+    # 로드된 모델 가중치 크기 합의 상한 (MB, 초과시 가장 오래 사용하지 않은 모델 제거, 0이면 제한 없음)
+    model_memory_budget_mb: int = 0
+    # 추론 정밀도 ('fp32', 'bf16', 'int8')
+    precision: str = 'fp32'
+    # 동시 요청들을 하나의 forward로 합칠 때 최대 토큰 수
+    batch_max_tokens: int = 4096
+    # 첫 요청 도착 후 다른 요청을 기다리는 최대 시간 (ms)
+    batch_max_wait_ms: float = 5.0
+    # 메모리 perplexity 캐시 크기 (0이면 사용 안함)
+    cache_size: int = 10000
+    # 워커 간 공유되는 SQLite perplexity 캐시 경로
+    cache_path: Optional[str] = None
+    # 스트리밍 배치 분석에서 한 번에 함께 점수화할 텍스트 수
+    stream_chunk_size: int = 16
+    # 'sentence' (문장별 독립 점수화) 또는 'document' (문서 단일 패스)
+    scoring_mode: str = 'sentence'
+    # sentence 모드의 forward 방식 'padded' 또는 'packed' (짧은 문장들을 한 행에 이어 붙임)
+    execution_strategy: str = 'padded'
+    # 반복되는 문장 앞부분의 past-key-values를 재사용하는 prefix 캐시 메모리 (MB, 0이면 사용 안함)
+    prefix_cache_mb: float = 0
+    # prefix 캐시에 보관할 prefix의 최대 토큰 수
+    prefix_cache_tokens: int = 16
+    # 문장 분할시 이보다 짧은 조각은 이웃 문장과 합침 (0이면 합치지 않음)
+    min_sentence_length: int = 5
+    # 캐스케이드 1단계 문자 n-gram 모델 파일 (설정시 임계값 주변 문장만 모델로 점수화)
+    prefilter_path: Optional[str] = None
+    # 모델로 넘길 구간 폭 (임계값 대비 log-perplexity 거리)
+    cascade_band: float = 0.4
+    # near-duplicate 인덱스에 유지할 최대 문서 수 (0이면 사용 안함)
+    dedup_max_documents: int = 0
+    # near-duplicate 인덱스 SQLite 영속화 경로
+    dedup_path: Optional[str] = None
+    # near-duplicate로 판정할 최소 Jaccard 추정치
+    dedup_threshold: float = 0.5
+    # 증분 재분석을 위해 보관할 최대 문서 세션 수 (초과시 가장 오래된 세션부터 제거)
+    session_max_documents: int = 1000
+    # 이 시간(초) 동안 갱신되지 않은 문서 세션은 만료
+    session_ttl_seconds: float = 3600.0
+    # 요청 하나의 최대 예상 토큰 수 (문장 분할 후 추정, 초과시 413, 0이면 제한 없음)
+    max_request_tokens: int = 16384
+    # 워커가 동시에 처리하는 요청들의 최대 예상 토큰 합 (초과시 429, 0이면 제한 없음)
+    max_inflight_tokens: int = 65536
+    # 429 응답의 Retry-After (초)
+    retry_after_seconds: float = 1.0
+    # 요청이 deadline_ms를 지정하지 않았을 때의 기본 처리 기한 (ms, 0이면 기한 없음)
+    request_deadline_ms: float = 0.0
+    # 비동기 작업 큐 SQLite 경로 (설정하지 않으면 워커 메모리에만 유지되어 재시작시 사라짐)
+    job_db_path: Optional[str] = None
+    # 끝난 작업과 결과를 보관하는 시간 (초)
+    job_ttl_seconds: float = 86400.0
+    # 작업당 최대 시도 횟수
+    job_max_attempts: int = 3
+    # 작업 처리시 한 번에 분석할 텍스트 수 (대화형 요청이 기다리는 최대 단위)
+    job_chunk_size: int = 8
+    # 이 시간(초) 동안 진행이 없으면 다른 워커가 작업을 이어받음
+    job_lease_seconds: float = 300.0
+    # bulk --score-store로 기록한 토큰 점수 저장소 (설정시 /scores/rescore로 추론 없이 재분류)
+    score_store_path: Optional[str] = None
+    # 워커당 torch intra-op 스레드 수 (0이면 torch 기본값, run_server.py가 계획에 따라 설정)
+    torch_threads: int = 0
+    # gunicorn --preload 사용시 마스터 프로세스에서 모델을 한 번만 로드해 워커들이 공유
+    preload_model: bool = False
+    # torch.profiler trace 저장 경로 (설정시 샘플링된 추론 호출을 프로파일링)
+    profile_dir: Optional[str] = None
+    # 프로파일링할 추론 호출 비율 (0~1)
+    profile_sample_rate: float = 0.0
+    # 준비 완료 전에 대표 길이로 더미 forward를 실행해 첫 요청 지연 제거
+    warmup: bool = True
+    
+    @classmethod
+    def from_env(cls) -> 'Settings':
+        return cls(
+            model_name=os.environ.get('MODEL_NAME', cls.model_name),
+            model_path=os.environ.get('MODEL_PATH') or None,
+            models=os.environ.get('MODELS') or None,
+            model_thresholds=os.environ.get('MODEL_THRESHOLDS') or None,
+            model_paths=os.environ.get('MODEL_PATHS') or None,
+            model_memory_budget_mb=_env_int('MODEL_MEMORY_BUDGET_MB', cls.model_memory_budget_mb),
+            precision=os.environ.get('MODEL_PRECISION', cls.precision),
+            batch_max_tokens=_env_int('BATCH_MAX_TOKENS', cls.batch_max_tokens),
+            batch_max_wait_ms=_env_float('BATCH_MAX_WAIT_MS', cls.batch_max_wait_ms),
+            cache_size=_env_int('PPL_CACHE_SIZE', cls.cache_size),
+            cache_path=os.environ.get('PPL_CACHE_PATH') or None,
+            stream_chunk_size=_env_int('STREAM_CHUNK_SIZE', cls.stream_chunk_size),
+            scoring_mode=os.environ.get('SCORING_MODE', cls.scoring_mode),
+            execution_strategy=os.environ.get('EXECUTION_STRATEGY', cls.execution_strategy),
+            prefix_cache_mb=_env_float('PREFIX_CACHE_MB', cls.prefix_cache_mb),
+            prefix_cache_tokens=_env_int('PREFIX_CACHE_TOKENS', cls.prefix_cache_tokens),
+            min_sentence_length=_env_int('MIN_SENTENCE_LENGTH', cls.min_sentence_length),
+            prefilter_path=os.environ.get('PREFILTER_PATH') or None,
+            cascade_band=_env_float('CASCADE_BAND', cls.cascade_band),
+            dedup_max_documents=_env_int('DEDUP_MAX_DOCUMENTS', cls.dedup_max_documents),
+            dedup_path=os.environ.get('DEDUP_PATH') or None,
+            dedup_threshold=_env_float('DEDUP_THRESHOLD', cls.dedup_threshold),
+            session_max_documents=_env_int('SESSION_MAX_DOCUMENTS', cls.session_max_documents),
+            session_ttl_seconds=_env_float('SESSION_TTL_SECONDS', cls.session_ttl_seconds),
+            max_request_tokens=_env_int('MAX_REQUEST_TOKENS', cls.max_request_tokens),
+            max_inflight_tokens=_env_int('MAX_INFLIGHT_TOKENS', cls.max_inflight_tokens),
+            retry_after_seconds=_env_float('RETRY_AFTER_SECONDS', cls.retry_after_seconds),
+            request_deadline_ms=_env_float('REQUEST_DEADLINE_MS', cls.request_deadline_ms),
+            job_db_path=os.environ.get('JOB_DB_PATH') or None,
+            job_ttl_seconds=_env_float('JOB_TTL_SECONDS', cls.job_ttl_seconds),
+            job_max_attempts=_env_int('JOB_MAX_ATTEMPTS', cls.job_max_attempts),
+            job_chunk_size=_env_int('JOB_CHUNK_SIZE', cls.job_chunk_size),
+            job_lease_seconds=_env_float('JOB_LEASE_SECONDS', cls.job_lease_seconds),
+            score_store_path=os.environ.get('SCORE_STORE_PATH') or None,
+            torch_threads=_env_int('TORCH_NUM_THREADS', cls.torch_threads),
+            preload_model=_env_bool('PRELOAD_MODEL', cls.preload_model),
+            profile_dir=os.environ.get('TORCH_PROFILE_DIR') or None,
+            profile_sample_rate=_env_float('TORCH_PROFILE_SAMPLE_RATE', cls.profile_sample_rate),
+            warmup=_env_bool('MODEL_WARMUP', cls.warmup),
+        )
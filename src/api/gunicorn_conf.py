@@ -0,0 +1,22 @@
+"""run_server.py가 gunicorn에 넘기는 설정 (-c python:src.api.gunicorn_conf)
+
+WORKER_CPU_SETS가 있으면 워커마다 슬롯 번호를 배정해 해당 CPU 집합으로 affinity를 고정한다.
+"""
+import os
+
+from ..perplexity_analyzer.cpu_plan import parse_cpu_sets
+
+_cpu_sets = parse_cpu_sets(os.environ.get('WORKER_CPU_SETS'))
+
+
+def pre_fork(server, worker):
+    # 살아 있는 워커가 쓰지 않는 가장 작은 슬롯 배정 (재시작된 워커는 빈 슬롯을 이어받음)
+    used = {getattr(w, 'cpu_slot', None) for w in server.WORKERS.values()}
+    worker.cpu_slot = next(slot for slot in range(len(server.WORKERS) + 1) if slot not in used)
+
+
+def post_fork(server, worker):
+    if _cpu_sets and hasattr(os, 'sched_setaffinity'):
+        cpus = _cpu_sets[worker.cpu_slot % len(_cpu_sets)]
+        os.sched_setaffinity(0, cpus)
+        server.log.info(f"Worker {worker.pid} (slot {worker.cpu_slot}) pinned to CPUs {cpus}")
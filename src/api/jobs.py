@@ -0,0 +1,381 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 작업 상태: 'queued' -> 'running' -> 'completed' (재시도 횟수를 다 쓰면 'failed')
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+
+_JOB_COLUMNS = ('id', 'status', 'model', 'total', 'completed', 'attempts', 'error', 'created_at', 'updated_at')
+
+
+class JobQueue:
+    """대용량 배치 분석 작업을 보관하는 SQLite 기반 영속 큐
+    
+    제출된 텍스트와 텍스트별 결과를 함께 저장하고, 워커는 작업을 lease로 가져가
+    묶음 단위로 결과를 기록한다. 진행 상황이 묶음마다 커밋되므로 워커가 죽거나
+    재시작되어도 lease가 만료되면 다른 워커가 남은 텍스트부터 이어서 처리한다.
+    여러 gunicorn 워커가 같은 db_path를 공유하면 어느 워커에서나 작업을 조회할 수 있다.
+    
+    실패한 작업은 지수 백오프 후 다시 큐에 들어가고 max_attempts번 시도한 뒤
+    'failed'가 된다. 끝난 작업은 ttl_seconds 뒤에 결과와 함께 삭제된다.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None, ttl_seconds: float = 86400.0,
+                 max_attempts: int = 3, lease_seconds: float = 300.0):
+        """
+        Args:
+            db_path: SQLite 파일 경로 (None이면 프로세스 메모리에만 유지)
+            ttl_seconds: 끝난 작업을 보관하는 시간 (초)
+            max_attempts: 작업당 최대 시도 횟수
+            lease_seconds: 워커가 진행 상황을 기록하지 않으면 다른 워커가 가져갈 수 있는 시간 (초)
+        """
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be >= 1: {max_attempts}")
+        
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self._worker = None
+        self._connect()
+        if db_path:
+            logger.info(f"Job queue persisted at {db_path}")
+    
+    def _connect(self):
+        # SQLite 연결은 fork를 넘어 공유할 수 없으므로 프로세스마다 새로 연다
+        if self._db_pid != os.getpid():
+            self._db = sqlite3.connect(
+                self.db_path or ':memory:', timeout=30.0, check_same_thread=False, isolation_level=None
+            )
+            if self.db_path:
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs "
+                "(id TEXT PRIMARY KEY, status TEXT NOT NULL, model TEXT, total INTEGER NOT NULL, "
+                "completed INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, error TEXT, "
+                "worker TEXT, lease_until REAL, available_at REAL NOT NULL, expires_at REAL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS job_texts "
+                "(job_id TEXT NOT NULL, text_id INTEGER NOT NULL, text TEXT NOT NULL, PRIMARY KEY (job_id, text_id))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS job_results "
+                "(job_id TEXT NOT NULL, text_id INTEGER NOT NULL, result TEXT NOT NULL, PRIMARY KEY (job_id, text_id))"
+            )
+            self._db_pid = os.getpid()
+            # lease 소유자 구분자 (프로세스마다 다름)
+            self._worker = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    
+    def submit(self, texts: List[str], model: Optional[str] = None) -> Dict:
+        """작업 등록 후 상태 반환"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._connect()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT INTO jobs (id, status, model, total, available_at, created_at, updated_at) "
+                    "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                    (job_id, model, len(texts), now, now, now)
+                )
+                self._db.executemany(
+                    "INSERT INTO job_texts (job_id, text_id, text) VALUES (?, ?, ?)",
+                    [(job_id, i, text) for i, text in enumerate(texts)]
+                )
+                if not texts:
+                    self._finish(job_id, 'completed', None, now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return self._get(job_id)
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        """작업 상태 (없거나 만료되었으면 None)"""
+        with self._lock:
+            self._connect()
+            return self._get(job_id)
+    
+    def _get(self, job_id: str) -> Optional[Dict]:
+        row = self._db.execute(
+            f"SELECT {', '.join(_JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return dict(zip(_JOB_COLUMNS, row)) if row is not None else None
+    
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[str]:
+        """완료된 텍스트의 결과 JSON (text_id 순서)"""
+        with self._lock:
+            self._connect()
+            rows = self._db.execute(
+                "SELECT result FROM job_results WHERE job_id = ? ORDER BY text_id LIMIT ? OFFSET ?",
+                (job_id, limit, offset)
+            ).fetchall()
+        return [result for result, in rows]
+    
+    def claim(self) -> Optional[Dict]:
+        """처리할 작업 하나를 lease로 가져옴 (대기 중이거나 lease가 만료된 작업, 오래된 것부터)"""
+        now = time.time()
+        with self._lock:
+            self._connect()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # 재시도 횟수를 다 쓴 채로 lease가 만료된 작업 (처리 중 워커가 반복해서 죽은 경우)
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Worker lease expired', worker = NULL, "
+                    "expires_at = ?, updated_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now + self.ttl_seconds, now, now, self.max_attempts)
+                )
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE available_at <= ? AND attempts < ? "
+                    "AND (status = 'queued' OR (status = 'running' AND lease_until < ?)) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now, self.max_attempts, now)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (self._worker, now + self.lease_seconds, now, row[0])
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return self._get(row[0]) if row is not None else None
+    
+    def texts(self, job_id: str, start: int, limit: int) -> List[str]:
+        """start번째 텍스트부터 최대 limit개"""
+        with self._lock:
+            self._connect()
+            rows = self._db.execute(
+                "SELECT text FROM job_texts WHERE job_id = ? AND text_id >= ? ORDER BY text_id LIMIT ?",
+                (job_id, start, limit)
+            ).fetchall()
+        return [text for text, in rows]
+    
+    def complete_chunk(self, job_id: str, start: int, results: List[str]) -> bool:
+        """start번째부터의 결과를 기록하고 lease 연장 (모두 끝나면 'completed')
+        
+        Returns:
+            lease를 잃어 기록하지 못했으면 False (다른 워커가 작업을 가져간 경우)
+        """
+        now = time.time()
+        with self._lock:
+            self._connect()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                updated = self._db.execute(
+                    "UPDATE jobs SET completed = completed + ?, lease_until = ?, updated_at = ? "
+                    "WHERE id = ? AND status = 'running' AND worker = ? AND completed = ?",
+                    (len(results), now + self.lease_seconds, now, job_id, self._worker, start)
+                ).rowcount
+                if not updated:
+                    self._db.execute("ROLLBACK")
+                    return False
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO job_results (job_id, text_id, result) VALUES (?, ?, ?)",
+                    [(job_id, start + i, result) for i, result in enumerate(results)]
+                )
+                self._db.execute(
+                    "UPDATE jobs SET status = 'completed', worker = NULL, expires_at = ? "
+                    "WHERE id = ? AND completed >= total",
+                    (now + self.ttl_seconds, job_id)
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return True
+    
+    def fail(self, job_id: str, error: str) -> str:
+        """처리 중 오류 기록 후 백오프 뒤 재시도 (재시도 횟수를 다 쓰면 'failed')
+        
+        lease를 잃은 워커는 다른 워커가 가져간 작업을 바꾸지 않는다.
+        
+        Returns:
+            변경된 상태 (lease를 잃었으면 현재 상태)
+        """
+        now = time.time()
+        with self._lock:
+            self._connect()
+            job = self._get(job_id)
+            if job is None:
+                return 'failed'
+            if job['attempts'] >= self.max_attempts:
+                status = 'failed'
+                updated = self._finish(job_id, status, error, now, worker=self._worker)
+            else:
+                status = 'queued'
+                updated = self._db.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, worker = NULL, lease_until = NULL, "
+                    "available_at = ?, updated_at = ? WHERE id = ? AND worker = ?",
+                    (error, now + min(60.0, 2.0 ** job['attempts']), now, job_id, self._worker)
+                ).rowcount
+            if not updated:
+                return self._get(job_id)['status']
+            return status
+    
+    def release(self, job_id: str):
+        """종료하는 워커가 처리 중이던 작업을 시도 횟수에 넣지 않고 큐로 돌려보냄"""
+        now = time.time()
+        with self._lock:
+            self._connect()
+            self._db.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, lease_until = NULL, "
+                "attempts = MAX(0, attempts - 1), updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND worker = ?",
+                (now, job_id, self._worker)
+            )
+    
+    def _finish(self, job_id: str, status: str, error: Optional[str], now: float,
+                worker: Optional[str] = None) -> int:
+        """작업 종료 기록 (worker가 주어지면 그 워커가 lease를 가진 경우에만)
+        
+        Returns:
+            변경된 행 수
+        """
+        query = (
+            "UPDATE jobs SET status = ?, error = ?, worker = NULL, lease_until = NULL, "
+            "expires_at = ?, updated_at = ? WHERE id = ?"
+        )
+        params = (status, error, now + self.ttl_seconds, now, job_id)
+        if worker is not None:
+            query += " AND worker = ?"
+            params += (worker,)
+        return self._db.execute(query, params).rowcount
+    
+    def purge(self) -> int:
+        """보관 기간이 지난 작업과 텍스트, 결과 삭제
+        
+        Returns:
+            삭제한 작업 수
+        """
+        now = time.time()
+        with self._lock:
+            self._connect()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                expired = [job_id for job_id, in self._db.execute(
+                    "SELECT id FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+                ).fetchall()]
+                for table, column in (('job_results', 'job_id'), ('job_texts', 'job_id'), ('jobs', 'id')):
+                    self._db.executemany(
+                        f"DELETE FROM {table} WHERE {column} = ?", [(job_id,) for job_id in expired]
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(expired)
+    
+    def stats(self) -> Dict[str, int]:
+        """상태별 작업 수"""
+        with self._lock:
+            self._connect()
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+
+class JobWorker:
+    """JobQueue의 작업을 꺼내 프로세스의 공유 분석기로 처리하는 백그라운드 태스크
+    
+    작업을 chunk_size개 텍스트씩 나누어 분석하고 묶음마다 결과를 기록한다. 분석은
+    대화형 요청과 같은 추론 스레드를 사용하지만 한 번에 한 묶음만 차지하므로,
+    큰 작업이 있어도 단일 문서 요청은 최대 한 묶음만큼만 기다린다.
+    """
+    
+    def __init__(self, queue: JobQueue,
+                 analyze: Callable[[List[str], Optional[str], int], Awaitable[List[str]]],
+                 chunk_size: int = 8, poll_interval: float = 1.0, purge_interval: float = 60.0):
+        """
+        Args:
+            queue: 작업 큐
+            analyze: (텍스트 목록, 모델명, 시작 text_id)를 받아 텍스트별 결과 JSON을 반환하는 함수
+            chunk_size: 한 번에 분석할 텍스트 수
+            poll_interval: 처리할 작업이 없을 때 큐를 다시 확인하는 간격 (초)
+            purge_interval: 만료된 작업을 삭제하는 간격 (초)
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be >= 1: {chunk_size}")
+        
+        self.queue = queue
+        self.analyze = analyze
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+    
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def notify(self):
+        """같은 프로세스에 새 작업이 제출되었음을 알려 폴링 간격을 기다리지 않게 함"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    async def _run(self):
+        while True:
+            if time.monotonic() - self._last_purge >= self.purge_interval:
+                self._last_purge = time.monotonic()
+                purged = await asyncio.to_thread(self.queue.purge)
+                if purged:
+                    logger.info(f"Purged {purged} expired jobs")
+            
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self.queue.claim)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await self._process(job)
+    
+    async def _process(self, job: Dict):
+        job_id = job['id']
+        completed = job['completed']
+        logger.info(f"Processing job {job_id} from {completed}/{job['total']} (attempt {job['attempts']})")
+        try:
+            while completed < job['total']:
+                texts = await asyncio.to_thread(self.queue.texts, job_id, completed, self.chunk_size)
+                results = await self.analyze(texts, job['model'], completed)
+                if not await asyncio.to_thread(self.queue.complete_chunk, job_id, completed, results):
+                    logger.warning(f"Lost the lease on job {job_id}, another worker continues it")
+                    return
+                completed += len(texts)
+        except asyncio.CancelledError:
+            await asyncio.to_thread(self.queue.release, job_id)
+            raise
+        except Exception as e:
+            status = await asyncio.to_thread(self.queue.fail, job_id, str(e))
+            logger.error(f"Job {job_id} failed at {completed}/{job['total']} ({status}): {e}")
+
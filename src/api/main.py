@@ -1,29 +1,238 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
+import asyncio
+import gc
+import json
 import logging
-from typing import Dict, Any
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, AsyncIterator, List, Optional
 
-from ..perplexity_analyzer.analyzer import PerplexityAnalyzer
+from .admission import AdmissionController, estimate_tokens, run_with_deadline
+from .batcher import InferenceBatcher
+from .config import Settings
+from .jobs import JobQueue, JobWorker
+from .metrics import PrometheusInstrumentation, SampledProfiler, render_metrics
+from .serialization import encode_compact, negotiate_format
 from .models import (
-    TextRequest, BatchTextRequest, AnalysisResult, 
-    BatchAnalysisResult, ModelInfo, HealthResponse
+    TextRequest, BatchTextRequest, AnalysisResult, AdmissionStatus,
+    BatchAnalysisResult, BatchProgress, DocumentAnalysisResult, DuplicateQueryResult,
+    JobResultPage, JobStatus, ModelInfo, RegisteredModel, HealthResponse,
+    RescoreRequest, RescoreResult
 )
+from ..perplexity_analyzer.dedup import document_id
+from ..perplexity_analyzer.registry import ModelRegistry, ModelSpec, parse_model_specs
+from ..perplexity_analyzer.score_store import TokenScores
+from ..perplexity_analyzer.sessions import DocumentSessionStore
 
-# 전역 analyzer 변수
+if TYPE_CHECKING:
+    from ..perplexity_analyzer.analyzer import PerplexityAnalyzer
+
+# 전역 analyzer (기본 모델) / 모델 레지스트리 / batcher / 설정 / 문서 세션 / 작업 큐 / admission 변수
 analyzer = None
+registry = None
+batcher = None
+settings = None
+sessions = None
+jobs = None
+admission = None
+# 불러온 토큰 점수 저장소 (새 문서가 기록되면 다시 불러옴)
+token_scores = None
+job_worker = None
+# 모델 상태: 'loading' -> 'warming_up' -> 'ready' (실패시 'failed')
+model_status = 'loading'
+# fork 전에 로드한 경우 워커에서 복원할 torch 스레드 수
+_worker_num_threads = None
+
+
+def _model_specs(settings: Settings) -> List[ModelSpec]:
+    """MODELS 설정의 모델 목록 (설정하지 않으면 MODEL_NAME 하나)"""
+    specs = parse_model_specs(
+        settings.models or settings.model_name, settings.model_thresholds, settings.model_paths
+    )
+    for spec in specs:
+        if spec.name == settings.model_name and spec.model_path is None:
+            spec.model_path = settings.model_path
+    return specs
+
+
+def _default_spec(settings: Settings) -> ModelSpec:
+    specs = _model_specs(settings)
+    return next((spec for spec in specs if spec.name == settings.model_name), specs[0])
+
+
+def _create_analyzer(settings: Settings, spec: Optional[ModelSpec] = None) -> 'PerplexityAnalyzer':
+    # torch/transformers 임포트를 모델 로드 시점까지 미뤄 서버 기동을 빠르게 한다
+    from ..perplexity_analyzer.analyzer import PerplexityAnalyzer
+    
+    if spec is None:
+        spec = _default_spec(settings)
+    logging.info(f"Loading PerplexityAnalyzer ({spec.name})...")
+    result = PerplexityAnalyzer(
+        model_name=spec.name,
+        model_path=spec.model_path,
+        perplexity_threshold=spec.perplexity_threshold,
+        precision=settings.precision,
+        cache_size=settings.cache_size,
+        cache_path=settings.cache_path,
+        scoring_mode=settings.scoring_mode,
+        execution_strategy=settings.execution_strategy,
+        prefix_cache_mb=settings.prefix_cache_mb,
+        prefix_cache_tokens=settings.prefix_cache_tokens,
+        min_sentence_length=settings.min_sentence_length,
+        # 캐스케이드 n-gram 모델은 기본 모델의 perplexity에 맞춰 보정됨
+        prefilter_path=settings.prefilter_path if spec.name == settings.model_name else None,
+        cascade_band=settings.cascade_band,
+        dedup_max_documents=settings.dedup_max_documents,
+        dedup_path=settings.dedup_path,
+        dedup_threshold=settings.dedup_threshold
+    )
+    logging.info("PerplexityAnalyzer loaded successfully")
+    return result
+
+
+def _preload_analyzer(settings: Settings):
+    """gunicorn --preload로 마스터 프로세스에서 모델을 한 번만 로드
+    
+    fork된 워커들은 가중치 페이지를 copy-on-write로 공유하므로 워커 수가 늘어도
+    모델 메모리는 늘지 않는다 (가중치를 /dev/shm으로 옮기지 않으므로 컨테이너의
+    --shm-size와 무관). fork 이후 OpenMP 스레드 풀 문제를 피하기 위해 로드 중에는
+    단일 스레드를 사용하고 워커에서 복원한다.
+    """
+    import torch
+    
+    global analyzer, _worker_num_threads
+    _worker_num_threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    
+    analyzer = _create_analyzer(settings)
+    
+    # 워커의 GC가 공유 객체를 건드려 copy-on-write가 일어나지 않도록 고정
+    gc.collect()
+    gc.freeze()
+
+
+_settings = Settings.from_env()
+if _settings.preload_model:
+    _preload_analyzer(_settings)
+
+
+def _load_on_demand(settings: Settings, spec: ModelSpec) -> 'PerplexityAnalyzer':
+    """요청이 처음 선택한 추가 모델 로드 (워밍업 없이 바로 메트릭 기록)"""
+    loaded = _create_analyzer(settings, spec)
+    loaded.instrumentation = PrometheusInstrumentation()
+    return loaded
+
+
+async def _load_model(settings: Settings):
+    """기본 모델 로드와 워밍업을 백그라운드에서 수행한 뒤 준비 상태로 전환
+    
+    서버는 즉시 요청을 받기 시작하고 (/health는 바로 응답), 분석 엔드포인트와
+    /ready는 워밍업까지 끝난 뒤에 열린다. 다른 모델은 요청이 선택할 때 로드한다.
+    """
+    global analyzer, registry, batcher, job_worker, model_status
+    try:
+        if analyzer is None:
+            loaded = await asyncio.to_thread(_create_analyzer, settings)
+        else:
+            logging.info("Using preloaded PerplexityAnalyzer (shared weights)")
+            loaded = analyzer
+        
+        # 워커 계획의 스레드 수 (preload한 경우 로드 전 스레드 수 복원)
+        num_threads = settings.torch_threads or _worker_num_threads
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        
+        model_status = 'warming_up'
+        if settings.warmup:
+            await asyncio.to_thread(loaded.warmup)
+        
+        # 워밍업 forward는 메트릭에 포함하지 않음
+        loaded.instrumentation = PrometheusInstrumentation()
+        loaded_registry = ModelRegistry(
+            _model_specs(settings),
+            loader=lambda spec: _load_on_demand(settings, spec),
+            default=loaded.model_name,
+            memory_budget_mb=settings.model_memory_budget_mb
+        )
+        loaded_registry.put(loaded.model_name, loaded)
+        loaded_batcher = InferenceBatcher(
+            loaded,
+            max_batch_tokens=settings.batch_max_tokens,
+            max_wait_ms=settings.batch_max_wait_ms,
+            profiler=SampledProfiler(settings.profile_dir, settings.profile_sample_rate)
+        )
+        await loaded_batcher.start()
+        
+        analyzer, registry, batcher = loaded, loaded_registry, loaded_batcher
+        # 모델이 준비된 뒤부터 큐에 쌓인 작업 처리 (재시작 전에 제출된 작업 포함)
+        job_worker = JobWorker(jobs, _analyze_job_chunk, chunk_size=settings.job_chunk_size)
+        await job_worker.start()
+        model_status = 'ready'
+        logging.info("Model is ready")
+    except Exception as e:
+        model_status = 'failed'
+        logging.exception(f"Model loading failed: {e}")
+
+
+def _require_ready():
+    if model_status != 'ready':
+        raise HTTPException(status_code=503, detail=f"Model is not ready ({model_status})")
+
+
+def _resolve_model(model: Optional[str], text: str = '') -> str:
+    """요청이 지정한 모델명 확인 (없으면 텍스트의 문자 체계로 자동 선택)"""
+    try:
+        return registry.resolve(model, text)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _get_analyzer(name: str) -> 'PerplexityAnalyzer':
+    # 로드되지 않은 모델은 이벤트 루프 밖에서 로드
+    return await asyncio.to_thread(registry.get, name)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 시작시 모델 로드
-    global analyzer
-    logging.info("Loading PerplexityAnalyzer...")
-    analyzer = PerplexityAnalyzer(model_name='kogpt2')
-    logging.info("PerplexityAnalyzer loaded successfully")
+    # 시작시 모델 로드를 백그라운드로 시작
+    global settings, sessions, jobs, admission, model_status
+    settings = Settings.from_env()
+    admission = AdmissionController(
+        max_request_tokens=settings.max_request_tokens,
+        max_inflight_tokens=settings.max_inflight_tokens,
+        retry_after_seconds=settings.retry_after_seconds
+    )
+    sessions = DocumentSessionStore(
+        max_sessions=settings.session_max_documents,
+        ttl_seconds=settings.session_ttl_seconds
+    )
+    jobs = JobQueue(
+        db_path=settings.job_db_path,
+        ttl_seconds=settings.job_ttl_seconds,
+        max_attempts=settings.job_max_attempts,
+        lease_seconds=settings.job_lease_seconds
+    )
+    model_status = 'loading'
+    load_task = asyncio.create_task(_load_model(settings))
     
     yield
     
-    # 종료시 정리 (필요시)
+    # 종료시 정리
     logging.info("Shutting down...")
+    if not load_task.done():
+        load_task.cancel()
+        try:
+            await load_task
+        except asyncio.CancelledError:
+            pass
+    # 처리 중이던 작업은 큐로 돌려보내 다른 워커나 재시작 후 이어서 처리
+    if job_worker is not None:
+        await job_worker.stop()
+    if batcher is not None:
+        await batcher.stop()
 
 app = FastAPI(
     title="Resume AI Filter API",
@@ -35,58 +244,418 @@ app = FastAPI(
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """서버 상태 확인"""
+    """서버 생존 확인 (모델 로드 여부와 무관하게 200)"""
     return HealthResponse(
         status="healthy",
-        message="Resume AI Filter API is running"
+        message="Resume AI Filter API is running",
+        model_status=model_status
+    )
+
+
+@app.get("/ready", response_model=HealthResponse)
+async def readiness_check():
+    """모델 로드와 워밍업이 끝나 요청을 처리할 수 있는지 확인 (준비 전에는 503)"""
+    if model_status != 'ready':
+        return JSONResponse(
+            status_code=503,
+            content=HealthResponse(
+                status="not_ready",
+                message="Model is not ready",
+                model_status=model_status
+            ).model_dump()
+        )
+    return HealthResponse(
+        status="ready",
+        message="Model is loaded and warmed up",
+        model_status=model_status
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 형식 메트릭 (단계별 지연시간, forward 배치 크기/토큰 수, 큐 대기시간)"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+@app.get("/admission", response_model=AdmissionStatus)
+async def get_admission_status():
+    """이 워커의 admission control 한도와 처리 중인 요청 상태"""
+    return AdmissionStatus(
+        max_request_tokens=admission.max_request_tokens,
+        max_inflight_tokens=admission.max_inflight_tokens,
+        **admission.stats()
     )
 
 
 @app.get("/model/info", response_model=ModelInfo)
 async def get_model_info():
-    """현재 사용 중인 모델 정보 조회"""
-    if analyzer is None:
-        raise HTTPException(status_code=503, detail="Analyzer not initialized")
+    """기본 모델 정보 조회"""
+    _require_ready()
     
     return ModelInfo(**analyzer.get_model_info())
 
 
+@app.get("/models", response_model=list[RegisteredModel])
+async def list_models():
+    """설정된 모델 목록과 로드 상태, 모델별 임계값 조회"""
+    _require_ready()
+    
+    return [RegisteredModel(**info) for info in registry.info()]
+
+
+def _deadline_ms(request) -> Optional[float]:
+    return request.deadline_ms or settings.request_deadline_ms or None
+
+
+async def _score_sentences(model_analyzer: 'PerplexityAnalyzer', sentences: List[str],
+                           reused: Optional[Dict[int, float]] = None,
+                           cancel: Optional[threading.Event] = None) -> tuple:
+    """sentence 모드에서 동시 요청의 문장들과 합쳐 이벤트 루프 밖에서 점수화
+    
+    cancel이 설정되면 추론 큐에서 기다리거나 점수화 중인 이 요청의 문장을 건너뛴다.
+    """
+    # 재사용한 점수나 캐스케이드 1단계에서 결정되지 않은 문장만 모델로 점수화
+    perplexities, stages, escalated = model_analyzer.prefilter_sentences(sentences, reused)
+    scored = await batcher.score([sentences[i] for i in escalated], model_analyzer, cancel)
+    for i, ppl in zip(escalated, scored):
+        perplexities[i] = ppl
+    return perplexities, stages
+
+
+_JOBS_HINT = "; submit large batches to /jobs"
+
+_FORMAT_QUERY = Query(
+    None, pattern='^(json|compact|msgpack)$',
+    description="응답 형식: json(기본), compact(병렬 배열 JSON), msgpack (Accept 헤더로도 선택 가능)"
+)
+
+
 @app.post("/analyze", response_model=AnalysisResult)
-async def analyze_text(request: TextRequest):
-    """단일 텍스트의 AI 생성 여부 분석"""
-    if analyzer is None:
-        raise HTTPException(status_code=503, detail="Analyzer not initialized")
+async def analyze_text(request: TextRequest, http_request: Request, format: Optional[str] = _FORMAT_QUERY):
+    """단일 텍스트의 AI 생성 여부 분석
+    
+    문장 분할 후 추정한 토큰 수로 admission control을 거치며 (413/429), deadline_ms가
+    지나거나 클라이언트 연결이 끊기면 아직 점수화하지 않은 문장은 건너뛴다 (504/499).
+    """
+    _require_ready()
+    model = _resolve_model(request.model, request.text)
+    response_format = negotiate_format(format, http_request.headers.get('accept'))
+    compact = response_format != 'json'
+    
+    async def analyze(model_analyzer: 'PerplexityAnalyzer', sentences: List[str], spans: List[tuple],
+                      cancel: threading.Event) -> Dict:
+        if model_analyzer.scoring_mode == 'document':
+            # 문서 단일 패스 점수화는 요청 간에 합치지 않음
+            return await batcher.run_exclusive(
+                model_analyzer.analyze_sentences, request.text, request.doc_id, compact, cancel
+            )
+        
+        near_duplicates, reused = model_analyzer.match_duplicates(sentences, request.doc_id)
+        perplexities, stages = await _score_sentences(model_analyzer, sentences, reused, cancel)
+        model_analyzer.register_document(
+            request.doc_id or document_id(request.text), sentences, perplexities, stages
+        )
+        if compact:
+            result = model_analyzer.build_columns(perplexities, spans, stages)
+        else:
+            result = model_analyzer.build_result(sentences, perplexities, spans, stages)
+        result['near_duplicates'] = near_duplicates
+        return result
     
     try:
-        result = analyzer.analyze_sentences(request.text)
-        return AnalysisResult(**result)
+        model_analyzer = await _get_analyzer(model)
+        sentences, spans = model_analyzer.split_sentences(request.text)
+        with admission.admit(estimate_tokens(sentences)) as reservation:
+            result = await run_with_deadline(
+                admission, http_request, _deadline_ms(request),
+                lambda cancel: analyze(model_analyzer, sentences, spans, cancel),
+                reservation
+            )
+        
+        with model_analyzer.instrumentation.stage('serialize'):
+            if compact:
+                return encode_compact(result, response_format)
+            body = AnalysisResult(**result).model_dump_json()
+        return Response(content=body, media_type='application/json')
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+async def _analyze_texts(texts: List[str], model: Optional[str], compact: bool = False,
+                         cancel: Optional[threading.Event] = None) -> List[Dict]:
+    """텍스트마다 모델을 골라 같은 모델의 텍스트끼리 함께 분석 (text_id는 입력 순서)"""
+    groups: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        groups.setdefault(registry.resolve(model, text), []).append(i)
+    
+    results = [None] * len(texts)
+    for name, indices in groups.items():
+        model_analyzer = await _get_analyzer(name)
+        group_results = await batcher.run_exclusive(
+            model_analyzer.analyze_batch, [texts[i] for i in indices], None, compact, cancel
+        )
+        for i, result in zip(indices, group_results):
+            result['text_id'] = i
+            results[i] = result
+    return results
+
+
 @app.post("/analyze/batch", response_model=list[BatchAnalysisResult])
-async def analyze_batch(request: BatchTextRequest):
-    """여러 텍스트의 AI 생성 여부 배치 분석"""
-    if analyzer is None:
-        raise HTTPException(status_code=503, detail="Analyzer not initialized")
+async def analyze_batch(request: BatchTextRequest, http_request: Request, format: Optional[str] = _FORMAT_QUERY):
+    """여러 텍스트의 AI 생성 여부 배치 분석 (요청 한도를 넘는 배치는 /jobs로 제출)"""
+    _require_ready()
+    _resolve_model(request.model)
+    response_format = negotiate_format(format, http_request.headers.get('accept'))
+    compact = response_format != 'json'
     
     try:
-        results = analyzer.analyze_batch(request.texts)
-        return [
-            BatchAnalysisResult(text_id=result["text_id"], result=AnalysisResult(**result))
-            for result in results
-        ]
+        with admission.admit(estimate_tokens(request.texts), hint=_JOBS_HINT) as reservation:
+            results = await run_with_deadline(
+                admission, http_request, _deadline_ms(request),
+                lambda cancel: _analyze_texts(request.texts, request.model, compact, cancel),
+                reservation
+            )
+        
+        with analyzer.instrumentation.stage('serialize'):
+            if compact:
+                return encode_compact(results, response_format)
+            items = [
+                BatchAnalysisResult(text_id=result["text_id"], result=AnalysisResult(**result)).model_dump_json()
+                for result in results
+            ]
+        return Response(content=f"[{','.join(items)}]", media_type='application/json')
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Batch analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
 
 
+async def _analyze_job_chunk(texts: List[str], model: Optional[str], start: int) -> List[str]:
+    """작업의 텍스트 묶음을 분석해 텍스트별 BatchAnalysisResult JSON 반환"""
+    results = await _analyze_texts(texts, model)
+    return [
+        BatchAnalysisResult(text_id=start + result['text_id'], result=AnalysisResult(**result)).model_dump_json()
+        for result in results
+    ]
+
+
+async def _get_job(job_id: str) -> Dict:
+    # 작업 워커의 결과 기록과 SQLite 잠금이 겹쳐도 이벤트 루프를 막지 않도록 스레드에서 조회
+    job = await asyncio.to_thread(jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+def _job_status(job: Dict) -> JobStatus:
+    return JobStatus(job_id=job['id'], **{k: v for k, v in job.items() if k != 'id'})
+
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(request: BatchTextRequest):
+    """대용량 배치 분석 작업 제출 (작업 ID를 바로 반환하고 백그라운드에서 처리)
+    
+    작업은 영속 큐(JOB_DB_PATH)에 저장되어 워커가 재시작되어도 이어서 처리되며,
+    대화형 요청과 추론 스레드를 묶음 단위로 나누어 쓴다.
+    """
+    _require_ready()
+    _resolve_model(request.model)
+    
+    job = await asyncio.to_thread(jobs.submit, request.texts, request.model)
+    job_worker.notify()
+    return _job_status(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """작업 상태와 진행률 조회"""
+    return _job_status(await _get_job(job_id))
+
+
+@app.get("/jobs/{job_id}/results", response_model=JobResultPage)
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="건너뛸 결과 수"),
+    limit: int = Query(100, ge=1, le=1000, description="반환할 최대 결과 수")
+):
+    """작업 결과를 text_id 순서로 페이지 단위 조회 (처리 중이면 완료된 텍스트까지만)"""
+    job = await _get_job(job_id)
+    items = await asyncio.to_thread(jobs.results, job_id, offset, limit)
+    # 저장된 결과 JSON을 다시 파싱하지 않고 JobResultPage 형식의 본문에 그대로 이어 붙임
+    body = '{"job_id":%s,"status":%s,"total":%s,"offset":%s,"results":[%s]}' % (
+        json.dumps(job_id), json.dumps(job['status']), json.dumps(job['total']), json.dumps(offset),
+        ','.join(items)
+    )
+    return Response(content=body, media_type='application/json')
+
+
+@app.post("/duplicates", response_model=DuplicateQueryResult)
+async def query_duplicates(request: TextRequest):
+    """텍스트와 비슷한 이전 분석 문서 조회 (분석하거나 인덱스에 등록하지 않음)"""
+    _require_ready()
+    model_analyzer = await _get_analyzer(_resolve_model(request.model, request.text))
+    if model_analyzer.dedup is None:
+        raise HTTPException(status_code=400, detail="Duplicate index is not enabled")
+    
+    sentences, _ = model_analyzer.split_sentences(request.text)
+    return DuplicateQueryResult(near_duplicates=model_analyzer.dedup.query(sentences, exclude=request.doc_id))
+
+
+def _rescore(request: RescoreRequest) -> RescoreResult:
+    global token_scores
+    start_time = time.perf_counter()
+    if token_scores is None or token_scores.is_stale():
+        token_scores = TokenScores(settings.score_store_path)
+    scores = token_scores
+    
+    rescored = scores.rescore(request.threshold, request.natural_scale, request.aggregation)
+    documents = list(scores.iter_documents(rescored, request.offset, request.offset + request.limit))
+    return RescoreResult(
+        summary=scores.summary(rescored),
+        documents=documents,
+        seconds=time.perf_counter() - start_time
+    )
+
+
+@app.post("/scores/rescore", response_model=RescoreResult)
+async def rescore(request: RescoreRequest):
+    """토큰 점수 저장소의 문장들을 새 임계값, confidence 곡선, 집계 방식으로 재분류
+    
+    모델을 사용하지 않으므로 모델 로드 전에도 호출할 수 있다. 코퍼스 전체 통계와
+    offset부터 limit개 문서의 통계, 권장사항을 반환한다.
+    """
+    if not settings.score_store_path:
+        raise HTTPException(status_code=400, detail="Score store is not configured (SCORE_STORE_PATH)")
+    return await asyncio.to_thread(_rescore, request)
+
+
+@app.post("/documents/{doc_id}/analyze", response_model=DocumentAnalysisResult)
+async def analyze_document_revision(doc_id: str, request: TextRequest, http_request: Request):
+    """편집 중인 문서의 새 리비전 분석
+    
+    같은 doc_id로 제출된 이전 리비전과 문장 단위로 비교해 새로 추가되거나 바뀐
+    문장만 점수화하고, 나머지는 이전 점수를 재사용해 전체 결과(통계와 권장사항
+    포함)를 다시 구성한다. document 모드의 점수는 앞 문장 문맥에 의존하므로
+    매번 전체를 다시 점수화한다. 이전 리비전과 다른 모델로 분석해도 전체를 다시 점수화한다.
+    """
+    _require_ready()
+    model = _resolve_model(request.model, request.text)
+    
+    async def score(model_analyzer: 'PerplexityAnalyzer', sentences: List[str], cancel: threading.Event) -> tuple:
+        if model_analyzer.scoring_mode == 'document':
+            perplexities, stages = await batcher.run_exclusive(
+                model_analyzer.score_sentences, sentences, None, cancel
+            )
+            return perplexities, stages, list(range(len(sentences)))
+        
+        perplexities, stages, changed = sessions.diff(doc_id, sentences, model)
+        scored, scored_stages = await _score_sentences(model_analyzer, [sentences[i] for i in changed], None, cancel)
+        for i, ppl, stage in zip(changed, scored, scored_stages):
+            perplexities[i] = ppl
+            stages[i] = stage
+        return perplexities, stages, changed
+    
+    try:
+        model_analyzer = await _get_analyzer(model)
+        sentences, spans = model_analyzer.split_sentences(request.text)
+        # 다시 점수화할 문장 수와 관계없이 문서 전체 크기로 제한
+        with admission.admit(estimate_tokens(sentences)) as reservation:
+            perplexities, stages, changed = await run_with_deadline(
+                admission, http_request, _deadline_ms(request),
+                lambda cancel: score(model_analyzer, sentences, cancel),
+                reservation
+            )
+        
+        revision = sessions.update(doc_id, sentences, perplexities, stages, model)
+        result = model_analyzer.build_result(sentences, perplexities, spans, stages)
+        
+        with model_analyzer.instrumentation.stage('serialize'):
+            body = DocumentAnalysisResult(
+                doc_id=doc_id,
+                revision=revision,
+                rescored_sentences=len(changed),
+                reused_sentences=len(sentences) - len(changed),
+                **result
+            ).model_dump_json()
+        return Response(content=body, media_type='application/json')
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Document revision analysis error: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@app.delete("/documents/{doc_id}")
+async def delete_document_session(doc_id: str):
+    """저장된 문서 세션 삭제"""
+    if not sessions.delete(doc_id):
+        raise HTTPException(status_code=404, detail=f"Unknown document: {doc_id}")
+    return {"doc_id": doc_id, "deleted": True}
+
+
+def _format_event(event: str, data: str, stream_format: str) -> str:
+    if stream_format == 'sse':
+        return f"event: {event}\ndata: {data}\n\n"
+    return f'{{"event": "{event}", "data": {data}}}\n'
+
+
+@app.post("/analyze/batch/stream")
+async def analyze_batch_stream(
+    request: BatchTextRequest,
+    http_request: Request,
+    format: str = Query('ndjson', pattern='^(ndjson|sse)$', description="ndjson 또는 sse")
+):
+    """여러 텍스트를 분석하며 텍스트별 결과와 진행률을 완료되는 대로 스트리밍
+    
+    텍스트를 stream_chunk_size개씩 함께 점수화하고, 각 묶음이 끝날 때마다
+    result 이벤트(BatchAnalysisResult)와 progress 이벤트를 보낸다.
+    클라이언트 연결이 끊기면 남은 텍스트는 처리하지 않는다.
+    """
+    _require_ready()
+    _resolve_model(request.model)
+    # 묶음마다 연결을 확인하며 처리하므로 처리 용량 대신 요청 크기만 제한
+    admission.check_size(estimate_tokens(request.texts), hint=_JOBS_HINT)
+    
+    texts = request.texts
+    chunk_size = settings.stream_chunk_size
+    
+    async def events() -> AsyncIterator[str]:
+        completed = 0
+        for start in range(0, len(texts), chunk_size):
+            if await http_request.is_disconnected():
+                logging.info(f"Client disconnected, stopping batch stream at {completed}/{len(texts)}")
+                return
+            
+            try:
+                results = await _analyze_texts(texts[start:start + chunk_size], request.model)
+            except Exception as e:
+                logging.error(f"Batch stream error: {e}")
+                yield _format_event('error', json.dumps({'detail': f"Batch analysis failed: {str(e)}"}), format)
+                return
+            
+            for result in results:
+                item = BatchAnalysisResult(text_id=start + result['text_id'], result=AnalysisResult(**result))
+                yield _format_event('result', item.model_dump_json(), format)
+            
+            completed += len(results)
+            progress = BatchProgress(completed=completed, total=len(texts))
+            yield _format_event('progress', progress.model_dump_json(), format)
+    
+    media_type = 'text/event-stream' if format == 'sse' else 'application/x-ndjson'
+    return StreamingResponse(events(), media_type=media_type)
+
+
 @app.get("/")
 async def root():
     """루트 엔드포인트"""
     return {
         "message": "Resume AI Filter API", 
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready"
     }
\ No newline at end of file
@@ -0,0 +1,122 @@
+import logging
+import os
+import random
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+from ..perplexity_analyzer.instrumentation import Instrumentation
+
+logger = logging.getLogger(__name__)
+
+STAGE_SECONDS = Histogram(
+    'resume_filter_stage_seconds',
+    'Time spent in each analysis stage',
+    ['stage'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+FORWARD_BATCH_SIZE = Histogram(
+    'resume_filter_forward_batch_size',
+    'Sequences per model forward pass',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+FORWARD_TOKENS = Histogram(
+    'resume_filter_forward_tokens',
+    'Non-padding tokens per model forward pass',
+    buckets=(16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+)
+FORWARD_PADDED_TOKENS = Histogram(
+    'resume_filter_forward_padded_tokens',
+    'Tokens per model forward pass including padding',
+    buckets=(16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    'resume_filter_queue_wait_seconds',
+    'Time requests wait in the inference queue before their forward pass starts',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+PROFILED_CALLS = Counter(
+    'resume_filter_profiled_calls_total',
+    'Inference calls recorded with torch.profiler'
+)
+INFLIGHT_TOKENS = Gauge(
+    'resume_filter_inflight_tokens',
+    'Estimated tokens of admitted requests still being processed',
+    multiprocess_mode='livesum'
+)
+INFLIGHT_REQUESTS = Gauge(
+    'resume_filter_inflight_requests',
+    'Admitted requests still being processed',
+    multiprocess_mode='livesum'
+)
+REJECTED_REQUESTS = Counter(
+    'resume_filter_rejected_requests_total',
+    'Requests rejected by admission control',
+    ['reason']
+)
+CANCELLED_REQUESTS = Counter(
+    'resume_filter_cancelled_requests_total',
+    'Requests whose remaining scoring was cancelled',
+    ['reason']
+)
+
+
+class PrometheusInstrumentation(Instrumentation):
+    """분석기 타이밍 훅을 Prometheus 히스토그램으로 기록"""
+    
+    def observe_stage(self, stage: str, seconds: float):
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    
+    def observe_forward(self, batch_size: int, tokens: int, padded_tokens: int):
+        FORWARD_BATCH_SIZE.observe(batch_size)
+        FORWARD_TOKENS.observe(tokens)
+        FORWARD_PADDED_TOKENS.observe(padded_tokens)
+    
+    def observe_queue_wait(self, seconds: float):
+        QUEUE_WAIT_SECONDS.observe(seconds)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus 텍스트 형식의 메트릭
+    
+    PROMETHEUS_MULTIPROC_DIR이 설정되어 있으면 모든 gunicorn 워커의 값을 합산한다.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class SampledProfiler:
+    """일부 추론 호출을 torch.profiler로 기록해 chrome trace 파일로 저장"""
+    
+    def __init__(self, trace_dir: Optional[str], sample_rate: float):
+        self.trace_dir = trace_dir
+        self.sample_rate = sample_rate if trace_dir else 0.0
+        if self.sample_rate > 0:
+            os.makedirs(trace_dir, exist_ok=True)
+            logger.info(f"torch.profiler enabled: sample_rate={sample_rate}, dir={trace_dir}")
+    
+    def wrap(self, func: Callable) -> Callable:
+        """샘플링에 당첨되면 프로파일러 안에서 실행하는 함수 반환"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return func
+        
+        def profiled(*args) -> Any:
+            from torch.profiler import ProfilerActivity, profile
+            
+            with profile(activities=[ProfilerActivity.CPU], record_shapes=True) as prof:
+                result = func(*args)
+            
+            path = os.path.join(self.trace_dir, f"trace-{os.getpid()}-{time.time_ns()}.json")
+            prof.export_chrome_trace(path)
+            PROFILED_CALLS.inc()
+            logger.info(f"Wrote torch.profiler trace: {path}")
+            return result
+        
+        return profiled
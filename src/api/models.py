@@ -4,10 +4,15 @@ from typing import List, Dict, Union, Optional
 
 class TextRequest(BaseModel):
     text: str = Field(..., description="분석할 텍스트")
+    doc_id: Optional[str] = Field(None, description="near-duplicate 인덱스에 등록할 문서 ID (기본: 내용 해시)")
+    model: Optional[str] = Field(None, description="사용할 모델명 (기본: 텍스트의 문자 체계로 자동 선택)")
+    deadline_ms: Optional[float] = Field(None, gt=0, description="처리 기한 (ms, 지나면 남은 점수화를 멈추고 504)")
 
 
 class BatchTextRequest(BaseModel):
     texts: List[str] = Field(..., description="분석할 텍스트 목록")
+    model: Optional[str] = Field(None, description="사용할 모델명 (기본: 텍스트마다 문자 체계로 자동 선택)")
+    deadline_ms: Optional[float] = Field(None, gt=0, description="처리 기한 (ms, 지나면 남은 점수화를 멈추고 504)")
 
 
 class SentenceResult(BaseModel):
@@ -17,6 +22,11 @@ class SentenceResult(BaseModel):
     classification: str
     confidence: float
     ai_suspicious: bool
+    # 원문 텍스트 기준 문자 오프셋 (text == 원문[start:end])
+    start: Optional[int] = None
+    end: Optional[int] = None
+    # 점수를 결정한 단계 ('duplicate', 'prefilter' 또는 'model')
+    stage: Optional[str] = None
 
 
 class OverallStats(BaseModel):
@@ -27,12 +37,35 @@ class OverallStats(BaseModel):
     ai_ratio: float
 
 
+class NearDuplicate(BaseModel):
+    doc_id: str
+    # MinHash로 추정한 Jaccard 유사도
+    similarity: float
+
+
 class AnalysisResult(BaseModel):
     ai_suspicious_sentences: List[SentenceResult]
     natural_sentences: List[SentenceResult]
     error_sentences: List[SentenceResult]
     overall_stats: OverallStats
     recommendations: List[str]
+    # 이전에 분석한 문서 중 near-duplicate (인덱스를 사용하지 않으면 None)
+    near_duplicates: Optional[List[NearDuplicate]] = None
+    # 점수를 계산한 모델
+    model: Optional[str] = None
+
+
+class DuplicateQueryResult(BaseModel):
+    near_duplicates: List[NearDuplicate]
+
+
+class DocumentAnalysisResult(AnalysisResult):
+    doc_id: str
+    # 같은 doc_id로 분석한 횟수 (1부터 시작)
+    revision: int
+    # 이번 리비전에서 새로 점수화한 문장 수와 이전 리비전 점수를 재사용한 문장 수
+    rescored_sentences: int
+    reused_sentences: int
 
 
 class BatchAnalysisResult(BaseModel):
@@ -40,13 +73,118 @@ class BatchAnalysisResult(BaseModel):
     result: AnalysisResult
 
 
+class BatchProgress(BaseModel):
+    completed: int
+    total: int
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    # 'queued', 'running', 'completed', 'failed'
+    status: str
+    model: Optional[str] = None
+    total: int
+    # 결과가 기록된 텍스트 수
+    completed: int
+    attempts: int
+    # 마지막 실패 원인 (재시도 중이거나 'failed'인 경우)
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+
+class JobResultPage(BaseModel):
+    job_id: str
+    status: str
+    total: int
+    offset: int
+    results: List[BatchAnalysisResult]
+
+
 class ModelInfo(BaseModel):
     model_name: str
     device: str
+    precision: str
+    backend: str
     max_length: int
+    batch_size: int
+    max_batch_tokens: int
+    scoring_mode: str
+    execution_strategy: str
     perplexity_threshold: float
+    prefilter: Optional[str] = None
+    cascade_band: Optional[float] = None
+    cache: Optional[Dict[str, int]] = None
+    prefix_cache: Optional[Dict[str, int]] = None
+    dedup: Optional[Dict[str, int]] = None
+
+
+class RegisteredModel(BaseModel):
+    name: str
+    default: bool
+    loaded: bool
+    # 자동 선택시 이 모델을 사용하는 문자 체계
+    scripts: List[str]
+    perplexity_threshold: float
+    # 로드된 가중치 크기 (로드되지 않았으면 0)
+    memory_mb: float
+
+
+class AdmissionStatus(BaseModel):
+    max_request_tokens: int
+    max_inflight_tokens: int
+    # 이 워커에서 처리 중인 요청 수와 예상 토큰 합
+    inflight_requests: int
+    inflight_tokens: int
+    admitted: int
+    rejected_too_large: int
+    rejected_overloaded: int
+    # 기한 초과나 연결 종료로 남은 점수화를 멈춘 요청 수
+    cancelled: int
+
+
+class RescoreRequest(BaseModel):
+    threshold: Optional[float] = Field(None, gt=0, description="AI 의심 perplexity 임계값 (기본: 저장소 모델의 임계값)")
+    natural_scale: float = Field(20.0, gt=0, description="자연스러운 문장의 confidence가 1이 되는 임계값 대비 perplexity 차이")
+    # 'mean' (점수화 당시 perplexity), 'median', 'max' (토큰 NLL 집계)
+    aggregation: str = Field('mean', pattern='^(mean|median|max)$', description="문장 점수 집계 방식")
+    offset: int = Field(0, ge=0, description="반환할 첫 문서 인덱스")
+    limit: int = Field(100, ge=0, le=1000, description="반환할 최대 문서 수")
+
+
+class RescoreSummary(BaseModel):
+    model: Optional[str]
+    threshold: float
+    natural_scale: float
+    aggregation: str
+    documents: int
+    total_sentences: int
+    ai_suspicious_count: int
+    natural_count: int
+    error_count: int
+    ai_ratio: float
+    # 문서별 AI 의심 비율 구간 (>= 0.5, 0.3~0.5, 0~0.3, 0)
+    documents_over_half: int
+    documents_over_30_percent: int
+    documents_partial: int
+    documents_clean: int
+
+
+class RescoredDocument(BaseModel):
+    id: str
+    overall_stats: OverallStats
+    recommendations: List[str]
+
+
+class RescoreResult(BaseModel):
+    summary: RescoreSummary
+    # offset부터 limit개 문서의 통계와 권장사항 (저장소 기록 순서)
+    documents: List[RescoredDocument]
+    # 재분류에 걸린 시간 (초)
+    seconds: float
 
 
 class HealthResponse(BaseModel):
     status: str
-    message: str
\ No newline at end of file
+    message: str
+    model_status: str
\ No newline at end of file
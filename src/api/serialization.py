@@ -0,0 +1,55 @@
+"""분석 결과 응답 형식 선택과 직렬화
+
+기본 형식은 문장별 SentenceResult를 담은 AnalysisResult JSON이다. format 쿼리
+파라미터('compact', 'msgpack')나 Accept 헤더로 간결한 형식을 고르면 문장 텍스트
+없이 문장 순서의 병렬 배열(PerplexityAnalyzer.build_columns)을 pydantic 검증 없이
+바로 직렬화한다. orjson과 msgpack은 선택 의존성이며, orjson이 없으면 표준 json을 사용한다.
+"""
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+RESPONSE_FORMATS = ('json', 'compact', 'msgpack')
+
+COMPACT_JSON_MEDIA_TYPE = 'application/vnd.resume-filter.compact+json'
+MSGPACK_MEDIA_TYPE = 'application/x-msgpack'
+
+
+def negotiate_format(format: Optional[str], accept: Optional[str]) -> str:
+    """응답 형식 결정 (쿼리 파라미터가 Accept 헤더보다 우선)"""
+    if format is None:
+        accept = accept or ''
+        if MSGPACK_MEDIA_TYPE in accept:
+            format = 'msgpack'
+        elif COMPACT_JSON_MEDIA_TYPE in accept:
+            format = 'compact'
+        else:
+            format = 'json'
+    
+    if format == 'msgpack' and msgpack is None:
+        raise HTTPException(status_code=406, detail="msgpack responses require the msgpack package")
+    return format
+
+
+def encode_compact(payload: Any, format: str) -> Response:
+    """build_columns 형식의 결과(또는 그 목록)를 간결한 형식으로 직렬화"""
+    if format == 'msgpack':
+        return Response(content=msgpack.packb(payload, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPE)
+    
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return Response(content=body, media_type=COMPACT_JSON_MEDIA_TYPE)
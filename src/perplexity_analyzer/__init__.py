@@ -1,3 +1,9 @@
-from .analyzer import PerplexityAnalyzer
+__all__ = ['PerplexityAnalyzer']
 
-__all__ = ['PerplexityAnalyzer']
\ No newline at end of file
+
+def __getattr__(name):
+    # torch/transformers 임포트는 수 초가 걸리므로 실제로 사용할 때까지 미룬다
+    if name == 'PerplexityAnalyzer':
+        from .analyzer import PerplexityAnalyzer
+        return PerplexityAnalyzer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,192 +1,983 @@
 import torch
+import torch.nn.functional as F
 import math
-from typing import List, Dict, Optional, Union
-from tqdm import tqdm
+import threading
+from bisect import bisect_right
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Union
+from .backends import OnnxBackend, TorchBackend, resolve_backend_name
+from .cache import PerplexityCache
+from .dedup import STAGE_DUPLICATE, DuplicateIndex, document_id
+from .instrumentation import Instrumentation
 from .models import ModelManager
-from .utils import setup_logger, preprocess_text, split_into_sentences
+from .prefix_cache import PrefixCache, PrefixEntry, layer_tensors
+from .prefilter import STAGE_MODEL, STAGE_PREFILTER, CharNgramModel, needs_escalation
+from .registry import default_threshold
+from .scheduler import plan_micro_batches, plan_packed_batches
+from .utils import (
+    CLASS_CODES, DEFAULT_MIN_SENTENCE_LENGTH, NATURAL_CONFIDENCE_SCALE, generate_recommendations,
+    setup_logger, preprocess_text, segment_sentences
+)
 
 logger = setup_logger(__name__)
 
 
+SCORING_MODES = ('sentence', 'document')
+# sentence 모드의 forward 실행 방식
+EXECUTION_STRATEGIES = ('padded', 'packed')
+
+# 병렬 배열 결과(build_columns)의 단계 코드 (배열 값은 이 튜플의 인덱스, 분류 코드는 CLASS_CODES)
+STAGE_CODES = (STAGE_MODEL, STAGE_PREFILTER, STAGE_DUPLICATE)
+_NATURAL, _AI_SUSPICIOUS, _ERROR = range(len(CLASS_CODES))
+
+
+class ScoringCancelled(Exception):
+    """점수화 도중 cancel 이벤트가 설정되어 남은 문장을 점수화하지 않고 중단함"""
+
+
+def token_negative_log_likelihood(logits: torch.Tensor, input_ids: torch.Tensor) -> torch.Tensor:
+    """각 위치의 다음 토큰에 대한 negative log-likelihood 계산
+    
+    Returns:
+        (batch, seq_len - 1) 크기의 텐서. [b, t]는 토큰 t + 1의 NLL
+    """
+    return F.cross_entropy(
+        logits[:, :-1, :].float().transpose(1, 2), input_ids[:, 1:], reduction='none'
+    )
+
+
+def sequence_log_perplexity(logits: torch.Tensor, input_ids: torch.Tensor,
+                            attention_mask: torch.Tensor,
+                            token_nll: Optional[torch.Tensor] = None) -> torch.Tensor:
+    """패딩 토큰을 제외한 시퀀스별 평균 negative log-likelihood 계산
+    
+    token_nll이 주어지면 token_negative_log_likelihood를 다시 계산하지 않는다.
+    
+    Returns:
+        (batch,) 크기의 텐서. 예측할 토큰이 없는 시퀀스는 inf
+    """
+    if token_nll is None:
+        token_nll = token_negative_log_likelihood(logits, input_ids)
+    shift_mask = attention_mask[:, 1:].to(token_nll.dtype)
+    
+    token_counts = shift_mask.sum(dim=1)
+    nll_sum = (token_nll * shift_mask).sum(dim=1)
+    
+    return torch.where(
+        token_counts > 0,
+        nll_sum / token_counts.clamp(min=1),
+        torch.full_like(nll_sum, float('inf'))
+    )
+
+
 class PerplexityAnalyzer:
     """텍스트의 Perplexity를 분석하여 AI 생성 문장을 탐지하고 분류하는 클래스"""
     
-    # Perplexity 임계값 (28 이하면 AI 생성 의심)
-    PERPLEXITY_THRESHOLD = 28.0
-    
-    def __init__(self, model_name: str = 'gpt2', max_length: int = 512):
+    def __init__(self, model_name: str = 'gpt2', max_length: int = 512, batch_size: int = 16,
+                 max_batch_tokens: int = 4096, cache_size: int = 10000,
+                 cache_path: Optional[str] = None, scoring_mode: str = 'sentence',
+                 window_stride: Optional[int] = None, precision: str = 'fp32',
+                 backend: Optional[str] = None, model_path: Optional[str] = None,
+                 min_sentence_length: int = DEFAULT_MIN_SENTENCE_LENGTH,
+                 prefilter_path: Optional[str] = None, cascade_band: float = 0.4,
+                 dedup_max_documents: int = 0, dedup_path: Optional[str] = None,
+                 dedup_threshold: float = 0.5, perplexity_threshold: Optional[float] = None,
+                 execution_strategy: str = 'padded', prefix_cache_mb: float = 0,
+                 prefix_cache_tokens: int = 16):
         """
         Args:
             model_name: 사용할 모델명 ('gpt2', 'kogpt2' 등)
             max_length: 토큰화시 최대 길이
+            batch_size: 한 번의 forward에 함께 넣을 최대 문장 수
+            max_batch_tokens: 한 번의 forward에 넣을 최대 토큰 수 (패딩 포함)
+            cache_size: 메모리 perplexity 캐시 최대 항목 수 (0이면 캐시 사용 안함)
+            cache_path: 워커 간 공유되는 SQLite perplexity 캐시 파일 경로
+            scoring_mode: 'sentence'는 문장별 독립 점수화, 'document'는 문서 전체를
+                한 번에 통과시켜 문맥을 반영한 문장별 perplexity 계산
+            window_stride: document 모드에서 max_length보다 긴 문서의 슬라이딩 윈도우
+                이동 간격 (기본값 max_length // 2)
+            precision: 추론 정밀도 ('fp32', 'bf16', 'int8')
+            backend: forward 실행 백엔드 ('torch', 'onnx'). 지정하지 않으면
+                PERPLEXITY_BACKEND 환경변수, 없으면 'torch'
+            model_path: 허깅페이스 경로 대신 사용할 로컬 모델 디렉터리
+            min_sentence_length: 문장 분할시 이보다 짧은 조각은 이웃 문장과 합침
+            prefilter_path: 캐스케이드 1단계 문자 n-gram 모델 파일. 지정하면 추정치가
+                임계값 주변 구간에 있는 문장만 모델로 점수화 (sentence 모드에서만 사용)
+            cascade_band: 모델로 넘길 구간 폭 (임계값 대비 log-perplexity 거리)
+            dedup_max_documents: near-duplicate 인덱스에 유지할 최대 문서 수 (0이면 사용 안함)
+            dedup_path: near-duplicate 인덱스 SQLite 영속화 파일 경로
+            dedup_threshold: near-duplicate로 판정할 최소 Jaccard 추정치
+            perplexity_threshold: 이 값 이하면 AI 생성 의심으로 분류 (기본값은 모델별
+                MODEL_THRESHOLDS, kogpt2는 28)
+            execution_strategy: sentence 모드의 forward 방식. 'padded'는 문장마다 한 행을
+                쓰고 배치 내 최장 문장까지 패딩, 'packed'는 여러 짧은 문장을 max_length
+                길이의 행에 이어 붙여 패딩 토큰 연산을 줄임 (torch 백엔드 전용)
+            prefix_cache_mb: 반복되는 문장 앞부분의 past-key-values를 보관할 메모리 (MB, 0이면
+                사용 안함). 캐시된 prefix로 시작하는 문장은 그 이후 토큰만 forward 한다
+                (torch 백엔드, padded 실행 전용)
+            prefix_cache_tokens: 보관할 prefix의 최대 토큰 수
         """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1: {batch_size}")
+        if scoring_mode not in SCORING_MODES:
+            raise ValueError(f"Unsupported scoring mode: {scoring_mode}")
+        if window_stride is None:
+            window_stride = max(1, max_length // 2)
+        if not 1 <= window_stride < max_length:
+            raise ValueError(f"window_stride must be in [1, max_length): {window_stride}")
+        if max_batch_tokens < 1:
+            raise ValueError(f"max_batch_tokens must be >= 1: {max_batch_tokens}")
+        if cascade_band < 0:
+            raise ValueError(f"cascade_band must be >= 0: {cascade_band}")
+        if execution_strategy not in EXECUTION_STRATEGIES:
+            raise ValueError(f"Unsupported execution strategy: {execution_strategy}")
+        if prefix_cache_mb < 0:
+            raise ValueError(f"prefix_cache_mb must be >= 0: {prefix_cache_mb}")
+        
         self.model_name = model_name
+        self.perplexity_threshold = (
+            perplexity_threshold if perplexity_threshold is not None else default_threshold(model_name)
+        )
+        self.model_path = model_path
         self.max_length = max_length
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.scoring_mode = scoring_mode
+        self.execution_strategy = execution_strategy
+        self.window_stride = window_stride
+        self.precision = precision
+        self.min_sentence_length = min_sentence_length
+        self.prefilter_path = prefilter_path
+        self.prefilter = CharNgramModel.load(prefilter_path) if prefilter_path else None
+        self.cascade_band = cascade_band
+        # 단계별 타이밍 훅 (API 서버에서 메트릭 구현으로 교체)
+        self.instrumentation = Instrumentation()
+        self.backend_name = resolve_backend_name(backend)
+        if execution_strategy == 'packed' and self.backend_name != 'torch':
+            # export한 ONNX 그래프는 position id와 4D attention mask를 입력으로 받지 않음
+            raise ValueError(f"Packed execution requires the torch backend: {self.backend_name}")
+        if prefix_cache_mb > 0 and (self.backend_name != 'torch' or execution_strategy != 'padded'):
+            # ONNX 그래프는 past-key-values를 입출력하지 않고, packed 행은 문장마다 prefix가 다름
+            raise ValueError("The prefix cache requires the torch backend with padded execution")
         self.model_manager = ModelManager()
-        self.model, self.tokenizer = self.model_manager.load_model(model_name)
         
-        logger.info(f"PerplexityAnalyzer initialized with {model_name}")
+        if self.backend_name == 'onnx':
+            # ONNX 백엔드는 fp32 모델을 export한 뒤 정밀도를 그래프에 적용
+            self.model, self.tokenizer = self.model_manager.load_model(model_name, model_path=model_path)
+            self.backend = OnnxBackend(self.model, model_name, precision)
+        else:
+            self.model, self.tokenizer = self.model_manager.load_model(
+                model_name, precision=precision, model_path=model_path
+            )
+            self.backend = TorchBackend(self.model, self.model_manager.device)
+        
+        model_id = f"{model_name}@{model_path}" if model_path else model_name
+        namespace = f"{model_id}:{self.backend_name}:{precision}:{max_length}"
+        
+        self.cache = None
+        if cache_size > 0 or cache_path:
+            self.cache = PerplexityCache(
+                namespace=namespace,
+                max_entries=cache_size,
+                db_path=cache_path
+            )
+        
+        self.prefix_cache = None
+        if prefix_cache_mb > 0:
+            self.prefix_cache = PrefixCache(
+                max_bytes=int(prefix_cache_mb * 1024 * 1024),
+                max_prefix_tokens=prefix_cache_tokens
+            )
+        
+        self.dedup = None
+        if dedup_max_documents > 0 or dedup_path:
+            self.dedup = DuplicateIndex(
+                namespace=namespace,
+                max_documents=dedup_max_documents or 100000,
+                threshold=dedup_threshold,
+                db_path=dedup_path
+            )
+        
+        logger.info(f"PerplexityAnalyzer initialized with {model_name} ({self.backend_name}, {precision})")
     
     def calculate_perplexity(self, text: str) -> float:
         """단일 텍스트의 perplexity 계산"""
-        if not text or not text.strip():
-            return float('inf')
-        
-        # 텍스트 전처리
-        processed_text = preprocess_text(text)
-        
-        # 토큰화
-        inputs = self.tokenizer(
-            processed_text,
-            return_tensors='pt',
-            max_length=self.max_length,
-            truncation=True,
-            padding=True
+        return self.calculate_perplexities([text])[0]
+    
+    def calculate_perplexities(self, texts: List[str], cancel: Optional[threading.Event] = None,
+                               token_nll: Optional[Dict[int, List[float]]] = None) -> List[float]:
+        """여러 텍스트의 perplexity를 패딩 배치 단위로 한 번에 계산
+        
+        모든 텍스트를 한 번에 토큰화한 뒤 길이가 비슷한 것끼리 토큰 예산 내의
+        마이크로 배치로 묶어 forward 하고, attention mask로 패딩 토큰을 제외한
+        시퀀스별 loss를 계산한다. 결과는 입력 순서대로 반환된다.
+        cancel이 설정되면 다음 마이크로 배치 전에 ScoringCancelled를 발생시킨다
+        (이미 계산한 값은 캐시에 남는다). token_nll이 주어지면 모델로 점수화한 텍스트의
+        토큰별 NLL을 입력 인덱스별로 기록하며, 이때는 토큰 값이 없는 캐시를 조회하지 않는다.
+        prefix 캐시를 사용하면 캐시된 prefix로 시작하는 문장은 그 이후 토큰만 forward 한다.
+        """
+        perplexities = [float('inf')] * len(texts)
+        
+        # 텍스트 전처리 (빈 텍스트는 inf 유지)
+        indices = []
+        processed_texts = []
+        with self.instrumentation.stage('preprocess'):
+            for i, text in enumerate(texts):
+                if not text or not text.strip():
+                    continue
+                processed_text = preprocess_text(text)
+                if not processed_text:
+                    continue
+                indices.append(i)
+                processed_texts.append(processed_text)
+        
+        # 캐시에 있는 문장은 제외하고 나머지만 점수화
+        if self.cache is not None and token_nll is None:
+            keys = [self.cache.make_key(t) for t in processed_texts]
+            cached = self.cache.get_many(keys)
+            
+            remaining = []
+            for i, processed_text, key in zip(indices, processed_texts, keys):
+                if key in cached:
+                    perplexities[i] = cached[key]
+                else:
+                    remaining.append((i, processed_text))
+            
+            indices = [i for i, _ in remaining]
+            processed_texts = [t for _, t in remaining]
+        
+        if not processed_texts:
+            return perplexities
+        
+        # 토큰화 (패딩은 배치별로 수행)
+        with self.instrumentation.stage('tokenize'):
+            encodings = self.tokenizer(
+                processed_texts,
+                max_length=self.max_length,
+                truncation=True
+            )
+        input_ids = encodings['input_ids']
+        
+        attempted = 0
+        for batch, score in self._plan_batches(input_ids):
+            if cancel is not None and cancel.is_set():
+                self._cache_scored(indices, processed_texts, perplexities)
+                raise ScoringCancelled(
+                    f"Scoring cancelled with {len(input_ids) - attempted} of {len(input_ids)} texts pending"
+                )
+            attempted += len(batch)
+            batch_nll = [] if token_nll is not None else None
+            try:
+                batch_ppls = score(batch_nll)
+            except Exception as e:
+                logger.error(f"Error calculating log perplexity: {e}")
+                continue
+            
+            for j, ppl in zip(batch, batch_ppls):
+                perplexities[indices[j]] = ppl
+            if batch_nll is not None:
+                for j, nll in zip(batch, batch_nll):
+                    token_nll[indices[j]] = nll
+        
+        self._cache_scored(indices, processed_texts, perplexities)
+        return perplexities
+    
+    def _plan_batches(self, input_ids: List[List[int]]) -> Iterator[tuple]:
+        """실행 방식에 따른 마이크로 배치 계획
+        
+        Yields:
+            (배치에 속한 input_ids 인덱스, 배치의 perplexity를 계산하는 함수 score(token_nll))
+        """
+        lengths = [len(ids) for ids in input_ids]
+        if self.execution_strategy == 'packed':
+            for rows in plan_packed_batches(lengths, self.max_length, self.max_batch_tokens):
+                yield [j for row in rows for j in row], partial(
+                    self._score_packed, [[input_ids[j] for j in row] for row in rows]
+                )
+        elif self.prefix_cache is not None:
+            yield from self._plan_prefix_batches(input_ids)
+        else:
+            for batch in plan_micro_batches(lengths, self.max_batch_tokens, self.batch_size):
+                yield batch, partial(self._score_batch, [input_ids[j] for j in batch])
+    
+    def _plan_prefix_batches(self, input_ids: List[List[int]]) -> Iterator[tuple]:
+        """prefix 캐시를 사용하는 마이크로 배치 계획
+        
+        1. 두 번 이상 등장했지만 아직 저장되지 않은 prefix마다 그 prefix로 시작하는 문장
+           하나를 먼저 전체 forward 하면서 prefix의 past-key-values를 저장한다.
+        2. 나머지 문장은 캐시에서 가장 길게 일치하는 prefix를 찾아 같은 prefix끼리
+           prefix 이후 토큰만 배치로 forward 하고, 일치하지 않으면 기존처럼 점수화한다.
+        """
+        cache = self.prefix_cache
+        seeds = {}
+        for j, ids in enumerate(input_ids):
+            length = cache.observe(ids)
+            if length:
+                seeds.setdefault(tuple(ids[:length]), (j, length))
+        
+        seed_indices = [j for j, _ in seeds.values()]
+        seed_lengths = [length for _, length in seeds.values()]
+        for batch in plan_micro_batches([len(input_ids[j]) for j in seed_indices], self.max_batch_tokens, self.batch_size):
+            yield [seed_indices[k] for k in batch], partial(
+                self._score_batch, [input_ids[seed_indices[k]] for k in batch],
+                prefix_lengths=[seed_lengths[k] for k in batch]
+            )
+        
+        # 1단계에서 저장한 prefix까지 포함해 조회 (생성기이므로 앞의 배치가 점수화된 뒤 실행됨)
+        seeded = set(seed_indices)
+        groups = {}
+        misses = []
+        for j, ids in enumerate(input_ids):
+            if j in seeded:
+                continue
+            depth, entry = cache.lookup(ids)
+            if entry is None:
+                misses.append(j)
+            else:
+                groups.setdefault(entry.tokens[:depth], (depth, entry, []))[2].append(j)
+        
+        for depth, entry, members in groups.values():
+            suffixes = [input_ids[j][depth - 1:] for j in members]
+            for batch in plan_micro_batches([len(ids) for ids in suffixes], self.max_batch_tokens, self.batch_size):
+                yield [members[k] for k in batch], partial(
+                    self._score_resumed, entry, depth, [suffixes[k] for k in batch]
+                )
+        
+        for batch in plan_micro_batches([len(input_ids[j]) for j in misses], self.max_batch_tokens, self.batch_size):
+            yield [misses[k] for k in batch], partial(self._score_batch, [input_ids[misses[k]] for k in batch])
+    
+    def _cache_scored(self, indices: List[int], processed_texts: List[str], perplexities: List[float]):
+        # 정상적으로 계산된 값만 캐시에 저장
+        if self.cache is not None:
+            self.cache.put_many({
+                self.cache.make_key(t): perplexities[i]
+                for i, t in zip(indices, processed_texts)
+                if math.isfinite(perplexities[i])
+            })
+    
+    def _forward_padded(self, batch_input_ids: List[List[int]], use_cache: bool = False) -> tuple:
+        """토큰화된 시퀀스들을 오른쪽 패딩하여 백엔드로 forward
+        
+        Returns:
+            (logits, input_ids, attention_mask, past_key_values) - 텐서는 모두 logits와 같은
+            device이며, past_key_values는 use_cache일 때만 반환 (아니면 None)
+        """
+        with self.instrumentation.stage('tokenize'):
+            inputs = self.tokenizer.pad(
+                {'input_ids': batch_input_ids},
+                padding=True,
+                return_tensors='pt'
+            )
+        
+        past_key_values = None
+        with self.instrumentation.stage('forward'):
+            if use_cache:
+                logits, past_key_values = self.backend.forward_cached(inputs['input_ids'], inputs['attention_mask'])
+            else:
+                logits = self.backend.forward(inputs['input_ids'], inputs['attention_mask'])
+        self.instrumentation.observe_forward(
+            batch_size=len(batch_input_ids),
+            tokens=sum(len(ids) for ids in batch_input_ids),
+            padded_tokens=inputs['input_ids'].numel()
+        )
+        
+        return (
+            logits,
+            inputs['input_ids'].to(logits.device),
+            inputs['attention_mask'].to(logits.device),
+            past_key_values
+        )
+    
+    def _score_batch(self, batch_input_ids: List[List[int]],
+                     token_nll: Optional[List[List[float]]] = None,
+                     prefix_lengths: Optional[List[int]] = None) -> List[float]:
+        """토큰화된 시퀀스들을 패딩하여 한 번의 forward로 perplexity 계산
+        
+        token_nll 목록이 주어지면 시퀀스마다 패딩을 제외한 토큰별 NLL을 덧붙인다.
+        prefix_lengths가 주어지면 시퀀스마다 앞 그만큼의 past-key-values를 prefix 캐시에 저장한다.
+        """
+        logits, input_ids, attention_mask, past_key_values = self._forward_padded(
+            batch_input_ids, use_cache=prefix_lengths is not None
+        )
+        with self.instrumentation.stage('loss'):
+            nll = token_negative_log_likelihood(logits, input_ids)
+            perplexities = self._sequence_perplexities(logits, input_ids, attention_mask, nll, token_nll)
+        
+        if prefix_lengths is not None:
+            layers = layer_tensors(past_key_values)
+            for row, length in enumerate(prefix_lengths):
+                self.prefix_cache.insert(
+                    batch_input_ids[row][:length],
+                    [(key[row, :, :length], value[row, :, :length]) for key, value in layers],
+                    nll[row, :length - 1]
+                )
+        return perplexities
+    
+    def _score_resumed(self, entry: PrefixEntry, depth: int, suffixes: List[List[int]],
+                       token_nll: Optional[List[List[float]]] = None) -> List[float]:
+        """캐시된 prefix의 앞 depth개 토큰을 공유하는 시퀀스들을 prefix 이후만 forward 해 점수화
+        
+        suffixes는 각 시퀀스의 depth - 1번째 토큰부터의 토큰이다. 마지막 prefix 토큰을
+        다시 넣어 다음 토큰 예측 logits를 얻고, prefix 토큰들의 NLL은 캐시 값을 사용한다.
+        """
+        past_length = depth - 1
+        with self.instrumentation.stage('tokenize'):
+            inputs = self.tokenizer.pad({'input_ids': suffixes}, padding=True, return_tensors='pt')
+            batch_size, suffix_length = inputs['input_ids'].shape
+            attention_mask = torch.cat([
+                torch.ones((batch_size, past_length), dtype=inputs['attention_mask'].dtype),
+                inputs['attention_mask']
+            ], dim=1)
+            position_ids = torch.arange(past_length, past_length + suffix_length).expand(batch_size, -1)
+        
+        with self.instrumentation.stage('forward'):
+            logits, _ = self.backend.forward_cached(
+                inputs['input_ids'], attention_mask, entry.past_key_values(past_length, batch_size), position_ids
+            )
+        self.instrumentation.observe_forward(
+            batch_size=batch_size,
+            tokens=sum(len(ids) for ids in suffixes),
+            padded_tokens=inputs['input_ids'].numel()
+        )
+        
+        with self.instrumentation.stage('loss'):
+            input_ids = inputs['input_ids'].to(logits.device)
+            suffix_nll = token_negative_log_likelihood(logits, input_ids)
+            prefix_nll = entry.nll[:past_length].to(suffix_nll.device, suffix_nll.dtype)
+            nll = torch.cat([prefix_nll.expand(batch_size, -1), suffix_nll], dim=1)
+            return self._sequence_perplexities(
+                logits, input_ids, attention_mask.to(logits.device), nll, token_nll
+            )
+    
+    def _sequence_perplexities(self, logits: torch.Tensor, input_ids: torch.Tensor,
+                               attention_mask: torch.Tensor, nll: torch.Tensor,
+                               token_nll: Optional[List[List[float]]] = None) -> List[float]:
+        """토큰별 NLL (batch, seq_len - 1)에서 패딩을 제외한 시퀀스별 perplexity"""
+        log_perplexities = sequence_log_perplexity(logits, input_ids, attention_mask, nll).tolist()
+        if token_nll is not None:
+            targets = attention_mask[:, 1:].bool()
+            token_nll.extend(nll[row][targets[row]].tolist() for row in range(len(log_perplexities)))
+        # 자연로그값 -> 실제 perplexity로 변환 (예측 토큰이 없으면 inf)
+        return [math.exp(lp) if math.isfinite(lp) else float('inf') for lp in log_perplexities]
+    
+    def _score_packed(self, rows: List[List[List[int]]],
+                      token_nll: Optional[List[List[float]]] = None) -> List[float]:
+        """행마다 여러 시퀀스를 이어 붙여 한 번의 forward로 perplexity 계산
+        
+        각 시퀀스는 자기 세그먼트 안에서만 attention하고 position id도 0부터 다시
+        시작하므로 단독으로 점수화한 값과 같다. 세그먼트 경계를 넘는 다음 토큰
+        예측은 loss에서 제외한다. token_nll 목록이 주어지면 시퀀스마다 토큰별 NLL을 덧붙인다.
+        
+        Returns:
+            행 순서대로 펼친 시퀀스별 perplexity
+        """
+        with self.instrumentation.stage('tokenize'):
+            row_length = max(sum(len(ids) for ids in row) for row in rows)
+            pad_id = self.tokenizer.pad_token_id or 0
+            input_ids = torch.full((len(rows), row_length), pad_id, dtype=torch.long)
+            segment_ids = torch.full((len(rows), row_length), -1, dtype=torch.long)
+            segment = 0
+            for r, row in enumerate(rows):
+                offset = 0
+                for ids in row:
+                    input_ids[r, offset:offset + len(ids)] = torch.tensor(ids, dtype=torch.long)
+                    segment_ids[r, offset:offset + len(ids)] = segment
+                    offset += len(ids)
+                    segment += 1
+        
+        with self.instrumentation.stage('forward'):
+            logits = self.backend.forward_packed(input_ids, segment_ids)
+        self.instrumentation.observe_forward(
+            batch_size=segment,
+            tokens=sum(len(ids) for row in rows for ids in row),
+            padded_tokens=input_ids.numel()
         )
         
-        inputs = {k: v.to(self.model_manager.device) for k, v in inputs.items()}
+        with self.instrumentation.stage('loss'):
+            input_ids = input_ids.to(logits.device)
+            segment_ids = segment_ids.to(logits.device)
+            nll = token_negative_log_likelihood(logits, input_ids)
+            # 같은 세그먼트 안의 다음 토큰 예측만 사용
+            targets = (segment_ids[:, 1:] == segment_ids[:, :-1]) & (segment_ids[:, 1:] >= 0)
+            target_segments = segment_ids[:, 1:][targets]
+            target_nll = nll[targets]
+            nll_sum = torch.zeros(segment, dtype=nll.dtype, device=logits.device)
+            nll_sum.index_add_(0, target_segments, target_nll)
+            token_counts = torch.zeros(segment, dtype=nll.dtype, device=logits.device)
+            token_counts.index_add_(0, target_segments, torch.ones_like(target_nll))
+            log_perplexities = torch.where(
+                token_counts > 0,
+                nll_sum / token_counts.clamp(min=1),
+                torch.full_like(nll_sum, float('inf'))
+            ).tolist()
+            if token_nll is not None:
+                # 대상 토큰은 행, 위치 순서로 뽑히므로 세그먼트 순서대로 이어져 있음
+                counts = token_counts.long().tolist()
+                token_nll.extend(values.tolist() for values in torch.split(target_nll, counts))
+        return [math.exp(lp) if math.isfinite(lp) else float('inf') for lp in log_perplexities]
+
+    def warmup(self, lengths: Optional[List[int]] = None) -> int:
+        """대표적인 시퀀스 길이로 더미 forward를 실행해 첫 요청의 지연을 없앰
+
+        커널 선택, 메모리 할당기, ONNX 세션 초기화가 첫 forward에 몰리므로
+        준비 완료 전에 미리 실행한다. 캐시는 사용하지 않는다.
+
+        Args:
+            lengths: 워밍업할 토큰 길이 목록 (기본: 16, 64, 256, max_length)
+
+        Returns:
+            실행한 forward 횟수
+        """
+        if lengths is None:
+            lengths = [16, 64, 256, self.max_length]
+        # 모델이 지원하는 위치 수보다 긴 더미 입력은 만들지 않음
+        max_positions = getattr(self.model.config, 'max_position_embeddings', None) or self.max_length
+        limit = min(self.max_length, max_positions)
+        token_id = self.tokenizer.eos_token_id or 0
+
+        runs = 0
+        for length in sorted({min(max(length, 2), limit) for length in lengths}):
+            # 단일 문장과 토큰 예산을 채운 마이크로 배치 크기를 모두 실행
+            full_batch = max(1, min(self.batch_size, self.max_batch_tokens // length))
+            for batch_size in sorted({1, full_batch}):
+                self._score_batch([[token_id] * length] * batch_size)
+                runs += 1
+        
+        if self.execution_strategy == 'packed':
+            # 짧은 문장들로 꽉 찬 packed 행 (block-diagonal mask 경로)
+            self._score_packed([[[token_id] * 16] * max(1, limit // 16)])
+            runs += 1
+
+        logger.info(f"Warm-up finished ({runs} forward passes)")
+        return runs
+
+    def calculate_document_perplexities(self, sentences: List[str],
+                                        token_nll: Optional[Dict[int, List[float]]] = None) -> List[float]:
+        """문서 전체를 한 번에 모델에 통과시켜 문장별 perplexity 계산
+        
+        전처리된 문장들을 공백으로 이어 하나의 문서로 토큰화하고, 토큰 offset으로
+        각 토큰의 log-prob을 해당 문장 구간에 대응시킨다. 각 문장은 앞 문장들을
+        문맥으로 조건화되어 점수화된다. max_length보다 긴 문서는 window_stride
+        간격으로 겹치는 슬라이딩 윈도우로 처리하며, 모든 토큰은 한 번씩만 점수화된다.
+        token_nll이 주어지면 문장에 대응된 토큰별 NLL을 문장 인덱스별로 기록한다.
+        """
+        perplexities = [float('inf')] * len(sentences)
+        
+        # 문서 구성 및 문장별 문자 구간 기록
+        with self.instrumentation.stage('preprocess'):
+            parts = []
+            span_starts = []
+            span_ends = []
+            span_indices = []
+            cursor = 0
+            for i, sentence in enumerate(sentences):
+                processed_text = preprocess_text(sentence) if sentence else ''
+                if not processed_text:
+                    continue
+                if parts:
+                    cursor += 1  # 문장 사이 공백
+                parts.append(processed_text)
+                span_starts.append(cursor)
+                span_ends.append(cursor + len(processed_text))
+                span_indices.append(i)
+                cursor += len(processed_text)
+        
+        if not parts:
+            return perplexities
+        
+        with self.instrumentation.stage('tokenize'):
+            encoding = self.tokenizer(' '.join(parts), return_offsets_mapping=True)
+        input_ids = encoding['input_ids']
         
         try:
-            with torch.no_grad():
-                outputs = self.model(**inputs, labels=inputs['input_ids'])
-                loss = outputs.loss
-                log_perplexity = loss.item()  # 자연로그값
-                perplexity = math.exp(log_perplexity)  # 실제 perplexity로 변환
-                
-            return perplexity
-            
+            document_nll = self._document_token_nll(input_ids)
         except Exception as e:
-            logger.error(f"Error calculating log perplexity: {e}")
-            return float('inf')
+            logger.error(f"Error calculating document perplexity: {e}")
+            return perplexities
+        
+        # 토큰 NLL을 문장별로 모음 (토큰의 마지막 문자가 속한 문장 기준)
+        span_nll = [[] for _ in parts]
+        for t, (start, end) in enumerate(encoding['offset_mapping']):
+            if t == 0 or end <= start:
+                continue
+            span = bisect_right(span_starts, end - 1) - 1
+            if span < 0 or end - 1 >= span_ends[span]:
+                continue
+            span_nll[span].append(document_nll[t])
+        
+        for span, i in enumerate(span_indices):
+            if span_nll[span]:
+                perplexities[i] = math.exp(sum(span_nll[span]) / len(span_nll[span]))
+                if token_nll is not None:
+                    token_nll[i] = span_nll[span]
+        
+        return perplexities
+    
+    def _document_token_nll(self, input_ids: List[int]) -> List[float]:
+        """슬라이딩 윈도우로 문서 각 토큰의 NLL 계산 (첫 토큰은 nan)"""
+        num_tokens = len(input_ids)
+        
+        # 윈도우 구성: 각 윈도우는 이전 윈도우가 점수화하지 않은 토큰들만 담당
+        windows = []
+        scored_until = 1
+        begin = 0
+        while True:
+            end = min(begin + self.max_length, num_tokens)
+            windows.append((begin, end, scored_until))
+            scored_until = end
+            if end >= num_tokens:
+                break
+            begin += self.window_stride
+        
+        token_nll = [float('nan')] * num_tokens
+        for start in range(0, len(windows), self.batch_size):
+            batch = windows[start:start + self.batch_size]
+            logits, window_ids, _, _ = self._forward_padded([input_ids[b:e] for b, e, _ in batch])
+            with self.instrumentation.stage('loss'):
+                window_nll = token_negative_log_likelihood(logits, window_ids).tolist()
+            
+            for row, (begin, end, first_new) in enumerate(batch):
+                for t in range(first_new, end):
+                    token_nll[t] = window_nll[row][t - begin - 1]
+        
+        return token_nll
     
     def classify_sentence(self, ppl: float) -> Dict[str, Union[str, float]]:
         """perplexity 기반으로 문장 분류"""
+        code, confidence = self._classify(ppl)
+        return {
+            'classification': CLASS_CODES[code],
+            'confidence': confidence,
+            'ai_suspicious': code == _AI_SUSPICIOUS
+        }
+    
+    def _classify(self, ppl: float) -> tuple:
+        """(분류 코드, confidence)"""
         if ppl == float('inf'):
-            return {
-                'classification': 'ERROR',
-                'confidence': 0.0,
-                'ai_suspicious': False
-            }
+            return _ERROR, 0.0
         
-        if ppl <= self.PERPLEXITY_THRESHOLD:
+        if ppl <= self.perplexity_threshold:
             # AI 생성 의심 (낮은 perplexity)
-            confidence = (self.PERPLEXITY_THRESHOLD - ppl) / self.PERPLEXITY_THRESHOLD
-            confidence = max(0.0, min(1.0, confidence))
-            
-            return {
-                'classification': 'AI_SUSPICIOUS',
-                'confidence': confidence,
-                'ai_suspicious': True
-            }
+            confidence = (self.perplexity_threshold - ppl) / self.perplexity_threshold
+            return _AI_SUSPICIOUS, max(0.0, min(1.0, confidence))
+        
+        # 자연스러운 문장 (높은 perplexity)
+        return _NATURAL, min(1.0, (ppl - self.perplexity_threshold) / NATURAL_CONFIDENCE_SCALE)
+    
+    def split_sentences(self, text: str) -> tuple:
+        """텍스트를 문장으로 분할해 (문장 목록, 원문 오프셋 목록) 반환"""
+        with self.instrumentation.stage('split'):
+            spans = segment_sentences(text, self.min_sentence_length)
+        return [text[start:end] for start, end in spans], spans
+    
+    def match_duplicates(self, sentences: List[str], doc_id: Optional[str] = None) -> tuple:
+        """near-duplicate 문서를 찾고, 그 문서들과 같은 문장의 저장된 점수를 가져옴
+        
+        Returns:
+            (near_duplicates, reused) - 인덱스를 사용하지 않으면 (None, {}).
+            reused는 문장 인덱스 -> 재사용할 perplexity (document 모드에서는 항상 비어 있음)
+        """
+        if self.dedup is None:
+            return None, {}
+        
+        with self.instrumentation.stage('dedup'):
+            near_duplicates, reused = self.dedup.match(sentences, exclude=doc_id)
+        if self.scoring_mode == 'document':
+            # 문맥을 반영한 점수는 다른 문서의 점수로 대신하지 않음
+            reused = {}
+        return near_duplicates, reused
+    
+    def register_document(self, doc_id: str, sentences: List[str], perplexities: List[float],
+                          stages: List[str]):
+        """분석한 문서를 near-duplicate 인덱스에 등록
+        
+        모델로 점수화한 문장의 perplexity만 재사용할 수 있도록 저장하고, n-gram 추정치나
+        재사용한 점수는 inf로 저장한다 (추정치가 모델 점수로 재사용되지 않도록).
+        """
+        if self.dedup is None:
+            return
+        if self.scoring_mode == 'document':
+            perplexities = [float('inf')] * len(sentences)
         else:
-            # 자연스러운 문장 (높은 perplexity)
-            confidence = min(1.0, (ppl - self.PERPLEXITY_THRESHOLD) / 20.0)
-            
-            return {
-                'classification': 'NATURAL',
-                'confidence': confidence,
-                'ai_suspicious': False
-            }
+            perplexities = [
+                ppl if stage == STAGE_MODEL else float('inf') for ppl, stage in zip(perplexities, stages)
+            ]
+        with self.instrumentation.stage('dedup'):
+            self.dedup.add(doc_id, sentences, perplexities)
     
-    def analyze_sentences(self, text: str) -> Dict:
-        """문장별로 분석하고 AI 의심 문장들을 분류"""
-        sentences = split_into_sentences(text)
-        
-        if not sentences:
-            return {
-                'ai_suspicious_sentences': [],
-                'natural_sentences': [],
-                'error_sentences': [],
-                'overall_stats': {
-                    'total_sentences': 0,
-                    'ai_suspicious_count': 0,
-                    'natural_count': 0,
-                    'ai_ratio': 0.0
-                }
-            }
+    def prefilter_sentences(self, sentences: List[str], reused: Optional[Dict[int, float]] = None) -> tuple:
+        """캐스케이드 1단계: 재사용할 점수나 n-gram 추정치로 결정할 수 있는 문장을 걸러냄
         
-        ai_suspicious = []
-        natural = []
-        errors = []
+        Args:
+            sentences: 문장 목록
+            reused: 문장 인덱스 -> near-duplicate 문서에서 가져온 perplexity
         
-        for i, sentence in enumerate(tqdm(sentences, desc="Analyzing sentences")):
-            ppl = self.calculate_perplexity(sentence)
-            classification = self.classify_sentence(ppl)
-            
+        Returns:
+            (perplexities, stages, escalated) - 1단계에서 결정된 문장은 재사용한 점수나
+            추정치와 'duplicate' 또는 'prefilter' stage를 가지며, escalated는 모델로
+            점수화해야 할 문장 인덱스
+        """
+        reused = reused or {}
+        if self.prefilter is None:
+            perplexities = [reused.get(i, float('inf')) for i in range(len(sentences))]
+            stages = [STAGE_DUPLICATE if i in reused else STAGE_MODEL for i in range(len(sentences))]
+            return perplexities, stages, [i for i in range(len(sentences)) if i not in reused]
+        
+        perplexities = []
+        stages = []
+        escalated = []
+        with self.instrumentation.stage('prefilter'):
+            for i, sentence in enumerate(sentences):
+                if i in reused:
+                    perplexities.append(reused[i])
+                    stages.append(STAGE_DUPLICATE)
+                    continue
+                estimate = self.prefilter.estimate_perplexity(sentence)
+                if needs_escalation(estimate, self.perplexity_threshold, self.cascade_band):
+                    perplexities.append(float('inf'))
+                    stages.append(STAGE_MODEL)
+                    escalated.append(i)
+                else:
+                    perplexities.append(estimate)
+                    stages.append(STAGE_PREFILTER)
+        return perplexities, stages, escalated
+    
+    def score_sentences(self, sentences: List[str], reused: Optional[Dict[int, float]] = None,
+                        cancel: Optional[threading.Event] = None,
+                        token_nll: Optional[Dict[int, List[float]]] = None) -> tuple:
+        """문장별 perplexity와 이를 결정한 단계('duplicate', 'prefilter' 또는 'model') 계산
+        
+        token_nll이 주어지면 모델로 점수화한 문장의 토큰별 NLL을 문장 인덱스별로 기록한다.
+        """
+        if self.scoring_mode == 'document':
+            if cancel is not None and cancel.is_set():
+                raise ScoringCancelled("Scoring cancelled before the document pass")
+            # 문서 문맥을 쓰는 점수는 n-gram으로 추정하지 않음
+            return self.calculate_document_perplexities(sentences, token_nll), [STAGE_MODEL] * len(sentences)
+        
+        perplexities, stages, escalated = self.prefilter_sentences(sentences, reused)
+        escalated_nll = {} if token_nll is not None else None
+        scored = self.calculate_perplexities([sentences[i] for i in escalated], cancel, escalated_nll)
+        for i, ppl in zip(escalated, scored):
+            perplexities[i] = ppl
+        if token_nll is not None:
+            token_nll.update((escalated[j], nll) for j, nll in escalated_nll.items())
+        return perplexities, stages
+    
+    def analyze_sentences(self, text: str, doc_id: Optional[str] = None, compact: bool = False,
+                          cancel: Optional[threading.Event] = None, token_scores: bool = False) -> Dict:
+        """문장별로 분석하고 AI 의심 문장들을 분류
+        
+        near-duplicate 인덱스를 사용하면 결과에 near_duplicates를 함께 기록하고,
+        문서를 doc_id (없으면 내용 해시)로 인덱스에 등록한다. compact이면
+        build_columns 형식의 결과를 반환한다. cancel이 설정되면 ScoringCancelled로 중단한다.
+        token_scores이면 토큰 점수 저장소에 기록할 token_scores를 결과에 덧붙인다.
+        """
+        sentences, spans = self.split_sentences(text)
+        near_duplicates, reused = self.match_duplicates(sentences, doc_id)
+        token_nll = {} if token_scores else None
+        perplexities, stages = self.score_sentences(sentences, reused, cancel, token_nll)
+        self.register_document(doc_id or document_id(text), sentences, perplexities, stages)
+        
+        if compact:
+            result = self.build_columns(perplexities, spans, stages)
+        else:
+            result = self.build_result(sentences, perplexities, spans, stages)
+        if near_duplicates is not None:
+            result['near_duplicates'] = near_duplicates
+        if token_scores:
+            result['token_scores'] = self._token_scores(perplexities, stages, token_nll)
+        return result
+    
+    def _token_scores(self, perplexities: List[float], stages: List[str],
+                      token_nll: Dict[int, List[float]], offset: int = 0) -> Dict:
+        """TokenScoreStore.append에 넘길 문장 순서의 perplexity, 단계 코드, 토큰별 NLL
+        
+        모델로 점수화하지 않은 문장 (prefilter, duplicate)의 토큰 NLL은 None이다.
+        """
+        stage_codes = {stage: code for code, stage in enumerate(STAGE_CODES)}
+        return {
+            'perplexities': perplexities,
+            'stages': [stage_codes[stage] for stage in stages],
+            'token_nll': [token_nll.get(offset + i) for i in range(len(perplexities))]
+        }
+    
+    def build_result(self, sentences: List[str], perplexities: List[float],
+                     spans: Optional[List[tuple]] = None,
+                     stages: Optional[List[str]] = None) -> Dict:
+        """문장별 perplexity로부터 분류 결과, 통계, 권장사항 구성
+        
+        spans가 주어지면 각 문장에 원문 기준 start/end 오프셋을, stages가 주어지면
+        점수를 결정한 캐스케이드 단계를 함께 기록한다.
+        """
+        with self.instrumentation.stage('classify'):
+            return self._build_result(sentences, perplexities, spans, stages)
+    
+    def _build_result(self, sentences: List[str], perplexities: List[float],
+                      spans: Optional[List[tuple]] = None,
+                      stages: Optional[List[str]] = None) -> Dict:
+        columns = self._build_columns(perplexities, spans, stages)
+        
+        # 분류 코드별 문장 목록 (NATURAL, AI_SUSPICIOUS, ERROR)
+        groups = ([], [], [])
+        for i, (sentence, ppl, code, confidence) in enumerate(
+            zip(sentences, perplexities, columns['classes'], columns['confidences'])
+        ):
             sentence_data = {
                 'text': sentence,
                 'perplexity': ppl,
                 'position': i,
-                **classification
+                'stage': stages[i] if stages is not None else STAGE_MODEL,
+                'classification': CLASS_CODES[code],
+                'confidence': confidence,
+                'ai_suspicious': code == _AI_SUSPICIOUS
             }
-            
-            if classification['classification'] == 'AI_SUSPICIOUS':
-                ai_suspicious.append(sentence_data)
-            elif classification['classification'] == 'NATURAL':
-                natural.append(sentence_data)
-            else:
-                errors.append(sentence_data)
+            if spans is not None:
+                sentence_data['start'], sentence_data['end'] = spans[i]
+            groups[code].append(sentence_data)
         
         # AI 의심 문장들을 confidence 순으로 정렬 (높은 의심도부터)
-        ai_suspicious.sort(key=lambda x: x['confidence'], reverse=True)
+        groups[_AI_SUSPICIOUS].sort(key=lambda x: x['confidence'], reverse=True)
+        
+        return {
+            'ai_suspicious_sentences': groups[_AI_SUSPICIOUS],
+            'natural_sentences': groups[_NATURAL],
+            'error_sentences': groups[_ERROR],
+            'overall_stats': columns['overall_stats'],
+            'recommendations': columns['recommendations'],
+            'model': self.model_name
+        }
+    
+    def build_columns(self, perplexities: List[float], spans: Optional[List[tuple]] = None,
+                      stages: Optional[List[str]] = None) -> Dict:
+        """문장별 결과를 문장 순서의 병렬 배열로 구성 (간결한 응답 형식)
+        
+        문장 텍스트와 문장별 dict를 만들지 않고 perplexities, confidences,
+        classes(CLASS_CODES 인덱스), stages(STAGE_CODES 인덱스), starts/ends(원문
+        오프셋, spans가 없으면 None) 배열과 통계, 권장사항만 반환한다. 점수화에
+        실패한 문장의 perplexity는 None이다.
+        """
+        with self.instrumentation.stage('classify'):
+            return self._build_columns(perplexities, spans, stages)
+    
+    def _build_columns(self, perplexities: List[float], spans: Optional[List[tuple]] = None,
+                       stages: Optional[List[str]] = None) -> Dict:
+        classified = [self._classify(ppl) for ppl in perplexities]
+        classes = [code for code, _ in classified]
+        confidences = [confidence for _, confidence in classified]
+        
+        # AI 의심 문장 위치를 confidence 순으로 정렬 (높은 의심도부터)
+        ai_suspicious = sorted(
+            (i for i, code in enumerate(classes) if code == _AI_SUSPICIOUS),
+            key=lambda i: confidences[i], reverse=True
+        )
         
         # 통계 계산
-        total_count = len(sentences)
+        total_count = len(classes)
         ai_count = len(ai_suspicious)
+        error_count = classes.count(_ERROR)
         ai_ratio = ai_count / total_count if total_count > 0 else 0.0
         
+        stage_codes = {stage: code for code, stage in enumerate(STAGE_CODES)}
         return {
-            'ai_suspicious_sentences': ai_suspicious,
-            'natural_sentences': natural,
-            'error_sentences': errors,
+            'perplexities': [ppl if math.isfinite(ppl) else None for ppl in perplexities],
+            'confidences': confidences,
+            'classes': classes,
+            'stages': [stage_codes[s] for s in stages] if stages is not None else [0] * total_count,
+            'starts': [start for start, _ in spans] if spans is not None else None,
+            'ends': [end for _, end in spans] if spans is not None else None,
             'overall_stats': {
                 'total_sentences': total_count,
                 'ai_suspicious_count': ai_count,
-                'natural_count': len(natural),
-                'error_count': len(errors),
+                'natural_count': total_count - ai_count - error_count,
+                'error_count': error_count,
                 'ai_ratio': ai_ratio
             },
-            'recommendations': self._generate_recommendations(ai_suspicious, ai_ratio)
+            'recommendations': generate_recommendations(
+                [(i, confidences[i]) for i in ai_suspicious], ai_ratio
+            ),
+            'model': self.model_name
         }
     
-    def _generate_recommendations(self, ai_suspicious: List[Dict], ai_ratio: float) -> List[str]:
-        """수정 권장사항 생성"""
-        recommendations = []
+    def analyze_batch(self, texts: List[str], doc_ids: Optional[List[str]] = None,
+                      compact: bool = False, cancel: Optional[threading.Event] = None,
+                      token_scores: bool = False) -> List[Dict]:
+        """여러 텍스트를 배치로 분석
         
-        if ai_ratio >= 0.5:
-            recommendations.append("⚠️  전체 문장의 50% 이상이 AI 생성으로 의심됩니다. 전면 수정을 권장합니다.")
-        elif ai_ratio >= 0.3:
-            recommendations.append("⚠️  상당수 문장이 AI 생성으로 의심됩니다. 주요 문장들을 수정해주세요.")
-        elif ai_ratio > 0:
-            recommendations.append("✓ 일부 문장만 AI 생성으로 의심됩니다. 해당 문장들을 확인해주세요.")
-        else:
-            recommendations.append("✅ AI 생성이 의심되는 문장이 없습니다.")
+        모든 텍스트의 문장을 하나의 풀로 모아 길이별 마이크로 배치로 함께 점수화한 뒤
+        텍스트별 결과로 되돌린다. document 모드에서는 텍스트별로 점수화한다.
+        near-duplicate 인덱스는 이전 배치까지 등록된 문서와 비교한다. compact이면
+        텍스트별 결과가 build_columns 형식이다. cancel이 설정되면 남은 문장을
+        점수화하지 않고 ScoringCancelled로 중단한다. token_scores이면 텍스트별 결과에
+        토큰 점수 저장소에 기록할 token_scores를 덧붙인다.
+        """
+        if doc_ids is None:
+            doc_ids = [None] * len(texts)
         
-        # 우선순위가 높은 문장들 (confidence > 0.8) 알림
-        high_priority = [s for s in ai_suspicious if s['confidence'] > 0.8]
-        if high_priority:
-            positions = [str(s['position'] + 1) for s in high_priority[:3]]  # 최대 3개만
-            recommendations.append(f"🔥 우선 수정 필요 문장: {', '.join(positions)}번")
+        if self.scoring_mode == 'document':
+            results = []
+            for i, (text, doc_id) in enumerate(zip(texts, doc_ids)):
+                result = self.analyze_sentences(text, doc_id, compact, cancel, token_scores)
+                result['text_id'] = i
+                results.append(result)
+            return results
         
-        return recommendations
-    
-    def analyze_batch(self, texts: List[str]) -> List[Dict]:
-        """여러 텍스트를 배치로 분석"""
-        results = []
+        split_texts = [self.split_sentences(text) for text in texts]
+        all_sentences = [s for sentences, _ in split_texts for s in sentences]
+        logger.info(f"Analyzing {len(texts)} texts ({len(all_sentences)} sentences)")
+        
+        # 텍스트별 near-duplicate 조회 결과를 전체 문장 인덱스 기준으로 모음
+        matches = []
+        reused = {}
+        offset = 0
+        for (sentences, _), doc_id in zip(split_texts, doc_ids):
+            near_duplicates, text_reused = self.match_duplicates(sentences, doc_id)
+            matches.append(near_duplicates)
+            reused.update({offset + i: ppl for i, ppl in text_reused.items()})
+            offset += len(sentences)
+        
+        token_nll = {} if token_scores else None
+        perplexities, stages = self.score_sentences(all_sentences, reused, cancel, token_nll)
         
-        for i, text in enumerate(tqdm(texts, desc="Analyzing batch")):
-            logger.info(f"Analyzing text {i+1}/{len(texts)}")
-            result = self.analyze_sentences(text)
+        results = []
+        offset = 0
+        for i, ((sentences, spans), text, doc_id) in enumerate(zip(split_texts, texts, doc_ids)):
+            end = offset + len(sentences)
+            self.register_document(
+                doc_id or document_id(text), sentences, perplexities[offset:end], stages[offset:end]
+            )
+            if compact:
+                result = self.build_columns(perplexities[offset:end], spans, stages[offset:end])
+            else:
+                result = self.build_result(sentences, perplexities[offset:end], spans, stages[offset:end])
+            if matches[i] is not None:
+                result['near_duplicates'] = matches[i]
+            if token_scores:
+                result['token_scores'] = self._token_scores(
+                    perplexities[offset:end], stages[offset:end], token_nll, offset
+                )
             result['text_id'] = i
             results.append(result)
+            offset = end
         
         return results
     
-    def get_model_info(self) -> Dict[str, Union[str, float]]:
+    def get_model_info(self) -> Dict[str, Union[str, float, Dict]]:
         """현재 사용중인 모델 정보 반환"""
         return {
             'model_name': self.model_name,
             'device': str(self.model_manager.device),
+            'precision': self.precision,
+            'backend': self.backend_name,
             'max_length': self.max_length,
-            'perplexity_threshold': self.PERPLEXITY_THRESHOLD
+            'batch_size': self.batch_size,
+            'max_batch_tokens': self.max_batch_tokens,
+            'scoring_mode': self.scoring_mode,
+            'execution_strategy': self.execution_strategy,
+            'perplexity_threshold': self.perplexity_threshold,
+            'prefilter': self.prefilter_path,
+            'cascade_band': self.cascade_band if self.prefilter is not None else None,
+            'cache': self.cache.stats() if self.cache is not None else None,
+            'prefix_cache': self.prefix_cache.stats() if self.prefix_cache is not None else None,
+            'dedup': self.dedup.stats() if self.dedup is not None else None
         }
\ No newline at end of file
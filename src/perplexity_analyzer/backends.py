@@ -0,0 +1,254 @@
+import hashlib
+import inspect
+import os
+import tempfile
+from typing import Optional
+
+import torch
+from torch import nn
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SUPPORTED_BACKENDS = ('torch', 'onnx')
+
+DEFAULT_ONNX_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'resume-filter', 'onnx')
+
+# 모델 지문에 크기와 수정 시각을 반영할 체크포인트 가중치 파일
+_WEIGHT_SUFFIXES = ('.safetensors', '.bin', '.pt', '.pth')
+
+
+class TorchBackend:
+    """eager PyTorch forward"""
+    
+    name = 'torch'
+    
+    def __init__(self, model: nn.Module, device: torch.device):
+        self.model = model
+        self.device = device
+    
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """logits 계산 (batch, seq_len, vocab)"""
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=input_ids.to(self.device),
+                attention_mask=attention_mask.to(self.device)
+            )
+        return outputs.logits
+    
+    def forward_cached(self, input_ids: torch.Tensor, attention_mask: torch.Tensor, past_key_values=None,
+                       position_ids: Optional[torch.Tensor] = None) -> tuple:
+        """past-key-values를 이어받아 forward 하고 (logits, 갱신된 past-key-values) 반환
+        
+        attention_mask는 past 위치까지 포함한 길이이며, position_ids는 past 길이부터 시작한다.
+        """
+        kwargs = {}
+        if position_ids is not None:
+            kwargs['position_ids'] = position_ids.to(self.device)
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=input_ids.to(self.device),
+                attention_mask=attention_mask.to(self.device),
+                past_key_values=past_key_values,
+                use_cache=True,
+                **kwargs
+            )
+        return outputs.logits, outputs.past_key_values
+    
+    def forward_packed(self, input_ids: torch.Tensor, segment_ids: torch.Tensor) -> torch.Tensor:
+        """여러 시퀀스를 이어 붙인 행의 logits 계산 (batch, seq_len, vocab)
+        
+        segment_ids(-1은 패딩)가 같은 토큰끼리만 causal attention을 허용하는
+        block-diagonal 4D mask와 세그먼트마다 0부터 다시 시작하는 position id를
+        사용하므로, 각 세그먼트의 logits는 단독으로 forward 했을 때와 같다.
+        transformers의 4D attention mask 지원이 필요하다.
+        """
+        seq_len = input_ids.shape[1]
+        segment_ids = segment_ids.to(self.device)
+        
+        # 세그먼트 시작 위치부터 센 position id
+        positions = torch.arange(seq_len, device=self.device).expand_as(segment_ids)
+        starts = torch.ones_like(segment_ids, dtype=torch.bool)
+        starts[:, 1:] = segment_ids[:, 1:] != segment_ids[:, :-1]
+        segment_starts = torch.cummax(torch.where(starts, positions, torch.zeros_like(positions)), dim=1).values
+        position_ids = positions - segment_starts
+        
+        causal = torch.ones((seq_len, seq_len), dtype=torch.bool, device=self.device).tril()
+        allowed = (segment_ids[:, :, None] == segment_ids[:, None, :]) & causal
+        dtype = getattr(self.model, 'dtype', torch.float32)
+        if not dtype.is_floating_point:
+            dtype = torch.float32
+        mask = torch.zeros(allowed.shape, dtype=dtype, device=self.device)
+        mask = mask.masked_fill(~allowed, torch.finfo(dtype).min)[:, None, :, :]
+        
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=input_ids.to(self.device),
+                attention_mask=mask,
+                position_ids=position_ids
+            )
+        return outputs.logits
+
+
+class _LogitsOnly(nn.Module):
+    """ONNX export용 래퍼: past-key-values 없이 logits만 출력"""
+    
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+    
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask, use_cache=False).logits
+
+
+def export_onnx(model: nn.Module, path: str, opset_version: int = 17):
+    """causal LM을 logits 출력 ONNX 그래프로 export (배치, 시퀀스 길이 동적)
+    
+    여러 워커가 동시에 export해도 안전하도록 임시 파일에 쓴 뒤 교체한다.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    
+    dummy = torch.ones((2, 8), dtype=torch.long)
+    export_kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        # dynamic_axes 기반 TorchScript exporter 사용
+        export_kwargs['dynamo'] = False
+    
+    fd, tmp_path = tempfile.mkstemp(suffix='.onnx', dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    try:
+        torch.onnx.export(
+            _LogitsOnly(model).eval(),
+            (dummy, dummy),
+            tmp_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch', 1: 'sequence'},
+            },
+            opset_version=opset_version,
+            **export_kwargs
+        )
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    logger.info(f"Exported ONNX model: {path}")
+
+
+def model_fingerprint(model: nn.Module) -> str:
+    """모델 구성과 가중치 출처의 해시 (같은 구조의 fine-tune이나 갱신된 가중치를 구분)
+    
+    가중치를 읽지 않도록 로컬 디렉터리에서 로드한 모델은 경로와 가중치 파일의 크기,
+    수정 시각을, 허브에서 로드한 모델은 리비전 커밋 해시를 사용한다. 출처를 알 수
+    없는 (메모리에서 만든) 모델만 가중치 바이트를 해시한다.
+    """
+    digest = hashlib.sha256(model.config.to_json_string().encode('utf-8'))
+    source = getattr(model, 'name_or_path', '') or ''
+    commit_hash = getattr(model.config, '_commit_hash', None)
+    if source and os.path.isdir(source):
+        digest.update(os.path.abspath(source).encode('utf-8'))
+        for name in sorted(os.listdir(source)):
+            if name.endswith(_WEIGHT_SUFFIXES):
+                stat = os.stat(os.path.join(source, name))
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+    elif commit_hash:
+        digest.update(f"{source}@{commit_hash}".encode('utf-8'))
+    else:
+        for name, tensor in model.state_dict().items():
+            tensor = tensor.detach().cpu().contiguous()
+            digest.update(f"{name}:{tensor.dtype}:{tuple(tensor.shape)}".encode('utf-8'))
+            digest.update(tensor.view(-1).view(torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+def onnx_artifact_path(model: nn.Module, model_name: str, precision: str,
+                       cache_dir: Optional[str] = None) -> str:
+    """export한 ONNX 그래프 경로 '{cache_dir}/{model_name}-{모델 해시}-{precision}.onnx'"""
+    cache_dir = cache_dir or os.environ.get('ONNX_CACHE_DIR', DEFAULT_ONNX_CACHE_DIR)
+    return os.path.join(cache_dir, f"{model_name}-{model_fingerprint(model)[:16]}-{precision}.onnx")
+
+
+def _quantize_onnx(fp32_path: str, int8_path: str):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    
+    fd, tmp_path = tempfile.mkstemp(suffix='.onnx', dir=os.path.dirname(int8_path) or '.')
+    os.close(fd)
+    try:
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    logger.info(f"Quantized ONNX model: {int8_path}")
+
+
+class OnnxBackend:
+    """ONNX Runtime forward (그래프 최적화, intra-op 스레드 설정)
+    
+    export한 그래프는 cache_dir에 '{model_name}-{구성과 가중치 출처 해시}-{precision}.onnx'로
+    저장되어 재시작이나 다른 워커에서 재사용된다. int8은 fp32 그래프를
+    ONNX Runtime 동적 양자화로 변환한다.
+    """
+    
+    name = 'onnx'
+    
+    def __init__(self, model: nn.Module, model_name: str, precision: str = 'fp32',
+                 cache_dir: Optional[str] = None, intra_op_threads: Optional[int] = None):
+        """
+        Args:
+            model: export에 사용할 fp32 PyTorch 모델
+            model_name: 캐시 파일 이름에 사용할 모델명
+            precision: 'fp32' 또는 'int8'
+            cache_dir: export한 ONNX 파일 저장 경로
+            intra_op_threads: ONNX Runtime intra-op 스레드 수 (기본값 torch 스레드 수)
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "onnxruntime is required for the onnx backend: pip install onnxruntime onnx"
+            ) from e
+        
+        if precision not in ('fp32', 'int8'):
+            raise ValueError(f"Unsupported precision for onnx backend: {precision}")
+        
+        # 모델 구성이나 가중치가 바뀌면 다른 파일을 사용하도록 해시를 이름에 포함
+        fp32_path = onnx_artifact_path(model, model_name, 'fp32', cache_dir)
+        self.model_path = fp32_path[:-len('fp32.onnx')] + f"{precision}.onnx"
+        
+        if not os.path.exists(self.model_path):
+            if not os.path.exists(fp32_path):
+                export_onnx(model, fp32_path)
+            if precision == 'int8':
+                _quantize_onnx(fp32_path, self.model_path)
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads or torch.get_num_threads()
+        options.inter_op_num_threads = 1
+        
+        self.session = ort.InferenceSession(
+            self.model_path, options, providers=['CPUExecutionProvider']
+        )
+        logger.info(f"ONNX Runtime session ready: {self.model_path}")
+    
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """logits 계산 (batch, seq_len, vocab)"""
+        logits = self.session.run(['logits'], {
+            'input_ids': input_ids.cpu().numpy(),
+            'attention_mask': attention_mask.cpu().numpy(),
+        })[0]
+        return torch.from_numpy(logits)
+
+
+def resolve_backend_name(backend: Optional[str]) -> str:
+    """생성자 인자 또는 PERPLEXITY_BACKEND 환경변수로 백엔드 결정"""
+    name = backend or os.environ.get('PERPLEXITY_BACKEND', 'torch')
+    if name not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unsupported backend: {name}")
+    return name
@@ -0,0 +1,343 @@
+"""대용량 JSONL/CSV 코퍼스 오프라인 일괄 분석 CLI
+
+사용법:
+    python -m src.perplexity_analyzer.bulk resumes.jsonl --output scores.jsonl --workers 4
+
+입력은 한 줄씩 스트리밍으로 읽고, 텍스트 묶음을 워커 프로세스 풀에 분배한다.
+각 워커는 PerplexityAnalyzer 하나를 가지며 torch 스레드 수는 CPU 수 / 워커 수로
+제한해 과다 구독을 피한다. 결과는 입력 순서대로 JSONL 또는 Parquet으로 쓰고,
+묶음마다 체크포인트를 남겨 중단된 실행을 같은 명령으로 이어서 수행할 수 있다.
+--score-store를 지정하면 문장별 토큰 NLL을 토큰 점수 저장소(score_store)에 함께 기록해
+나중에 임계값을 바꿔도 다시 추론하지 않고 재분류할 수 있다.
+"""
+import argparse
+import csv
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from .cpu_plan import effective_cpu_count
+from .score_store import TokenScoreStore
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 워커 프로세스별 분석기
+_worker_analyzer = None
+
+
+def _init_worker(analyzer_kwargs: Dict, num_threads: int):
+    """워커 프로세스 초기화: torch 스레드 수 제한 후 분석기 로드"""
+    global _worker_analyzer
+    import torch
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # 이미 병렬 연산을 수행한 프로세스(workers=0)에서는 변경 불가
+        pass
+    
+    from .analyzer import PerplexityAnalyzer
+    _worker_analyzer = PerplexityAnalyzer(**analyzer_kwargs)
+
+
+def _analyze_chunk(records: List[Tuple[str, str]], token_scores: bool = False) -> List[Dict]:
+    """텍스트 묶음을 분석해 출력 행 목록 반환 (token_scores이면 행에 토큰 점수 포함)"""
+    results = _worker_analyzer.analyze_batch(
+        [text for _, text in records], doc_ids=[record_id for record_id, _ in records],
+        token_scores=token_scores
+    )
+    rows = []
+    for (record_id, _), result in zip(records, results):
+        result.pop('text_id', None)
+        rows.append({'id': record_id, **result})
+    return rows
+
+
+def iter_records(path: str, input_format: str, text_field: str,
+                 id_field: Optional[str]) -> Iterator[Tuple[str, str]]:
+    """입력 파일에서 (id, text)를 한 건씩 읽음 (id 필드가 없으면 행 번호)"""
+    with open(path, encoding='utf-8', newline='') as f:
+        if input_format == 'csv':
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        
+        for index, row in enumerate(rows):
+            record_id = row.get(id_field) if id_field else None
+            yield str(record_id if record_id is not None else index), row.get(text_field) or ''
+
+
+def _infer_format(path: str, choices: Tuple[str, ...], default: str) -> str:
+    ext = os.path.splitext(path)[1].lstrip('.').lower()
+    return ext if ext in choices else default
+
+
+class _JsonlWriter:
+    def __init__(self, path: str, checkpoint: Dict):
+        # 체크포인트 이후에 쓰인 불완전한 출력은 잘라냄
+        offset = checkpoint.get('output_offset', 0)
+        if os.path.exists(path):
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+        self.file = open(path, 'ab')
+    
+    def write(self, rows: List[Dict]):
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+    
+    def state(self) -> Dict:
+        return {'output_offset': self.file.tell()}
+    
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    """묶음마다 part 파일을 쓰는 Parquet 디렉터리 출력"""
+    
+    def __init__(self, path: str, checkpoint: Dict):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("pyarrow is required for parquet output: pip install pyarrow") from e
+        
+        self.path = path
+        self.parts = checkpoint.get('parts', 0)
+        os.makedirs(path, exist_ok=True)
+        # 체크포인트 이후에 쓰인 part 파일 제거
+        for name in os.listdir(path):
+            if name.startswith('part-') and int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(path, name))
+    
+    def write(self, rows: List[Dict]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        pq.write_table(pa.Table.from_pylist(rows), os.path.join(self.path, f"part-{self.parts:05d}.parquet"))
+        self.parts += 1
+    
+    def state(self) -> Dict:
+        return {'parts': self.parts}
+    
+    def close(self):
+        pass
+
+
+def _load_checkpoint(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path: str, checkpoint: Dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def run_bulk(input_path: str, output_path: str, input_format: Optional[str] = None,
+             output_format: Optional[str] = None, text_field: str = 'text',
+             id_field: Optional[str] = 'id', workers: int = 1,
+             threads_per_worker: Optional[int] = None, chunk_size: int = 64,
+             checkpoint_path: Optional[str] = None, restart: bool = False,
+             analyzer_kwargs: Optional[Dict] = None, score_store_path: Optional[str] = None) -> Dict:
+    """코퍼스 일괄 분석 실행
+    
+    Args:
+        workers: 워커 프로세스 수 (0이면 현재 프로세스에서 실행)
+        threads_per_worker: 워커당 torch 스레드 수 (기본값 CPU 수 / 워커 수)
+        chunk_size: 워커에 한 번에 보내는 문서 수
+        checkpoint_path: 체크포인트 파일 (기본값 출력 경로 + '.ckpt')
+        restart: 체크포인트를 무시하고 처음부터 실행
+        score_store_path: 토큰 점수 저장소 디렉터리 (체크포인트와 함께 이어서 기록)
+    
+    Returns:
+        처리 문서 수, 문장 수, 소요 시간 요약
+    """
+    input_format = input_format or _infer_format(input_path, ('jsonl', 'csv'), 'jsonl')
+    output_format = output_format or _infer_format(output_path, ('jsonl', 'parquet'), 'jsonl')
+    checkpoint_path = checkpoint_path or f"{output_path}.ckpt"
+    analyzer_kwargs = analyzer_kwargs or {}
+    
+    checkpoint = {} if restart else _load_checkpoint(checkpoint_path)
+    if checkpoint.get('input') not in (None, os.path.abspath(input_path)):
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different input: {checkpoint['input']}")
+    records_done = checkpoint.get('records_done', 0)
+    if records_done:
+        logger.info(f"Resuming from checkpoint: {records_done} records already done")
+    
+    writer_cls = _ParquetWriter if output_format == 'parquet' else _JsonlWriter
+    writer = writer_cls(output_path, checkpoint)
+    store = None
+    if score_store_path:
+        # 출력 파일과 마찬가지로 체크포인트 이후에 기록된 내용은 잘라냄
+        store = TokenScoreStore(score_store_path, state=checkpoint.get('score_store', {}))
+    
+    cpu_count = effective_cpu_count()
+    if threads_per_worker is None:
+        threads_per_worker = max(1, cpu_count // max(1, workers))
+    
+    records = iter_records(input_path, input_format, text_field, id_field)
+    for _ in range(records_done):
+        next(records, None)
+    
+    def chunks() -> Iterator[List[Tuple[str, str]]]:
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    executor = None
+    if workers > 0:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(analyzer_kwargs, threads_per_worker)
+        )
+    else:
+        _init_worker(analyzer_kwargs, threads_per_worker)
+    
+    analyze_chunk = _analyze_chunk
+    if store is not None:
+        analyze_chunk = functools.partial(_analyze_chunk, token_scores=True)
+    
+    docs = 0
+    sentences = 0
+    start_time = time.perf_counter()
+    progress = tqdm(desc="Scoring", unit="doc", initial=records_done, file=sys.stderr)
+    
+    def commit(rows: List[Dict]):
+        nonlocal records_done, docs, sentences
+        if store is not None:
+            for row in rows:
+                store.append(row['id'], row['model'], **row.pop('token_scores'))
+            store.flush()
+        writer.write(rows)
+        records_done += len(rows)
+        docs += len(rows)
+        sentences += sum(row['overall_stats']['total_sentences'] for row in rows)
+        _save_checkpoint(checkpoint_path, {
+            'input': os.path.abspath(input_path),
+            'records_done': records_done,
+            **writer.state(),
+            **({'score_store': store.state()} if store is not None else {})
+        })
+        
+        elapsed = time.perf_counter() - start_time
+        progress.update(len(rows))
+        progress.set_postfix(sent_per_s=f"{sentences / elapsed:.1f}")
+    
+    try:
+        if executor is None:
+            for chunk in chunks():
+                commit(analyze_chunk(chunk))
+        else:
+            # 출력 순서를 유지하기 위해 제출 순서대로 결과를 기록
+            in_flight = deque()
+            for chunk in chunks():
+                in_flight.append(executor.submit(analyze_chunk, chunk))
+                if len(in_flight) >= workers * 2:
+                    commit(in_flight.popleft().result())
+            while in_flight:
+                commit(in_flight.popleft().result())
+    finally:
+        progress.close()
+        writer.close()
+        if store is not None:
+            store.close()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    elapsed = time.perf_counter() - start_time
+    summary = {
+        'docs': docs,
+        'sentences': sentences,
+        'seconds': elapsed,
+        'docs_per_second': docs / elapsed if elapsed > 0 else 0.0,
+        'sentences_per_second': sentences / elapsed if elapsed > 0 else 0.0,
+        'records_done': records_done,
+    }
+    logger.info(
+        f"Scored {docs} docs ({sentences} sentences) in {elapsed:.1f}s: "
+        f"{summary['docs_per_second']:.2f} docs/s, {summary['sentences_per_second']:.1f} sentences/s"
+    )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-score a JSONL/CSV resume corpus")
+    parser.add_argument("input", help="Input JSONL or CSV file")
+    parser.add_argument("--output", required=True, help="Output JSONL file or Parquet directory")
+    parser.add_argument("--input-format", choices=["jsonl", "csv"], help="Default: from file extension")
+    parser.add_argument("--output-format", choices=["jsonl", "parquet"], help="Default: from file extension")
+    parser.add_argument("--text-field", default="text", help="Field containing the document text")
+    parser.add_argument("--id-field", default="id", help="Field containing the document id")
+    parser.add_argument("--workers", type=int, default=max(1, effective_cpu_count() // 4),
+                        help="Number of worker processes (0 = run in this process)")
+    parser.add_argument("--threads-per-worker", type=int, help="torch threads per worker")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Documents per worker task")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.ckpt)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--model", default="kogpt2", help="Model name")
+    parser.add_argument("--precision", default="fp32", choices=["fp32", "bf16", "int8"])
+    parser.add_argument("--backend", choices=["torch", "onnx"], help="Inference backend")
+    parser.add_argument("--execution", default="padded", choices=["padded", "packed"],
+                        help="Pad each sentence to its batch or pack short sentences into full rows")
+    parser.add_argument("--prefix-cache-mb", type=float, default=0,
+                        help="Memory per worker for reusing repeated sentence-opening KV states (0 = disabled)")
+    parser.add_argument("--prefilter", help="Character n-gram pre-filter for cascaded scoring")
+    parser.add_argument("--cascade-band", type=float, default=0.4,
+                        help="Escalation band around the threshold (log-perplexity distance)")
+    parser.add_argument("--dedup-documents", type=int, default=0,
+                        help="Near-duplicate index size per worker (0 = disabled)")
+    parser.add_argument("--dedup-path", help="SQLite file persisting the near-duplicate index")
+    parser.add_argument("--score-store", help="Directory to record per-token scores for later re-classification")
+    args = parser.parse_args(argv)
+    
+    run_bulk(
+        args.input,
+        args.output,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        text_field=args.text_field,
+        id_field=args.id_field,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+        analyzer_kwargs={
+            'model_name': args.model,
+            'precision': args.precision,
+            'backend': args.backend,
+            'execution_strategy': args.execution,
+            'prefix_cache_mb': args.prefix_cache_mb,
+            'prefilter_path': args.prefilter,
+            'cascade_band': args.cascade_band,
+            'dedup_max_documents': args.dedup_documents,
+            'dedup_path': args.dedup_path,
+        },
+        score_store_path=args.score_store
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class PerplexityCache:
+    """전처리된 문장 내용 기반 perplexity 캐시
+    
+    키는 (namespace, 전처리 문장)의 SHA-256 해시이며, namespace에는 모델명과
+    max_length 등 점수에 영향을 주는 설정이 들어간다. 크기가 제한된 메모리 LRU
+    계층과, 선택적으로 여러 워커 프로세스가 공유하고 재시작 후에도 유지되는
+    SQLite 디스크 계층으로 구성된다.
+    """
+    
+    def __init__(self, namespace: str, max_entries: int = 10000, db_path: Optional[str] = None):
+        """
+        Args:
+            namespace: 캐시 키 구분자 (예: 'kogpt2:512')
+            max_entries: 메모리 계층 최대 항목 수
+            db_path: SQLite 디스크 계층 파일 경로 (None이면 사용 안함)
+        """
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.db_path = db_path
+        
+        self._memory: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+        }
+        
+        self._db = None
+        self._db_pid = None
+        if db_path:
+            self._connect()
+            logger.info(f"Perplexity disk cache enabled: {db_path}")
+    
+    def _connect(self):
+        # SQLite 연결은 fork를 넘어 공유할 수 없으므로 프로세스마다 새로 연다
+        if self._db_pid != os.getpid():
+            self._db = self._open_db(self.db_path)
+            self._db_pid = os.getpid()
+    
+    @staticmethod
+    def _open_db(db_path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        # 여러 gunicorn 워커가 동시에 읽고 쓸 수 있도록 WAL 모드 사용
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS perplexity_cache "
+            "(key TEXT PRIMARY KEY, perplexity REAL NOT NULL)"
+        )
+        return db
+    
+    def make_key(self, processed_text: str) -> str:
+        """전처리된 문장의 캐시 키 생성"""
+        payload = f"{self.namespace}\0{processed_text}".encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        """캐시된 perplexity 조회 (없는 키는 결과에서 제외)"""
+        found = {}
+        disk_lookup = []
+        
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self._stats['memory_hits'] += 1
+                else:
+                    disk_lookup.append(key)
+            
+            if disk_lookup and self.db_path:
+                disk_found = self._db_get(disk_lookup)
+                self._stats['disk_hits'] += len(disk_found)
+                for key, ppl in disk_found.items():
+                    self._memory_put(key, ppl)
+                found.update(disk_found)
+            
+            self._stats['misses'] += len(set(disk_lookup) - found.keys())
+        
+        return found
+    
+    def put_many(self, items: Dict[str, float]):
+        """perplexity 저장"""
+        if not items:
+            return
+        
+        with self._lock:
+            for key, ppl in items.items():
+                self._memory_put(key, ppl)
+            
+            if self.db_path:
+                try:
+                    self._connect()
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO perplexity_cache (key, perplexity) VALUES (?, ?)",
+                        list(items.items())
+                    )
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to write perplexity cache: {e}")
+    
+    def stats(self) -> Dict[str, int]:
+        """캐시 적중/실패/제거 카운터"""
+        with self._lock:
+            return {**self._stats, 'memory_size': len(self._memory)}
+    
+    def _memory_put(self, key: str, ppl: float):
+        if self.max_entries <= 0:
+            # 메모리 계층을 사용하지 않으면 저장하지 않음 (제거 횟수에도 넣지 않음)
+            return
+        self._memory[key] = ppl
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+    
+    def _db_get(self, keys: list) -> Dict[str, float]:
+        found = {}
+        try:
+            self._connect()
+            # SQLite 변수 개수 제한을 넘지 않도록 나누어 조회
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, perplexity FROM perplexity_cache WHERE key IN ({placeholders})",
+                    chunk
+                )
+                found.update(rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read perplexity cache: {e}")
+        return found
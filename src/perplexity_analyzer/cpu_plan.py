@@ -0,0 +1,325 @@
+"""CPU 토폴로지를 고려한 워커 수 x torch 스레드 수 계획과 자동 튜닝
+
+사용법:
+    python -m src.perplexity_analyzer.cpu_plan                    # 현재 환경의 기본 계획 출력
+    python -m src.perplexity_analyzer.cpu_plan --autotune --output worker_plan.json
+
+컨테이너의 cgroup CPU 할당량과 프로세스 affinity를 읽어 실제로 쓸 수 있는 CPU 수를
+구하고, 워커마다 torch intra-op 스레드를 나누어 워커 수 x 스레드 수가 CPU 수를 넘지
+않도록 한다. SMT 형제 코어는 같은 워커에 묶어 affinity를 고정할 수 있다.
+autotune은 후보 구성마다 워커 프로세스를 띄워 짧게 점수화 처리량을 측정하고 가장
+빠른 구성을 파일로 저장하며, run_server.py가 이 파일을 재사용한다.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import queue
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_CGROUP_ROOT = '/sys/fs/cgroup'
+_CPU_ROOT = '/sys/devices/system/cpu'
+
+# 측정 워커가 모델을 로드하고 결과를 보내기까지 측정 시간 외에 기다리는 최대 시간 (초)
+MEASURE_TIMEOUT_SECONDS = 300.0
+
+# 자동 튜닝에 사용할 자소서 문장 (코퍼스를 지정하지 않은 경우)
+_AUTOTUNE_SENTENCES = [
+    "저는 대학에서 컴퓨터 공학을 전공하며 다양한 프로젝트를 수행했습니다.",
+    "특히 데이터베이스 설계와 백엔드 개발에 깊은 관심을 가지고 있습니다.",
+    "팀 프로젝트에서 리더를 맡아 일정 관리와 협업을 주도했습니다.",
+    "인턴십 기간에는 고객 데이터를 분석해 서비스 개선안을 제안했습니다.",
+    "여러 번의 실패 끝에 문제 해결 능력을 키울 수 있었습니다.",
+    "입사 후에는 책임감을 가지고 맡은 업무를 끝까지 완수하겠습니다.",
+    "새로운 기술을 배우는 것을 좋아하며 매일 꾸준히 공부하고 있습니다.",
+    "이러한 경험을 바탕으로 귀사의 성장에 기여하고 싶습니다.",
+]
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: str = _CGROUP_ROOT) -> Optional[float]:
+    """cgroup CPU 할당량 (CPU 개수 단위, 제한이 없으면 None)
+    
+    cgroup v2의 cpu.max와 v1의 cpu.cfs_quota_us / cpu.cfs_period_us를 읽는다.
+    """
+    cpu_max = _read(os.path.join(root, 'cpu.max'))
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+        return None
+    
+    quota = _read(os.path.join(root, 'cpu', 'cpu.cfs_quota_us'))
+    period = _read(os.path.join(root, 'cpu', 'cpu.cfs_period_us'))
+    if quota is not None and period is not None and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus() -> List[int]:
+    """이 프로세스가 실행될 수 있는 CPU 번호 목록"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def effective_cpu_count(root: str = _CGROUP_ROOT) -> int:
+    """affinity와 cgroup 할당량을 모두 반영한 사용 가능 CPU 수
+    
+    multiprocessing.cpu_count()는 호스트의 전체 코어 수를 반환하므로
+    CPU가 제한된 컨테이너에서는 과다 구독을 일으킨다.
+    """
+    count = len(available_cpus())
+    limit = cgroup_cpu_limit(root)
+    if limit is not None:
+        count = min(count, math.ceil(limit))
+    return max(1, count)
+
+
+def physical_cores(cpus: List[int], root: str = _CPU_ROOT) -> List[List[int]]:
+    """CPU 번호를 물리 코어별로 묶음 (같은 코어의 SMT 형제끼리, 토폴로지 정보가 없으면 CPU 하나씩)"""
+    cores: Dict[tuple, List[int]] = {}
+    for cpu in cpus:
+        topology = os.path.join(root, f'cpu{cpu}', 'topology')
+        package = _read(os.path.join(topology, 'physical_package_id'))
+        core = _read(os.path.join(topology, 'core_id'))
+        key = (package, core) if package is not None and core is not None else ('cpu', cpu)
+        cores.setdefault(key, []).append(cpu)
+    return sorted(cores.values())
+
+
+@dataclass
+class WorkerPlan:
+    """서버 워커 수와 워커당 torch 스레드 수, 선택적인 워커별 CPU affinity"""
+    workers: int
+    threads_per_worker: int
+    # 워커 슬롯별로 고정할 CPU 번호 (None이면 고정하지 않음)
+    cpu_sets: Optional[List[List[int]]] = None
+    # 계획을 세울 때 사용 가능했던 CPU 수 (환경이 바뀌었는지 확인용)
+    cpus: int = 0
+    # autotune으로 측정한 처리량 (문장/초)
+    sentences_per_second: Optional[float] = None
+    
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(self), f, indent=2)
+    
+    @classmethod
+    def load(cls, path: str) -> 'WorkerPlan':
+        with open(path, encoding='utf-8') as f:
+            return cls(**json.load(f))
+    
+    def env(self) -> Dict[str, str]:
+        """워커 프로세스에 전달할 환경변수"""
+        env = {
+            'TORCH_NUM_THREADS': str(self.threads_per_worker),
+            # torch 임포트 전에 OpenMP/MKL 스레드 풀 크기도 맞춤
+            'OMP_NUM_THREADS': str(self.threads_per_worker),
+            'MKL_NUM_THREADS': str(self.threads_per_worker),
+        }
+        if self.cpu_sets:
+            env['WORKER_CPU_SETS'] = ';'.join(','.join(map(str, cpus)) for cpus in self.cpu_sets)
+        return env
+
+
+def parse_cpu_sets(value: Optional[str]) -> List[List[int]]:
+    """WORKER_CPU_SETS 환경변수 ('0,1;2,3') 파싱"""
+    if not value:
+        return []
+    return [[int(cpu) for cpu in part.split(',')] for part in value.split(';') if part]
+
+
+def _assign_cpu_sets(workers: int, threads: int, cpus: List[int], cpu_count: int) -> List[List[int]]:
+    # 물리 코어 단위로 채워 한 워커의 스레드가 다른 워커와 같은 코어를 공유하지 않게 함
+    ordered = [cpu for core in physical_cores(cpus) for cpu in core][:cpu_count]
+    return [ordered[i * threads:(i + 1) * threads] or ordered for i in range(workers)]
+
+
+def plan_workers(workers: Optional[int] = None, threads_per_worker: Optional[int] = None,
+                 pin: bool = False, cpu_count: Optional[int] = None) -> WorkerPlan:
+    """사용 가능한 CPU를 워커 수 x 워커당 스레드 수로 나누는 계획
+    
+    둘 다 지정하지 않으면 워커당 스레드를 물리 코어 수의 절반(최대 4)으로 두고 남은
+    CPU만큼 워커를 늘린다. 작은 모델의 CPU forward는 스레드 수를 늘려도 효율이 빨리
+    떨어지므로, 적은 스레드의 워커 여러 개가 동시 요청 처리량에 유리하다.
+    
+    Args:
+        workers: 워커 수 (지정하면 스레드 수를 CPU 수 / 워커 수로 계산)
+        threads_per_worker: 워커당 torch 스레드 수
+        pin: 워커마다 겹치지 않는 CPU 집합으로 affinity 고정
+        cpu_count: 사용 가능 CPU 수 (기본값 effective_cpu_count())
+    """
+    cpus = available_cpus()
+    if cpu_count is None:
+        cpu_count = effective_cpu_count()
+    
+    if threads_per_worker is None:
+        if workers is not None:
+            threads_per_worker = max(1, cpu_count // max(1, workers))
+        else:
+            cores = min(len(physical_cores(cpus)), cpu_count)
+            threads_per_worker = max(1, min(4, cores // 2))
+    if workers is None:
+        workers = max(1, cpu_count // threads_per_worker)
+    
+    cpu_sets = _assign_cpu_sets(workers, threads_per_worker, cpus, cpu_count) if pin else None
+    return WorkerPlan(workers=workers, threads_per_worker=threads_per_worker,
+                      cpu_sets=cpu_sets, cpus=cpu_count)
+
+
+def candidate_plans(cpu_count: int, pin: bool = False) -> List[WorkerPlan]:
+    """autotune에서 비교할 워커 수 x 스레드 수 후보 (CPU 수를 넘지 않는 2의 거듭제곱 스레드)"""
+    plans = []
+    threads = 1
+    while threads <= cpu_count:
+        plans.append(plan_workers(threads_per_worker=threads, pin=pin, cpu_count=cpu_count))
+        threads *= 2
+    return plans
+
+
+def _autotune_worker(analyzer_kwargs: Dict, threads: int, cpus: Optional[List[int]], sentences: List[str],
+                     batch_sentences: int, duration: float, barrier, results):
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    import torch
+    torch.set_num_threads(threads)
+    
+    from .analyzer import PerplexityAnalyzer
+    analyzer = PerplexityAnalyzer(**analyzer_kwargs)
+    batch = [sentences[i % len(sentences)] for i in range(batch_sentences)]
+    analyzer.calculate_perplexities(batch)
+    
+    # 모든 워커가 준비된 뒤 동시에 측정 시작
+    barrier.wait()
+    scored = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        analyzer.calculate_perplexities(batch)
+        scored += len(batch)
+    results.put(scored)
+
+
+def measure_plan(plan: WorkerPlan, analyzer_kwargs: Dict, sentences: List[str],
+                 batch_sentences: int = 8, duration: float = 5.0,
+                 timeout: float = MEASURE_TIMEOUT_SECONDS) -> Optional[float]:
+    """계획대로 워커 프로세스를 띄워 동시에 점수화한 전체 처리량 (문장/초)
+    
+    워커가 비정상 종료하거나 (모델 로드 중 메모리 부족 등) duration + timeout 안에
+    결과를 보내지 않으면 남은 워커를 종료하고 측정할 수 없는 후보로 None을 반환한다.
+    """
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(plan.workers)
+    results = context.Queue()
+    # 캐시는 같은 문장을 반복하는 측정을 왜곡하므로 사용하지 않음
+    analyzer_kwargs = {**analyzer_kwargs, 'cache_size': 0, 'cache_path': None}
+    
+    processes = []
+    for slot in range(plan.workers):
+        cpus = plan.cpu_sets[slot] if plan.cpu_sets else None
+        process = context.Process(
+            target=_autotune_worker,
+            args=(analyzer_kwargs, plan.threads_per_worker, cpus, sentences,
+                  batch_sentences, duration, barrier, results)
+        )
+        process.start()
+        processes.append(process)
+    
+    counts = []
+    deadline = time.monotonic() + duration + timeout
+    try:
+        while len(counts) < len(processes):
+            try:
+                counts.append(results.get(timeout=1.0))
+                continue
+            except queue.Empty:
+                pass
+            failed = [process.exitcode for process in processes if process.exitcode not in (None, 0)]
+            if failed:
+                logger.warning(f"Autotune worker exited with code {failed[0]}, skipping this plan")
+                return None
+            if time.monotonic() > deadline:
+                logger.warning(f"Autotune workers did not report within {duration + timeout:.0f}s, skipping this plan")
+                return None
+    finally:
+        # 실패한 경우 barrier에서 기다리는 나머지 워커까지 정리
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    return sum(counts) / duration
+
+
+def autotune(analyzer_kwargs: Dict, sentences: Optional[List[str]] = None, pin: bool = False,
+             duration: float = 5.0, batch_sentences: int = 8,
+             cpu_count: Optional[int] = None) -> WorkerPlan:
+    """후보 구성의 처리량을 측정해 가장 빠른 계획 반환 (모두 측정하지 못하면 기본 계획)"""
+    if cpu_count is None:
+        cpu_count = effective_cpu_count()
+    sentences = sentences or _AUTOTUNE_SENTENCES
+    
+    best = None
+    for plan in candidate_plans(cpu_count, pin):
+        plan.sentences_per_second = measure_plan(plan, analyzer_kwargs, sentences, batch_sentences, duration)
+        if plan.sentences_per_second is None:
+            continue
+        logger.info(
+            f"{plan.workers} workers x {plan.threads_per_worker} threads: "
+            f"{plan.sentences_per_second:.1f} sentences/s"
+        )
+        if best is None or plan.sentences_per_second > best.sentences_per_second:
+            best = plan
+    if best is None:
+        logger.warning("No candidate plan could be measured, using the default plan")
+        best = plan_workers(pin=pin, cpu_count=cpu_count)
+    return best
+
+
+def main(argv=None):
+    from .utils import load_corpus_sentences
+    
+    parser = argparse.ArgumentParser(description="Plan gunicorn workers x torch threads for this machine")
+    parser.add_argument("--workers", type=int, help="Fix the number of workers")
+    parser.add_argument("--threads-per-worker", type=int, help="Fix torch threads per worker")
+    parser.add_argument("--pin", action="store_true", help="Pin each worker to its own CPUs")
+    parser.add_argument("--autotune", action="store_true", help="Benchmark candidate plans and keep the fastest")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to measure each candidate")
+    parser.add_argument("--corpus", help="Sentences to score while autotuning (one document per line)")
+    parser.add_argument("--model", default=os.environ.get('MODEL_NAME', 'kogpt2'), help="Model name")
+    parser.add_argument("--model-path", default=os.environ.get('MODEL_PATH'), help="Local model directory")
+    parser.add_argument("--precision", default=os.environ.get('MODEL_PRECISION', 'fp32'),
+                        choices=["fp32", "bf16", "int8"])
+    parser.add_argument("--output", help="Write the plan to this JSON file")
+    args = parser.parse_args(argv)
+    
+    if args.autotune:
+        plan = autotune(
+            {'model_name': args.model, 'model_path': args.model_path, 'precision': args.precision},
+            sentences=load_corpus_sentences(args.corpus) if args.corpus else None,
+            pin=args.pin,
+            duration=args.duration
+        )
+    else:
+        plan = plan_workers(args.workers, args.threads_per_worker, pin=args.pin)
+    
+    if args.output:
+        plan.save(args.output)
+        logger.info(f"Saved worker plan to {args.output}")
+    print(json.dumps(asdict(plan), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .utils import preprocess_text, setup_logger
+
+logger = setup_logger(__name__)
+
+# 같은 문장이 있는 near-duplicate 문서의 점수를 재사용한 문장의 단계
+STAGE_DUPLICATE = 'duplicate'
+
+# 해시 순열에 사용하는 메르센 소수 (2^61 - 1)
+_PRIME = (1 << 61) - 1
+
+
+def document_id(text: str) -> str:
+    """문서 ID가 주어지지 않았을 때 사용할 내용 기반 ID"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class DuplicateIndex:
+    """분석한 문서들의 MinHash/LSH 인덱스
+    
+    문서의 전처리 문장들에서 공백을 뺀 글자 shingle 집합으로 MinHash 서명을 만들고,
+    서명을 band로 나눈 LSH 버킷으로 후보 문서를 찾은 뒤 서명 일치 비율(Jaccard
+    추정치)이 threshold 이상인 문서를 near-duplicate로 반환한다. 문서마다 문장별
+    perplexity를 함께 보관해, 새 문서에서 near-duplicate 문서와 같은 문장은 모델
+    없이 저장된 점수를 재사용할 수 있다.
+    
+    메모리 계층은 max_documents개로 제한되며(오래된 문서부터 제거), db_path를
+    지정하면 SQLite에 기록해 재시작 후에도 인덱스를 복원한다.
+    """
+    
+    def __init__(self, namespace: str, max_documents: int = 100000, threshold: float = 0.5,
+                 num_perm: int = 64, bands: int = 16, shingle_size: int = 5,
+                 db_path: Optional[str] = None, seed: int = 1):
+        """
+        Args:
+            namespace: 저장된 perplexity가 유효한 모델/설정 구분자 (PerplexityCache와 같음)
+            max_documents: 메모리에 유지할 최대 문서 수
+            threshold: near-duplicate로 판정할 최소 Jaccard 추정치
+            num_perm: MinHash 해시 함수 수
+            bands: LSH band 수 (num_perm의 약수)
+            shingle_size: shingle 글자 수
+            db_path: SQLite 영속화 파일 경로 (None이면 메모리에만 유지)
+            seed: 해시 함수 계수 시드 (영속화된 서명과 맞아야 함)
+        """
+        if max_documents < 1:
+            raise ValueError(f"max_documents must be >= 1: {max_documents}")
+        if bands < 1 or num_perm % bands:
+            raise ValueError(f"bands must divide num_perm: {bands}")
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold must be in (0, 1]: {threshold}")
+        
+        self.namespace = namespace
+        self.max_documents = max_documents
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.db_path = db_path
+        
+        # a * h + b가 uint64를 넘지 않도록 a < 2^31, h < 2^32
+        rng = random.Random(seed)
+        self._a = np.array([rng.randrange(1, 1 << 31) for _ in range(num_perm)], dtype=np.uint64)
+        self._b = np.array([rng.randrange(0, 1 << 31) for _ in range(num_perm)], dtype=np.uint64)
+        
+        # doc_id -> (서명, 전처리 문장 -> perplexity)
+        self._documents: 'OrderedDict[str, Tuple[Tuple[int, ...], Dict[str, float]]]' = OrderedDict()
+        self._buckets: List[Dict[Tuple[int, ...], set]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self._stats = {'queries': 0, 'duplicate_queries': 0, 'reused_sentences': 0, 'evictions': 0}
+        
+        self._db = None
+        self._db_pid = None
+        if db_path:
+            self._connect()
+            self._load()
+            logger.info(f"Duplicate index persisted at {db_path} ({len(self._documents)} documents)")
+    
+    def _connect(self):
+        # SQLite 연결은 fork를 넘어 공유할 수 없으므로 프로세스마다 새로 연다
+        if self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS duplicate_index "
+                "(namespace TEXT NOT NULL, doc_id TEXT NOT NULL, signature TEXT NOT NULL, "
+                "sentences TEXT NOT NULL, PRIMARY KEY (namespace, doc_id))"
+            )
+            self._db_pid = os.getpid()
+    
+    def _load(self):
+        rows = self._db.execute(
+            "SELECT doc_id, signature, sentences FROM duplicate_index WHERE namespace = ? "
+            "ORDER BY rowid DESC LIMIT ?",
+            (self.namespace, self.max_documents)
+        ).fetchall()
+        for doc_id, signature, sentences in reversed(rows):
+            self._insert(doc_id, tuple(json.loads(signature)), json.loads(sentences))
+    
+    def _shingles(self, processed: List[str]) -> np.ndarray:
+        hashes = set()
+        for text in processed:
+            compact = ''.join(text.split())
+            if not compact:
+                continue
+            for i in range(max(1, len(compact) - self.shingle_size + 1)):
+                digest = hashlib.blake2b(compact[i:i + self.shingle_size].encode('utf-8'), digest_size=4).digest()
+                hashes.add(int.from_bytes(digest, 'little'))
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    
+    def signature(self, sentences: List[str]) -> Optional[Tuple[int, ...]]:
+        """문장 목록의 MinHash 서명 (shingle이 없으면 None)"""
+        shingles = self._shingles([preprocess_text(s) for s in sentences if s])
+        if shingles.size == 0:
+            return None
+        hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) % np.uint64(_PRIME)
+        return tuple(int(v) for v in hashed.min(axis=1))
+    
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        return [signature[b * self.rows:(b + 1) * self.rows] for b in range(self.bands)]
+    
+    def _similar(self, signature: Tuple[int, ...], exclude: Optional[str] = None) -> List[Dict]:
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        candidates.discard(exclude)
+        
+        matches = []
+        for doc_id in candidates:
+            other = self._documents[doc_id][0]
+            similarity = sum(x == y for x, y in zip(signature, other)) / self.num_perm
+            if similarity >= self.threshold:
+                matches.append({'doc_id': doc_id, 'similarity': similarity})
+        matches.sort(key=lambda m: m['similarity'], reverse=True)
+        return matches
+    
+    def query(self, sentences: List[str], exclude: Optional[str] = None) -> List[Dict]:
+        """near-duplicate 문서 목록 ({'doc_id', 'similarity'}, 유사도 내림차순)"""
+        signature = self.signature(sentences)
+        if signature is None:
+            return []
+        with self._lock:
+            return self._similar(signature, exclude)
+    
+    def match(self, sentences: List[str], exclude: Optional[str] = None) -> Tuple[List[Dict], Dict[int, float]]:
+        """near-duplicate 문서를 찾고 그 문서들과 같은 문장의 저장된 perplexity를 반환
+        
+        Returns:
+            (near_duplicates, reused) - reused는 문장 인덱스 -> 재사용할 perplexity
+        """
+        signature = self.signature(sentences)
+        if signature is None:
+            return [], {}
+        
+        with self._lock:
+            near_duplicates = self._similar(signature, exclude)
+            reused = {}
+            for i, sentence in enumerate(sentences):
+                processed = preprocess_text(sentence) if sentence else ''
+                # 유사도가 높은 문서부터 찾음
+                for match in near_duplicates:
+                    ppl = self._documents[match['doc_id']][1].get(processed)
+                    if ppl is not None:
+                        reused[i] = ppl
+                        break
+            
+            self._stats['queries'] += 1
+            self._stats['duplicate_queries'] += bool(near_duplicates)
+            self._stats['reused_sentences'] += len(reused)
+        return near_duplicates, reused
+    
+    def add(self, doc_id: str, sentences: List[str], perplexities: List[float]):
+        """문서의 서명과 문장별 perplexity 등록 (같은 ID는 덮어씀)"""
+        signature = self.signature(sentences)
+        if signature is None:
+            return
+        scores = {}
+        for sentence, ppl in zip(sentences, perplexities):
+            if sentence and math.isfinite(ppl):
+                scores[preprocess_text(sentence)] = ppl
+        
+        with self._lock:
+            evicted = self._insert(doc_id, signature, scores)
+            if self.db_path:
+                try:
+                    self._connect()
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO duplicate_index (namespace, doc_id, signature, sentences) "
+                        "VALUES (?, ?, ?, ?)",
+                        (self.namespace, doc_id, json.dumps(signature), json.dumps(scores, ensure_ascii=False))
+                    )
+                    self._db.executemany(
+                        "DELETE FROM duplicate_index WHERE namespace = ? AND doc_id = ?",
+                        [(self.namespace, evicted_id) for evicted_id in evicted]
+                    )
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to write duplicate index: {e}")
+    
+    def _insert(self, doc_id: str, signature: Tuple[int, ...], scores: Dict[str, float]) -> List[str]:
+        self._remove(doc_id)
+        self._documents[doc_id] = (signature, scores)
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(key, set()).add(doc_id)
+        
+        evicted = []
+        while len(self._documents) > self.max_documents:
+            evicted_id = next(iter(self._documents))
+            self._remove(evicted_id)
+            evicted.append(evicted_id)
+            self._stats['evictions'] += 1
+        return evicted
+    
+    def _remove(self, doc_id: str):
+        entry = self._documents.pop(doc_id, None)
+        if entry is None:
+            return
+        for band, key in zip(self._buckets, self._band_keys(entry[0])):
+            members = band.get(key)
+            if members is not None:
+                members.discard(doc_id)
+                if not members:
+                    del band[key]
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'documents': len(self._documents)}
@@ -0,0 +1,29 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class Instrumentation:
+    """분석 단계별 타이밍과 forward 배치 통계를 받는 훅 (기본 구현은 아무것도 하지 않음)
+    
+    API 서버 등에서 상속해 메트릭 시스템으로 전달한다.
+    단계: split, dedup, prefilter, preprocess, tokenize, forward, loss, classify, serialize
+    """
+    
+    def observe_stage(self, stage: str, seconds: float):
+        """단계별 소요 시간"""
+    
+    def observe_forward(self, batch_size: int, tokens: int, padded_tokens: int):
+        """forward 한 번의 배치 크기, 실제 토큰 수, 패딩 포함 토큰 수"""
+    
+    def observe_queue_wait(self, seconds: float):
+        """요청이 추론 큐에서 대기한 시간"""
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """with 블록의 소요 시간을 observe_stage로 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
@@ -1,16 +1,70 @@
+import argparse
+import os
 from typing import Dict, Optional
 import torch
+from torch import nn
 from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers.pytorch_utils import Conv1D
 from .utils import setup_logger
 
 logger = setup_logger(__name__)
 
+# fp32: 기본값, bf16: bfloat16 가중치, int8: Linear 레이어 동적 양자화
+SUPPORTED_PRECISIONS = ('fp32', 'bf16', 'int8')
+
+
+def _conv1d_to_linear(model: nn.Module) -> nn.Module:
+    """GPT-2의 Conv1D 레이어를 동일한 nn.Linear로 교체 (동적 양자화 대상이 되도록)"""
+    for name, module in list(model.named_children()):
+        if isinstance(module, Conv1D):
+            in_features, out_features = module.weight.shape
+            linear = nn.Linear(in_features, out_features)
+            linear.weight.data = module.weight.data.t().contiguous()
+            linear.bias.data = module.bias.data
+            setattr(model, name, linear)
+        else:
+            _conv1d_to_linear(module)
+    return model
+
+
+def apply_precision(model: nn.Module, precision: str) -> nn.Module:
+    """CPU 추론용 정밀도 적용
+    
+    Args:
+        model: fp32로 로드된 모델
+        precision: 'fp32', 'bf16', 'int8' 중 하나
+    """
+    if precision not in SUPPORTED_PRECISIONS:
+        raise ValueError(f"Unsupported precision: {precision}")
+    
+    if precision == 'bf16':
+        return model.to(torch.bfloat16)
+    
+    if precision == 'int8':
+        model = _conv1d_to_linear(model)
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    
+    return model
+
+
+def model_memory_bytes(model: nn.Module) -> int:
+    """모델 가중치와 버퍼가 차지하는 메모리 (동적 양자화된 packed 가중치 포함)"""
+    def tensor_bytes(value) -> int:
+        if isinstance(value, torch.Tensor):
+            return value.numel() * value.element_size()
+        if isinstance(value, (tuple, list)):
+            return sum(tensor_bytes(v) for v in value)
+        return 0
+    
+    return sum(tensor_bytes(value) for value in model.state_dict().values())
+
 
 class ModelManager:
     """사전훈련된 모델들을 관리하는 클래스"""
     
     SUPPORTED_MODELS = {
-        'kogpt2': 'skt/kogpt2-base-v2'
+        'kogpt2': 'skt/kogpt2-base-v2',
+        'gpt2': 'gpt2'
     }
     
     def __init__(self):
@@ -18,30 +72,45 @@ class ModelManager:
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         logger.info(f"Using device: {self.device}")
     
-    def load_model(self, model_name: str) -> tuple:
-        """모델과 토크나이저 로드"""
-        if model_name in self.models:
-            return self.models[model_name]
+    def load_model(self, model_name: str, precision: str = 'fp32',
+                   model_path: Optional[str] = None) -> tuple:
+        """모델과 토크나이저 로드
         
-        if model_name not in self.SUPPORTED_MODELS:
+        Args:
+            model_name: SUPPORTED_MODELS의 모델명
+            precision: 'fp32' (기본), 'bf16', 'int8' (Linear 레이어 동적 양자화)
+            model_path: 허깅페이스 경로 대신 사용할 로컬 모델 디렉터리
+        """
+        model_key = f"{model_name}:{precision}"
+        if model_key in self.models:
+            return self.models[model_key]
+        
+        if model_path is None and model_name not in self.SUPPORTED_MODELS:
             raise ValueError(f"Unsupported model: {model_name}")
+        if precision not in SUPPORTED_PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}")
+        if precision == 'int8' and self.device.type != 'cpu':
+            # 동적 양자화 커널은 CPU에서만 동작
+            raise ValueError("int8 precision is only supported on CPU")
         
-        model_path = self.SUPPORTED_MODELS[model_name]
-        logger.info(f"Loading model: {model_path}")
+        model_path = model_path or self.SUPPORTED_MODELS[model_name]
+        logger.info(f"Loading model: {model_path} ({precision})")
         
         try:
-            tokenizer = AutoTokenizer.from_pretrained(model_path)
-            model = AutoModelForCausalLM.from_pretrained(model_path)
+            model, tokenizer = self._load_pretrained(model_path)
             
             # 패딩 토큰 설정
             if tokenizer.pad_token is None:
                 tokenizer.pad_token = tokenizer.eos_token
+            # 배치 패딩시 position id가 어긋나지 않도록 오른쪽 패딩 사용
+            tokenizer.padding_side = 'right'
             
             model.to(self.device)
             model.eval()
+            model = apply_precision(model, precision)
             
-            self.models[model_name] = (model, tokenizer)
-            logger.info(f"Successfully loaded {model_name}")
+            self.models[model_key] = (model, tokenizer)
+            logger.info(f"Successfully loaded {model_name} ({precision})")
             
             return model, tokenizer
             
@@ -49,3 +118,48 @@ class ModelManager:
             logger.error(f"Failed to load model {model_name}: {e}")
             raise
     
+    def _load_pretrained(self, model_path: str) -> tuple:
+        """허깅페이스 경로 또는 로컬 디렉터리에서 fp32 모델과 토크나이저 로드
+        
+        로컬 디렉터리는 허브 조회 없이 읽고, safetensors 파일이 있으면
+        메모리 매핑으로 로드해 역직렬화 복사 없이 시작 시간을 줄인다.
+        """
+        kwargs = {}
+        if os.path.isdir(model_path):
+            kwargs['local_files_only'] = True
+            if os.path.exists(os.path.join(model_path, 'model.safetensors')):
+                kwargs['use_safetensors'] = True
+        tokenizer = AutoTokenizer.from_pretrained(model_path, **kwargs)
+        model = AutoModelForCausalLM.from_pretrained(model_path, **kwargs)
+        return model, tokenizer
+
+
+def export_local_model(model_name: str, output_dir: str) -> str:
+    """허깅페이스 모델을 safetensors 형식의 로컬 디렉터리로 저장
+    
+    저장한 디렉터리를 MODEL_PATH로 지정하면 서버가 네트워크 없이
+    메모리 매핑으로 모델을 로드한다.
+    """
+    if model_name not in ModelManager.SUPPORTED_MODELS:
+        raise ValueError(f"Unsupported model: {model_name}")
+    
+    tokenizer = AutoTokenizer.from_pretrained(ModelManager.SUPPORTED_MODELS[model_name])
+    model = AutoModelForCausalLM.from_pretrained(ModelManager.SUPPORTED_MODELS[model_name])
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer.save_pretrained(output_dir)
+    model.save_pretrained(output_dir, safe_serialization=True)
+    logger.info(f"Exported {model_name} to {output_dir}")
+    return output_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="모델을 로컬 safetensors 디렉터리로 내보내기")
+    parser.add_argument('output_dir', help="저장할 디렉터리 (MODEL_PATH로 사용)")
+    parser.add_argument('--model', default='kogpt2', choices=sorted(ModelManager.SUPPORTED_MODELS))
+    args = parser.parse_args(argv)
+    
+    export_local_model(args.model, args.output_dir)
+
+
+if __name__ == '__main__':
+    main()
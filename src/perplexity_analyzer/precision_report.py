@@ -0,0 +1,120 @@
+"""fp32 대비 저정밀도 추론 모드(bf16, int8)의 perplexity 변화와 분류 일치율 측정
+
+사용법:
+    python -m src.perplexity_analyzer.precision_report --corpus reference.txt --precisions bf16 int8
+
+코퍼스 파일은 한 줄에 문서 하나이며, 각 문서는 split_into_sentences로 문장 단위로 나뉜다.
+"""
+import argparse
+import json
+import math
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from .analyzer import PerplexityAnalyzer
+from .utils import load_corpus_sentences, setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _timed_perplexities(analyzer: PerplexityAnalyzer, sentences: List[str]) -> tuple:
+    start = time.perf_counter()
+    perplexities = analyzer.calculate_perplexities(sentences)
+    return perplexities, time.perf_counter() - start
+
+
+def compare_precision(reference: PerplexityAnalyzer, candidate: PerplexityAnalyzer,
+                      sentences: List[str], threshold_band: float = 0.1,
+                      max_flips: int = 20) -> Dict:
+    """두 분석기의 문장별 perplexity 차이와 분류 일치율 계산
+    
+    Args:
+        reference: 기준 분석기 (fp32)
+        candidate: 비교할 분석기
+        sentences: 참조 문장 목록
+        threshold_band: 임계값 근처로 볼 범위 (임계값 대비 비율)
+        max_flips: 보고서에 포함할 분류 변경 문장 최대 수
+    """
+    ref_ppls, ref_seconds = _timed_perplexities(reference, sentences)
+    cand_ppls, cand_seconds = _timed_perplexities(candidate, sentences)
+    
+    threshold = reference.perplexity_threshold
+    pairs = [
+        (s, r, c) for s, r, c in zip(sentences, ref_ppls, cand_ppls)
+        if math.isfinite(r) and math.isfinite(c)
+    ]
+    if not pairs:
+        raise ValueError("No sentences could be scored by both analyzers")
+    
+    ref = np.array([r for _, r, _ in pairs])
+    cand = np.array([c for _, _, c in pairs])
+    relative_drift = np.abs(cand - ref) / ref
+    log_drift = np.abs(np.log(cand) - np.log(ref))
+    
+    ref_suspicious = ref <= threshold
+    cand_suspicious = cand <= threshold
+    agree = ref_suspicious == cand_suspicious
+    near = np.abs(ref - threshold) <= threshold * threshold_band
+    
+    flips = [
+        {'text': s, 'reference_perplexity': r, 'candidate_perplexity': c}
+        for (s, r, c), same in zip(pairs, agree) if not same
+    ]
+    
+    return {
+        'reference_precision': reference.precision,
+        'candidate_precision': candidate.precision,
+        'sentences': len(sentences),
+        'compared_sentences': len(pairs),
+        'relative_drift': {
+            'mean': float(relative_drift.mean()),
+            'p50': float(np.percentile(relative_drift, 50)),
+            'p95': float(np.percentile(relative_drift, 95)),
+            'max': float(relative_drift.max()),
+        },
+        'mean_abs_log_perplexity_drift': float(log_drift.mean()),
+        'classification_agreement': float(agree.mean()),
+        'near_threshold': {
+            'band': [threshold * (1 - threshold_band), threshold * (1 + threshold_band)],
+            'sentences': int(near.sum()),
+            'agreement': float(agree[near].mean()) if near.any() else None,
+        },
+        'flipped_sentences': flips[:max_flips],
+        'flip_count': len(flips),
+        'reference_seconds': ref_seconds,
+        'candidate_seconds': cand_seconds,
+        'speedup': ref_seconds / cand_seconds if cand_seconds > 0 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare reduced-precision inference against fp32")
+    parser.add_argument("--corpus", required=True, help="Reference corpus (one document per line)")
+    parser.add_argument("--model", default="kogpt2", help="Model name")
+    parser.add_argument("--precisions", nargs="+", default=["bf16", "int8"], help="Precisions to compare")
+    parser.add_argument("--threshold-band", type=float, default=0.1,
+                        help="Relative band around the threshold reported separately")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+    
+    sentences = load_corpus_sentences(args.corpus)
+    logger.info(f"Loaded {len(sentences)} reference sentences")
+    
+    # 캐시는 정밀도별 측정을 왜곡하므로 사용하지 않음
+    reference = PerplexityAnalyzer(model_name=args.model, precision='fp32', cache_size=0)
+    reports = []
+    for precision in args.precisions:
+        candidate = PerplexityAnalyzer(model_name=args.model, precision=precision, cache_size=0)
+        reports.append(compare_precision(reference, candidate, sentences, args.threshold_band))
+    
+    output = json.dumps(reports, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""캐스케이드 점수화의 1단계: 문자 n-gram 언어모델로 kogpt2 perplexity를 빠르게 추정
+
+대부분의 문장은 임계값에서 멀리 떨어져 있으므로, 문자 n-gram 모델의 추정치가
+임계값 주변 구간(cascade_band)에 들어오는 문장만 kogpt2로 다시 점수화한다.
+n-gram의 글자당 log-perplexity는 kogpt2의 토큰당 log-perplexity와 척도가 다르므로
+보정용 문장들에 대해 선형 회귀로 kogpt2 척도에 맞춘다.
+
+사용법:
+    # 학습 + kogpt2 기준 보정
+    python -m src.perplexity_analyzer.prefilter train --corpus corpus.txt --output prefilter.json
+    # 전체 kogpt2 점수화 대비 일치율 측정
+    python -m src.perplexity_analyzer.prefilter agreement --corpus heldout.txt --prefilter prefilter.json --bands 0.2 0.4 0.6
+
+코퍼스 파일은 한 줄에 문서 하나이며, 각 문서는 split_into_sentences로 문장 단위로 나뉜다.
+"""
+import argparse
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .utils import load_corpus_sentences, preprocess_text, setup_logger
+
+if TYPE_CHECKING:
+    from .analyzer import PerplexityAnalyzer
+
+logger = setup_logger(__name__)
+
+_BOS = '\x02'
+_EOS = '\x03'
+
+# 1단계에서 결정된 문장과 kogpt2로 넘어간 문장의 stage 값
+STAGE_PREFILTER = 'prefilter'
+STAGE_MODEL = 'model'
+
+
+class CharNgramModel:
+    """Witten-Bell 보간 문자 n-gram 언어모델
+    
+    전처리한 문장을 글자 단위로 학습하며, 점수화는 글자 수에 선형이라
+    kogpt2 forward보다 수백 배 빠르다.
+    """
+    
+    def __init__(self, order: int = 4):
+        if order < 1:
+            raise ValueError(f"order must be >= 1: {order}")
+        self.order = order
+        # 문맥(길이 0 ~ order-1) -> 다음 글자별 빈도
+        self.counts: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.vocab_size = 1
+        # n-gram 글자당 log-perplexity -> kogpt2 log-perplexity 선형 보정 (기울기, 절편)
+        self.calibration: Tuple[float, float] = (1.0, 0.0)
+        # 보정 잔차 표준편차 (log 척도, cascade_band 선택 참고용)
+        self.residual_std: Optional[float] = None
+        self._totals: Dict[str, Tuple[int, int]] = {}
+    
+    def fit(self, sentences: Iterable[str]) -> 'CharNgramModel':
+        """문장 목록으로 n-gram 빈도 학습 (여러 번 호출하면 누적)"""
+        for sentence in sentences:
+            text = preprocess_text(sentence)
+            if not text:
+                continue
+            padded = _BOS * (self.order - 1) + text + _EOS
+            for i in range(self.order - 1, len(padded)):
+                char = padded[i]
+                for k in range(self.order):
+                    context = padded[i - k:i]
+                    followers = self.counts[context]
+                    followers[char] = followers.get(char, 0) + 1
+        
+        self._refresh()
+        return self
+    
+    def _refresh(self):
+        # 문맥별 (전체 빈도, 서로 다른 다음 글자 수)를 미리 계산
+        self._totals = {
+            context: (sum(followers.values()), len(followers))
+            for context, followers in self.counts.items()
+        }
+        # 미등록 글자 하나를 포함한 어휘 크기
+        self.vocab_size = len(self.counts.get('', {})) + 1
+    
+    def _char_probability(self, history: str, char: str) -> float:
+        probability = 1.0 / self.vocab_size
+        for k in range(min(len(history), self.order - 1) + 1):
+            context = history[len(history) - k:] if k else ''
+            total, types = self._totals.get(context, (0, 0))
+            if total == 0:
+                break
+            count = self.counts[context].get(char, 0)
+            probability = (count + types * probability) / (total + types)
+        return probability
+    
+    def log_perplexity(self, text: str) -> float:
+        """전처리한 텍스트의 글자당 평균 negative log-likelihood (빈 텍스트는 inf)"""
+        text = preprocess_text(text) if text else ''
+        if not text:
+            return float('inf')
+        
+        padded = _BOS * (self.order - 1) + text + _EOS
+        nll = 0.0
+        for i in range(self.order - 1, len(padded)):
+            nll -= math.log(self._char_probability(padded[i - self.order + 1:i], padded[i]))
+        return nll / (len(padded) - self.order + 1)
+    
+    def estimate_perplexity(self, text: str) -> float:
+        """보정을 적용한 kogpt2 척도의 perplexity 추정치"""
+        log_ppl = self.log_perplexity(text)
+        if not math.isfinite(log_ppl):
+            return float('inf')
+        slope, intercept = self.calibration
+        return math.exp(slope * log_ppl + intercept)
+    
+    def calibrate(self, sentences: List[str], perplexities: List[float]) -> Dict[str, float]:
+        """kogpt2 perplexity에 맞춰 선형 보정 계수 추정
+        
+        Args:
+            sentences: 보정용 문장 (학습에 쓰지 않은 문장 권장)
+            perplexities: 같은 문장들의 kogpt2 perplexity
+        """
+        pairs = [
+            (self.log_perplexity(s), math.log(p))
+            for s, p in zip(sentences, perplexities) if math.isfinite(p) and p > 0
+        ]
+        pairs = [(x, y) for x, y in pairs if math.isfinite(x)]
+        if len(pairs) < 2:
+            raise ValueError("At least two scored sentences are required for calibration")
+        
+        n = len(pairs)
+        mean_x = sum(x for x, _ in pairs) / n
+        mean_y = sum(y for _, y in pairs) / n
+        var_x = sum((x - mean_x) ** 2 for x, _ in pairs)
+        cov = sum((x - mean_x) * (y - mean_y) for x, y in pairs)
+        slope = cov / var_x if var_x > 0 else 0.0
+        intercept = mean_y - slope * mean_x
+        
+        self.calibration = (slope, intercept)
+        self.residual_std = math.sqrt(sum((y - slope * x - intercept) ** 2 for x, y in pairs) / n)
+        return {'slope': slope, 'intercept': intercept, 'residual_std': self.residual_std, 'sentences': n}
+    
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'order': self.order,
+                'calibration': list(self.calibration),
+                'residual_std': self.residual_std,
+                'counts': self.counts,
+            }, f, ensure_ascii=False)
+    
+    @classmethod
+    def load(cls, path: str) -> 'CharNgramModel':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        model = cls(order=data['order'])
+        model.counts = defaultdict(dict, data['counts'])
+        model.calibration = tuple(data['calibration'])
+        model.residual_std = data.get('residual_std')
+        model._refresh()
+        return model
+
+
+def needs_escalation(estimate: float, threshold: float, band: float) -> bool:
+    """추정치가 임계값 주변 구간(log 척도 ±band)에 있어 kogpt2 점수화가 필요한지"""
+    if not math.isfinite(estimate) or estimate <= 0:
+        return True
+    return abs(math.log(estimate / threshold)) <= band
+
+
+def compare_cascade(analyzer: 'PerplexityAnalyzer', prefilter: CharNgramModel,
+                    sentences: List[str], bands: List[float], max_flips: int = 20) -> Dict:
+    """전체 kogpt2 점수화 대비 구간별 캐스케이드 결과의 분류 일치율과 1단계 처리 비율 측정"""
+    start = time.perf_counter()
+    reference = analyzer.calculate_perplexities(sentences)
+    model_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    estimates = [prefilter.estimate_perplexity(s) for s in sentences]
+    prefilter_seconds = time.perf_counter() - start
+    
+    threshold = analyzer.perplexity_threshold
+    scored = [i for i, p in enumerate(reference) if math.isfinite(p)]
+    if not scored:
+        raise ValueError("No sentences could be scored by the model")
+    
+    reports = []
+    for band in bands:
+        settled = [i for i in scored if not needs_escalation(estimates[i], threshold, band)]
+        flips = [
+            i for i in settled
+            if (estimates[i] <= threshold) != (reference[i] <= threshold)
+        ]
+        # 넘어간 문장은 kogpt2 값을 그대로 사용하므로 불일치는 1단계 결정에서만 생김
+        reports.append({
+            'band': band,
+            'perplexity_range': [threshold * math.exp(-band), threshold * math.exp(band)],
+            'prefilter_ratio': len(settled) / len(scored),
+            'classification_agreement': 1.0 - len(flips) / len(scored),
+            'prefilter_agreement': 1.0 - len(flips) / len(settled) if settled else None,
+            'flip_count': len(flips),
+            'flipped_sentences': [
+                {'text': sentences[i], 'estimate': estimates[i], 'perplexity': reference[i]}
+                for i in flips[:max_flips]
+            ],
+            # 1단계 비용 + 넘어간 문장의 kogpt2 비용 추정
+            'estimated_seconds': prefilter_seconds
+                + model_seconds * (1 - len(settled) / len(scored)),
+        })
+    
+    return {
+        'sentences': len(sentences),
+        'compared_sentences': len(scored),
+        'model_seconds': model_seconds,
+        'prefilter_seconds': prefilter_seconds,
+        'bands': reports,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Character n-gram pre-filter for cascaded scoring")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    train = subparsers.add_parser('train', help="Train the n-gram model and calibrate it against the model")
+    train.add_argument('--corpus', required=True, help="Training corpus (one document per line)")
+    train.add_argument('--output', required=True, help="Where to write the pre-filter JSON")
+    train.add_argument('--order', type=int, default=4, help="n-gram order")
+    train.add_argument('--calibration-size', type=int, default=2000,
+                       help="Held-out sentences scored by the model for calibration")
+    train.add_argument('--model', default='kogpt2', help="Model name")
+    train.add_argument('--model-path', help="Local model directory")
+    train.add_argument('--seed', type=int, default=0)
+    
+    agreement = subparsers.add_parser('agreement', help="Measure agreement against full model scoring")
+    agreement.add_argument('--corpus', required=True, help="Held-out corpus (one document per line)")
+    agreement.add_argument('--prefilter', required=True, help="Pre-filter JSON from 'train'")
+    agreement.add_argument('--bands', type=float, nargs='+', default=[0.2, 0.4, 0.6],
+                           help="Escalation bands (log-perplexity distance from the threshold)")
+    agreement.add_argument('--model', default='kogpt2', help="Model name")
+    agreement.add_argument('--model-path', help="Local model directory")
+    agreement.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+    
+    from .analyzer import PerplexityAnalyzer
+    
+    sentences = load_corpus_sentences(args.corpus)
+    logger.info(f"Loaded {len(sentences)} sentences")
+    # 캐시는 측정을 왜곡하므로 사용하지 않음
+    analyzer = PerplexityAnalyzer(model_name=args.model, model_path=args.model_path, cache_size=0)
+    
+    if args.command == 'train':
+        random.Random(args.seed).shuffle(sentences)
+        held_out = sentences[:args.calibration_size]
+        model = CharNgramModel(order=args.order).fit(sentences[args.calibration_size:])
+        report = model.calibrate(held_out, analyzer.calculate_perplexities(held_out))
+        model.save(args.output)
+        logger.info(f"Saved pre-filter to {args.output}")
+        print(json.dumps(report, indent=2))
+        return
+    
+    report = compare_cascade(analyzer, CharNgramModel.load(args.prefilter), sentences, args.bands)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
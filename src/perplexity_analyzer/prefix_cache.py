@@ -0,0 +1,254 @@
+"""문장 앞부분(prefix)의 past-key-values를 재사용하는 토큰 ID trie
+
+이력서 문장은 "저는", "이를 통해", "입사 후에는"처럼 같은 표현으로 시작하는 경우가 많다.
+causal LM에서 앞 토큰들의 attention 상태(past-key-values)와 그 토큰들의 NLL은 뒤에
+오는 토큰과 무관하므로, 여러 문장에서 반복된 prefix의 값을 저장해 두면 새 문장은
+가장 긴 캐시 prefix 이후의 토큰만 forward 하면 된다.
+
+trie는 점수화한 문장의 앞 max_prefix_tokens개 토큰 경로마다 등장 횟수를 센다.
+두 번 이상 등장한 prefix만 past-key-values를 저장(materialize)하므로 한 번만
+나오는 문장 앞부분이 메모리를 차지하지 않는다. 저장한 값은 메모리 예산을 넘으면
+가장 오래 사용하지 않은 것부터 제거한다.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class _Node:
+    __slots__ = ('children', 'count', 'entry')
+    
+    def __init__(self):
+        self.children: Dict[int, '_Node'] = {}
+        self.count = 0
+        # 이 노드를 지나는 (prefix가 이 노드까지의 토큰을 포함하는) 저장 항목 중 하나
+        self.entry: Optional['PrefixEntry'] = None
+
+
+class PrefixEntry:
+    """저장된 prefix 하나의 토큰, 층별 past-key-values와 토큰별 NLL"""
+    
+    __slots__ = ('tokens', 'layers', 'nll', 'nbytes')
+    
+    def __init__(self, tokens: Tuple[int, ...], layers: List[Tuple[torch.Tensor, torch.Tensor]],
+                 nll: torch.Tensor):
+        """
+        Args:
+            tokens: prefix 토큰 ID
+            layers: 층별 (key, value), 각 (heads, len(tokens), head_dim)
+            nll: 토큰 1..len(tokens)-1의 NLL (len(tokens) - 1,)
+        """
+        self.tokens = tokens
+        self.layers = layers
+        self.nll = nll
+        self.nbytes = nll.numel() * nll.element_size() + sum(
+            key.numel() * key.element_size() + value.numel() * value.element_size() for key, value in layers
+        )
+    
+    def past_key_values(self, length: int, batch_size: int):
+        """앞 length개 위치의 past-key-values를 배치 크기만큼 복제한 캐시 객체"""
+        return make_cache([
+            (key[None, :, :length].expand(batch_size, -1, -1, -1),
+             value[None, :, :length].expand(batch_size, -1, -1, -1))
+            for key, value in self.layers
+        ])
+
+
+def layer_tensors(past_key_values) -> List[Tuple[torch.Tensor, torch.Tensor]]:
+    """transformers 버전별 past-key-values 형식에서 층별 (key, value) 추출"""
+    if hasattr(past_key_values, 'layers'):
+        return [(layer.keys, layer.values) for layer in past_key_values.layers]
+    if hasattr(past_key_values, 'key_cache'):
+        return list(zip(past_key_values.key_cache, past_key_values.value_cache))
+    return [(key, value) for key, value in past_key_values]
+
+
+def make_cache(layers: List[Tuple[torch.Tensor, torch.Tensor]]):
+    """층별 (key, value)로 모델에 넘길 past-key-values 캐시 생성"""
+    from transformers import DynamicCache
+    
+    if hasattr(DynamicCache, 'from_legacy_cache'):
+        return DynamicCache.from_legacy_cache(tuple(layers))
+    return DynamicCache(layers)
+
+
+class PrefixCache:
+    """메모리 예산 내에서 반복되는 문장 prefix의 past-key-values를 보관하는 trie
+    
+    추론 스레드에서 사용하며, 통계 조회를 위해 잠금으로 보호한다.
+    """
+    
+    def __init__(self, max_bytes: int, max_prefix_tokens: int = 16, min_prefix_tokens: int = 4,
+                 max_nodes: int = 200000):
+        """
+        Args:
+            max_bytes: 저장한 past-key-values의 최대 메모리 (바이트)
+            max_prefix_tokens: 저장할 prefix의 최대 토큰 수
+            min_prefix_tokens: 재사용할 최소 prefix 토큰 수 (짧은 prefix는 이득보다 배치 분할 비용이 큼)
+            max_nodes: 등장 횟수를 세는 trie 노드 수 상한 (넘으면 한 번만 나온 경로부터 정리)
+        """
+        if min_prefix_tokens < 2:
+            raise ValueError(f"min_prefix_tokens must be >= 2: {min_prefix_tokens}")
+        self.max_bytes = max_bytes
+        self.max_prefix_tokens = max_prefix_tokens
+        self.min_prefix_tokens = min_prefix_tokens
+        self.max_nodes = max_nodes
+        
+        self._root = _Node()
+        self._nodes = 0
+        self._entries: 'OrderedDict[Tuple[int, ...], PrefixEntry]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'lookups': 0,
+            'hits': 0,
+            # 조회한 문장들의 전체 토큰 수와 forward 하지 않은 토큰 수
+            'lookup_tokens': 0,
+            'reused_tokens': 0,
+            'insertions': 0,
+            'evictions': 0,
+        }
+    
+    def observe(self, ids: Sequence[int]) -> int:
+        """문장의 prefix 경로 등장 횟수를 세고, 저장이 필요한 공유 prefix 길이 반환
+        
+        Returns:
+            두 번 이상 등장했지만 아직 저장되지 않은 가장 긴 prefix의 토큰 수 (없으면 0)
+        """
+        with self._lock:
+            node = self._root
+            shared = 0
+            covered = False
+            for depth, token in enumerate(ids[:self.max_prefix_tokens], start=1):
+                child = node.children.get(token)
+                if child is None:
+                    child = node.children[token] = _Node()
+                    self._nodes += 1
+                child.count += 1
+                node = child
+                if child.count >= 2:
+                    shared = depth
+                    covered = child.entry is not None
+            
+            if self._nodes > self.max_nodes:
+                self._prune()
+            if shared < self.min_prefix_tokens or covered:
+                return 0
+            return shared
+    
+    def lookup(self, ids: Sequence[int]) -> Tuple[int, Optional[PrefixEntry]]:
+        """문장과 앞부분이 가장 길게 일치하는 저장 항목
+        
+        Returns:
+            (일치 토큰 수, 항목) - 재사용할 수 없으면 (0, None)
+        """
+        with self._lock:
+            node = self._root
+            depth = 0
+            entry = None
+            for d, token in enumerate(ids[:self.max_prefix_tokens], start=1):
+                node = node.children.get(token)
+                if node is None or node.entry is None:
+                    break
+                depth, entry = d, node.entry
+            
+            self._stats['lookups'] += 1
+            self._stats['lookup_tokens'] += len(ids)
+            if entry is None or depth < self.min_prefix_tokens:
+                return 0, None
+            
+            self._entries.move_to_end(entry.tokens)
+            self._stats['hits'] += 1
+            # 일치한 마지막 토큰은 다음 토큰 예측을 위해 다시 forward
+            self._stats['reused_tokens'] += depth - 1
+            return depth, entry
+    
+    def insert(self, tokens: Sequence[int], layers: List[Tuple[torch.Tensor, torch.Tensor]],
+               nll: torch.Tensor):
+        """prefix 하나의 past-key-values 저장 (배치 텐서의 일부라면 복사해 원래 배치를 해제)"""
+        tokens = tuple(tokens)
+        entry = PrefixEntry(
+            tokens,
+            [(key.detach().clone(), value.detach().clone()) for key, value in layers],
+            nll.detach().float().clone()
+        )
+        if entry.nbytes > self.max_bytes:
+            return
+        
+        with self._lock:
+            if tokens in self._entries:
+                return
+            node = self._root
+            for token in tokens:
+                child = node.children.get(token)
+                if child is None:
+                    child = node.children[token] = _Node()
+                    self._nodes += 1
+                child.entry = entry
+                node = child
+            
+            self._entries[tokens] = entry
+            self._bytes += entry.nbytes
+            self._stats['insertions'] += 1
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._detach(evicted)
+                self._stats['evictions'] += 1
+    
+    def _detach(self, entry: PrefixEntry):
+        """제거한 항목을 가리키던 노드들을 같은 경로의 다른 항목으로 바꿈"""
+        self._bytes -= entry.nbytes
+        path = []
+        node = self._root
+        for token in entry.tokens:
+            node = node.children.get(token)
+            if node is None:
+                break
+            path.append(node)
+        
+        # 깊은 노드부터 갱신해야 부모가 자식의 새 항목을 물려받음
+        for node in reversed(path):
+            if node.entry is entry:
+                node.entry = next(
+                    (child.entry for child in node.children.values() if child.entry is not None), None
+                )
+    
+    def _prune(self):
+        """한 번만 나온 저장되지 않은 경로를 정리하고, 그래도 많으면 등장 횟수를 절반으로 줄임"""
+        while self._nodes > self.max_nodes // 2:
+            self._nodes = self._prune_children(self._root)
+            if self._nodes <= self.max_nodes // 2:
+                break
+            self._halve_counts(self._root)
+    
+    def _prune_children(self, node: _Node) -> int:
+        remaining = 0
+        for token in list(node.children):
+            child = node.children[token]
+            if child.count < 2 and child.entry is None:
+                # 저장 항목은 조상 노드에도 연결되므로 이 아래에는 항목이 없음
+                del node.children[token]
+            else:
+                remaining += 1 + self._prune_children(child)
+        return remaining
+    
+    def _halve_counts(self, node: _Node):
+        for child in node.children.values():
+            child.count //= 2
+            self._halve_counts(child)
+    
+    def stats(self) -> Dict[str, int]:
+        """적중/재사용 토큰/제거 카운터와 메모리 사용량"""
+        with self._lock:
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'memory_bytes': self._bytes,
+                'nodes': self._nodes,
+            }
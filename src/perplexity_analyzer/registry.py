@@ -0,0 +1,211 @@
+import gc
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+from .utils import detect_script, setup_logger
+
+if TYPE_CHECKING:
+    from .analyzer import PerplexityAnalyzer
+
+logger = setup_logger(__name__)
+
+# 모델별 AI 생성 의심 perplexity 임계값 (목록에 없는 모델은 기본값 사용)
+DEFAULT_PERPLEXITY_THRESHOLD = 28.0
+MODEL_THRESHOLDS = {
+    'kogpt2': 28.0,
+    # 영문 GPT-2는 같은 문장에 대해 kogpt2보다 perplexity가 높게 나오는 편 (보정 전 출발값)
+    'gpt2': 35.0,
+}
+
+SCRIPTS = ('hangul', 'latin')
+
+
+def default_threshold(model_name: str) -> float:
+    return MODEL_THRESHOLDS.get(model_name, DEFAULT_PERPLEXITY_THRESHOLD)
+
+
+@dataclass
+class ModelSpec:
+    """레지스트리에 등록할 모델 하나의 설정"""
+    name: str
+    # 허깅페이스 경로 대신 사용할 로컬 모델 디렉터리
+    model_path: Optional[str] = None
+    # None이면 MODEL_THRESHOLDS 또는 기본값
+    perplexity_threshold: Optional[float] = None
+    # 자동 선택시 이 모델을 사용할 문자 체계 ('hangul', 'latin')
+    scripts: Tuple[str, ...] = ()
+
+
+def _parse_pairs(value: Optional[str]) -> Dict[str, str]:
+    pairs = {}
+    for item in (value or '').split(','):
+        if item.strip():
+            key, _, val = item.partition('=')
+            pairs[key.strip()] = val.strip()
+    return pairs
+
+
+def parse_model_specs(models: str, thresholds: Optional[str] = None,
+                      paths: Optional[str] = None) -> List[ModelSpec]:
+    """환경변수 형식의 모델 목록 파싱
+    
+    Args:
+        models: 'kogpt2:hangul,gpt2:latin' 형식. 문자 체계는 '+'로 여러 개 지정 가능
+        thresholds: 'kogpt2=28,gpt2=35' 형식의 모델별 임계값
+        paths: 'gpt2=/models/gpt2' 형식의 모델별 로컬 디렉터리
+    """
+    threshold_map = {k: float(v) for k, v in _parse_pairs(thresholds).items()}
+    path_map = _parse_pairs(paths)
+    
+    specs = []
+    for item in models.split(','):
+        if not item.strip():
+            continue
+        name, _, scripts = item.strip().partition(':')
+        script_list = tuple(s for s in scripts.split('+') if s)
+        for script in script_list:
+            if script not in SCRIPTS:
+                raise ValueError(f"Unsupported script for {name}: {script}")
+        specs.append(ModelSpec(
+            name=name,
+            model_path=path_map.get(name),
+            perplexity_threshold=threshold_map.get(name),
+            scripts=script_list
+        ))
+    if not specs:
+        raise ValueError("At least one model must be configured")
+    return specs
+
+
+class ModelRegistry:
+    """여러 언어 모델의 분석기를 필요할 때 로드하고 메모리 예산 안에서 LRU로 제거하는 레지스트리
+    
+    요청은 모델명을 지정하거나, 텍스트의 주된 문자 체계로 모델을 자동 선택한다.
+    로드된 모델 가중치 크기의 합이 memory_budget_mb를 넘으면 가장 오래 사용하지
+    않은 모델부터 제거하므로, 워커마다 모든 모델을 항상 올려둘 필요가 없다.
+    """
+    
+    def __init__(self, specs: List[ModelSpec], loader: Callable[[ModelSpec], 'PerplexityAnalyzer'],
+                 default: Optional[str] = None, memory_budget_mb: float = 0):
+        """
+        Args:
+            specs: 사용할 수 있는 모델 목록
+            loader: 모델 설정으로 PerplexityAnalyzer를 만드는 함수
+            default: 자동 선택에 실패했을 때 사용할 모델 (기본: 첫 번째 모델)
+            memory_budget_mb: 로드된 모델 가중치 크기 합의 상한 (0이면 제한 없음)
+        """
+        self.specs = {spec.name: spec for spec in specs}
+        if default is not None and default not in self.specs:
+            raise ValueError(f"Unknown default model: {default}")
+        self.default = default or specs[0].name
+        self.loader = loader
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        
+        # 모델명 -> (분석기, 가중치 바이트 수), 가장 오래 사용하지 않은 것부터
+        self._loaded: 'OrderedDict[str, Tuple[PerplexityAnalyzer, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self.specs}
+        self._stats = {'loads': 0, 'evictions': 0}
+    
+    def resolve(self, name: Optional[str] = None, text: str = '') -> str:
+        """요청에 사용할 모델명 결정 (지정하지 않으면 문자 체계로 자동 선택)"""
+        if name:
+            if name not in self.specs:
+                raise ValueError(f"Unknown model: {name}")
+            return name
+        
+        script = detect_script(text)
+        if script is not None:
+            for spec in self.specs.values():
+                if script in spec.scripts:
+                    return spec.name
+        return self.default
+    
+    def get(self, name: str) -> 'PerplexityAnalyzer':
+        """모델의 분석기 반환 (로드되지 않았으면 로드한 뒤 예산을 넘는 모델 제거)"""
+        if name not in self.specs:
+            raise ValueError(f"Unknown model: {name}")
+        
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                return self._loaded[name][0]
+        
+        # 같은 모델을 동시에 두 번 로드하지 않도록 모델별로 직렬화
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self._loaded:
+                    return self._loaded[name][0]
+            logger.info(f"Loading model on demand: {name}")
+            analyzer = self.loader(self.specs[name])
+            self.put(name, analyzer)
+            with self._lock:
+                self._stats['loads'] += 1
+            return analyzer
+    
+    def put(self, name: str, analyzer: 'PerplexityAnalyzer'):
+        """이미 만든 분석기 등록 (preload한 기본 모델 등)"""
+        from .models import model_memory_bytes
+        
+        size = model_memory_bytes(analyzer.model)
+        with self._lock:
+            self._loaded[name] = (analyzer, size)
+            self._loaded.move_to_end(name)
+            evicted = self._evict(keep=name)
+        if evicted:
+            # 참조 순환에 묶인 가중치까지 바로 해제
+            gc.collect()
+    
+    def _evict(self, keep: str) -> List[str]:
+        """예산을 넘는 동안 가장 오래 사용하지 않은 모델 제거
+        
+        기본 모델은 전역 분석기, 배처, 작업 워커가 계속 참조하므로 제거해도 메모리가
+        해제되지 않고 다음 요청에서 사본을 다시 로드하게 되어 제거하지 않는다.
+        """
+        evicted = []
+        if self.memory_budget <= 0:
+            return evicted
+        pinned = {keep, self.default}
+        while sum(size for _, size in self._loaded.values()) > self.memory_budget:
+            name = next((n for n in self._loaded if n not in pinned), None)
+            if name is None:
+                break
+            # 진행 중인 요청이 참조하는 분석기는 요청이 끝난 뒤 해제됨
+            del self._loaded[name]
+            evicted.append(name)
+            self._stats['evictions'] += 1
+            logger.info(f"Evicted model {name} to stay within the memory budget")
+        return evicted
+    
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return list(self._loaded)
+    
+    def info(self) -> List[Dict]:
+        """등록된 모델별 설정과 로드 상태"""
+        with self._lock:
+            loaded = dict(self._loaded)
+        
+        models = []
+        for name, spec in self.specs.items():
+            analyzer, size = loaded.get(name, (None, 0))
+            if analyzer is not None:
+                threshold = analyzer.perplexity_threshold
+            else:
+                threshold = spec.perplexity_threshold
+                if threshold is None:
+                    threshold = default_threshold(name)
+            models.append({
+                'name': name,
+                'default': name == self.default,
+                'loaded': analyzer is not None,
+                'scripts': list(spec.scripts),
+                'perplexity_threshold': threshold,
+                'memory_mb': size / (1024 * 1024),
+            })
+        return models
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'loaded': len(self._loaded)}
@@ -0,0 +1,78 @@
+from typing import List
+
+
+def plan_micro_batches(lengths: List[int], max_batch_tokens: int, max_batch_size: int) -> List[List[int]]:
+    """시퀀스 길이에 따라 패딩 낭비가 적은 마이크로 배치 구성
+    
+    시퀀스를 길이순으로 정렬해 비슷한 길이끼리 묶고, 패딩을 포함한 배치 토큰 수
+    (가장 긴 시퀀스 길이 x 배치 크기)가 max_batch_tokens를 넘지 않도록 자른다.
+    예산보다 긴 시퀀스는 단독 배치가 된다.
+    
+    Args:
+        lengths: 각 시퀀스의 토큰 수
+        max_batch_tokens: 마이크로 배치당 최대 토큰 수 (패딩 포함)
+        max_batch_size: 마이크로 배치당 최대 시퀀스 수
+    
+    Returns:
+        마이크로 배치별 원래 인덱스 목록
+    """
+    if max_batch_tokens < 1 or max_batch_size < 1:
+        raise ValueError("max_batch_tokens and max_batch_size must be >= 1")
+    
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    
+    batches = []
+    current = []
+    current_max = 0
+    
+    for i in order:
+        padded_length = max(current_max, lengths[i])
+        if current and (
+            len(current) >= max_batch_size
+            or padded_length * (len(current) + 1) > max_batch_tokens
+        ):
+            batches.append(current)
+            current = []
+            padded_length = lengths[i]
+        
+        current.append(i)
+        current_max = padded_length
+    
+    if current:
+        batches.append(current)
+    
+    return batches
+
+
+def plan_packed_batches(lengths: List[int], row_length: int, max_batch_tokens: int) -> List[List[List[int]]]:
+    """짧은 시퀀스들을 row_length 길이의 행에 이어 붙이는 packing 계획
+    
+    긴 시퀀스부터 들어갈 자리가 있는 첫 행에 넣고(first-fit decreasing), 완성된
+    행들을 plan_micro_batches와 같은 방식으로 토큰 예산 내의 forward 배치로 묶는다.
+    row_length보다 긴 시퀀스는 단독 행이 된다.
+    
+    Args:
+        lengths: 각 시퀀스의 토큰 수
+        row_length: 한 행에 넣을 최대 토큰 수
+        max_batch_tokens: forward 배치당 최대 토큰 수 (패딩 포함)
+    
+    Returns:
+        forward 배치별 행 목록, 행은 원래 인덱스 목록
+    """
+    if row_length < 1:
+        raise ValueError(f"row_length must be >= 1: {row_length}")
+    
+    rows: List[List[int]] = []
+    row_tokens: List[int] = []
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True):
+        for r, used in enumerate(row_tokens):
+            if used + lengths[i] <= row_length:
+                rows[r].append(i)
+                row_tokens[r] += lengths[i]
+                break
+        else:
+            rows.append([i])
+            row_tokens.append(lengths[i])
+    
+    batches = plan_micro_batches(row_tokens, max_batch_tokens, max(1, len(rows)))
+    return [[rows[r] for r in batch] for batch in batches]
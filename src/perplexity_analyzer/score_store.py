@@ -0,0 +1,420 @@
+"""토큰별 negative log-likelihood 저장소와 추론 없는 재분류
+
+분류는 문장 perplexity와 임계값만으로 결정되므로, 모델이 계산한 토큰별 NLL을
+남겨 두면 임계값, confidence 곡선, 문장 점수 집계 방식이 바뀌어도 코퍼스 전체를
+다시 추론하지 않고 numpy 벡터 연산으로 분류, overall_stats, 권장사항을 다시 계산할 수 있다.
+
+저장소 디렉터리 (모두 이어 쓰기 전용, 리틀 엔디언):
+    meta.json        형식 버전과 점수화한 모델명
+    documents.jsonl  문서 ID (한 줄에 하나, 줄 번호가 문서 인덱스)
+    sentences.bin    문장 레코드 (SENTENCE_DTYPE)
+    tokens.f32       모든 문장의 토큰별 NLL을 문장 순서대로 이어 붙인 float32 배열
+
+sentences.bin과 tokens.f32는 np.memmap으로 읽는다. 모델로 점수화하지 않은 문장
+(prefilter 추정치, near-duplicate 재사용)은 토큰 없이 perplexity만 기록된다.
+
+사용법:
+    # 일괄 분석하면서 저장소 기록
+    python -m src.perplexity_analyzer.bulk resumes.jsonl --output scores.jsonl --score-store store/
+    # 새 임계값과 집계 방식으로 재분류
+    python -m src.perplexity_analyzer.score_store store/ --threshold 30 --aggregation median --output rescored.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .registry import default_threshold
+from .utils import CLASS_CODES, NATURAL_CONFIDENCE_SCALE, generate_recommendations, setup_logger
+
+logger = setup_logger(__name__)
+
+FORMAT_VERSION = 1
+
+META_FILE = 'meta.json'
+DOCUMENTS_FILE = 'documents.jsonl'
+SENTENCES_FILE = 'sentences.bin'
+TOKENS_FILE = 'tokens.f32'
+
+SENTENCE_DTYPE = np.dtype([
+    # documents.jsonl의 문서 인덱스 (기록 순서대로 증가)
+    ('document', '<i8'),
+    # 문서 내 문장 위치
+    ('position', '<i4'),
+    # STAGE_CODES 인덱스 ('model', 'prefilter', 'duplicate')
+    ('stage', 'i1'),
+    # 점수화 당시 perplexity (실패한 문장은 inf)
+    ('perplexity', '<f8'),
+    # tokens.f32에서 이 문장 토큰들의 시작 위치와 개수 (모델로 점수화하지 않았으면 0개)
+    ('token_offset', '<i8'),
+    ('token_count', '<i4'),
+])
+TOKEN_DTYPE = np.dtype('<f4')
+
+# 문장 점수 집계 방식 (토큰 NLL의 평균이 원래 perplexity)
+AGGREGATIONS = ('mean', 'median', 'max')
+
+_NATURAL, _AI_SUSPICIOUS, _ERROR = range(len(CLASS_CODES))
+
+
+def _read_meta(path: str) -> Dict:
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported score store version in {path}: {meta.get('version')}")
+    return meta
+
+
+class TokenScoreStore:
+    """문서 단위로 문장별 perplexity와 토큰별 NLL을 이어 쓰는 저장소
+    
+    한 프로세스에서만 쓴다 (bulk는 메인 프로세스가 입력 순서대로 기록).
+    기록 중에도 TokenScores로 읽을 수 있으며, 문서 ID 줄을 마지막에 쓰므로
+    읽는 쪽은 ID가 기록된 문서까지만 사용한다.
+    """
+    
+    def __init__(self, path: str, state: Optional[Dict] = None):
+        """
+        Args:
+            path: 저장소 디렉터리
+            state: 이전 state() 값. 주어지면 그 이후에 쓰인 내용을 잘라냄 ({}이면 비움)
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.meta = _read_meta(path)
+        
+        files = {
+            'documents': os.path.join(path, DOCUMENTS_FILE),
+            'sentences': os.path.join(path, SENTENCES_FILE),
+            'tokens': os.path.join(path, TOKENS_FILE),
+        }
+        if state is not None:
+            for name, file_path in files.items():
+                if os.path.exists(file_path):
+                    with open(file_path, 'r+b') as f:
+                        f.truncate(state.get(name, 0))
+        
+        self._documents = open(files['documents'], 'ab')
+        self._sentences = open(files['sentences'], 'ab')
+        self._tokens = open(files['tokens'], 'ab')
+        
+        if state is not None and 'num_documents' in state:
+            self.num_documents = state['num_documents']
+        else:
+            with open(files['documents'], 'rb') as f:
+                self.num_documents = sum(1 for _ in f)
+        self.num_tokens = self._tokens.tell() // TOKEN_DTYPE.itemsize
+    
+    def append(self, doc_id: str, model: str, perplexities: Sequence[float], stages: Sequence[int],
+               token_nll: Sequence[Optional[List[float]]]):
+        """문서 하나의 문장별 점수 기록 (analyze_batch(token_scores=True)의 token_scores 값)"""
+        if self.meta.get('model') is None:
+            self.meta = {'version': FORMAT_VERSION, 'model': model}
+            with open(os.path.join(self.path, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(self.meta, f)
+        elif self.meta['model'] != model:
+            raise ValueError(f"Score store {self.path} holds {self.meta['model']} scores, not {model}")
+        
+        counts = np.array([len(nll) if nll else 0 for nll in token_nll], dtype=np.int64)
+        records = np.zeros(len(perplexities), dtype=SENTENCE_DTYPE)
+        records['document'] = self.num_documents
+        records['position'] = np.arange(len(perplexities))
+        records['stage'] = stages
+        records['perplexity'] = perplexities
+        records['token_offset'] = self.num_tokens + np.cumsum(counts) - counts
+        records['token_count'] = counts
+        tokens = np.fromiter(
+            chain.from_iterable(nll for nll in token_nll if nll), dtype=TOKEN_DTYPE, count=int(counts.sum())
+        )
+        
+        # 파일마다 버퍼가 따로 비워지므로 토큰과 문장 레코드를 운영체제로 넘긴 뒤 문서 ID를
+        # 기록한다. 같은 호스트에서 읽는 쪽은 ID가 보이는 문서의 레코드를 모두 읽을 수 있다
+        # (fsync는 하지 않으므로 장애 후에는 flush()한 뒤의 state() 크기까지만 유효).
+        self._tokens.write(tokens.tobytes())
+        self._sentences.write(records.tobytes())
+        self._tokens.flush()
+        self._sentences.flush()
+        self._documents.write(json.dumps(doc_id, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._documents.flush()
+        self.num_documents += 1
+        self.num_tokens += len(tokens)
+    
+    def flush(self):
+        for f in (self._tokens, self._sentences, self._documents):
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def state(self) -> Dict:
+        """체크포인트에 저장할 파일별 크기 (flush 후 호출)"""
+        return {
+            'documents': self._documents.tell(),
+            'sentences': self._sentences.tell(),
+            'tokens': self._tokens.tell(),
+            'num_documents': self.num_documents,
+        }
+    
+    def close(self):
+        for f in (self._tokens, self._sentences, self._documents):
+            f.close()
+
+
+def _memmap(path: str, dtype: np.dtype) -> np.ndarray:
+    count = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+
+def classify_perplexities(perplexities: np.ndarray, threshold: float,
+                          natural_scale: float = NATURAL_CONFIDENCE_SCALE) -> tuple:
+    """PerplexityAnalyzer.classify_sentence의 벡터 버전
+    
+    Returns:
+        (classes, confidences) - classes는 CLASS_CODES 인덱스
+    """
+    with np.errstate(invalid='ignore'):
+        ai = perplexities <= threshold
+        errors = ~np.isfinite(perplexities)
+        confidences = np.where(
+            ai,
+            np.clip((threshold - perplexities) / threshold, 0.0, 1.0),
+            np.minimum(1.0, (perplexities - threshold) / natural_scale)
+        )
+    classes = np.full(len(perplexities), _NATURAL, dtype=np.int8)
+    classes[ai] = _AI_SUSPICIOUS
+    classes[errors] = _ERROR
+    confidences[errors] = 0.0
+    return classes, confidences
+
+
+class TokenScores:
+    """저장소의 읽기 전용 memmap 뷰와 벡터화된 재분류"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.meta = _read_meta(path)
+        self._signature = self._file_sizes()
+        
+        doc_ids = []
+        documents_path = os.path.join(path, DOCUMENTS_FILE)
+        if os.path.exists(documents_path):
+            with open(documents_path, encoding='utf-8') as f:
+                # 기록 중인 마지막 줄은 무시
+                doc_ids = [json.loads(line) for line in f if line.endswith('\n')]
+        self.doc_ids = doc_ids
+        
+        sentences = _memmap(os.path.join(path, SENTENCES_FILE), SENTENCE_DTYPE)
+        self.documents = np.asarray(sentences['document'])
+        # ID가 기록되지 않은 문서의 문장은 제외
+        cut = int(np.searchsorted(self.documents, len(doc_ids)))
+        self.sentences = sentences[:cut]
+        self.documents = self.documents[:cut]
+        self.tokens = _memmap(os.path.join(path, TOKENS_FILE), TOKEN_DTYPE)
+    
+    def _file_sizes(self) -> tuple:
+        return tuple(
+            os.path.getsize(os.path.join(self.path, name)) if os.path.exists(os.path.join(self.path, name)) else 0
+            for name in (DOCUMENTS_FILE, SENTENCES_FILE, TOKENS_FILE)
+        )
+    
+    def is_stale(self) -> bool:
+        """불러온 뒤 저장소에 새 문서가 기록되었는지"""
+        return self._file_sizes() != self._signature
+    
+    @property
+    def model(self) -> Optional[str]:
+        return self.meta.get('model')
+    
+    def sentence_perplexities(self, aggregation: str = 'mean') -> np.ndarray:
+        """토큰 NLL을 집계한 문장별 perplexity
+        
+        'mean'은 점수화 당시의 perplexity, 'median'과 'max'는 문장 토큰 NLL의 중앙값과
+        최대값의 지수다. 토큰이 없는 문장은 집계 방식과 관계없이 기록된 perplexity를 쓴다.
+        """
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation: {aggregation}")
+        perplexities = np.array(self.sentences['perplexity'], dtype=np.float64)
+        if aggregation == 'mean':
+            return perplexities
+        
+        counts = np.asarray(self.sentences['token_count'], dtype=np.int64)
+        scored = np.flatnonzero(counts > 0)
+        if len(scored) == 0:
+            return perplexities
+        counts = counts[scored]
+        offsets = np.asarray(self.sentences['token_offset'])[scored]
+        # 토큰이 있는 문장들의 구간은 문장 순서대로 빈틈없이 이어져 있음
+        base = offsets[0]
+        tokens = np.asarray(self.tokens[base:offsets[-1] + counts[-1]])
+        starts = offsets - base
+        
+        if aggregation == 'max':
+            values = np.maximum.reduceat(tokens, starts)
+        else:
+            # NLL은 0 이상이므로 float32 비트 패턴의 정수 순서가 값의 순서와 같다.
+            # (문장 번호, 비트 패턴)을 uint64 하나로 합쳐 한 번 정렬하면 문장 안에서 정렬됨
+            segments = np.repeat(np.arange(len(scored), dtype=np.uint64), counts)
+            keys = (segments << np.uint64(32)) | np.maximum(tokens, 0).view(np.uint32).astype(np.uint64)
+            keys.sort()
+            tokens = (keys & np.uint64(0xFFFFFFFF)).astype(np.uint32).view(np.float32)
+            values = (tokens[starts + (counts - 1) // 2].astype(np.float64)
+                      + tokens[starts + counts // 2].astype(np.float64)) / 2
+        
+        perplexities[scored] = np.exp(values.astype(np.float64))
+        return perplexities
+    
+    def rescore(self, threshold: Optional[float] = None,
+                natural_scale: float = NATURAL_CONFIDENCE_SCALE,
+                aggregation: str = 'mean') -> Dict:
+        """새 파라미터로 전체 문장을 재분류하고 문서별 통계 계산
+        
+        Args:
+            threshold: 이 값 이하면 AI 생성 의심 (기본값은 저장된 모델의 기본 임계값)
+            natural_scale: 자연스러운 문장의 confidence가 1이 되는 임계값 대비 perplexity 차이
+            aggregation: 문장 점수 집계 방식 (AGGREGATIONS)
+        
+        Returns:
+            문장별 배열 (perplexities, classes, confidences)과 문서별 배열 (total,
+            ai_suspicious, errors, ai_ratio), 사용한 파라미터
+        """
+        if threshold is None:
+            threshold = default_threshold(self.model)
+        if threshold <= 0 or natural_scale <= 0:
+            raise ValueError("threshold and natural_scale must be > 0")
+        
+        perplexities = self.sentence_perplexities(aggregation)
+        classes, confidences = classify_perplexities(perplexities, threshold, natural_scale)
+        
+        num_documents = len(self.doc_ids)
+        total = np.bincount(self.documents, minlength=num_documents)
+        ai_suspicious = np.bincount(self.documents[classes == _AI_SUSPICIOUS], minlength=num_documents)
+        errors = np.bincount(self.documents[classes == _ERROR], minlength=num_documents)
+        ai_ratio = np.divide(ai_suspicious, total, out=np.zeros(num_documents), where=total > 0)
+        
+        return {
+            'threshold': threshold,
+            'natural_scale': natural_scale,
+            'aggregation': aggregation,
+            'perplexities': perplexities,
+            'classes': classes,
+            'confidences': confidences,
+            'total': total,
+            'ai_suspicious': ai_suspicious,
+            'errors': errors,
+            'ai_ratio': ai_ratio,
+        }
+    
+    def summary(self, rescored: Dict) -> Dict:
+        """코퍼스 전체 통계와 권장사항 구간별 문서 수"""
+        classes = rescored['classes']
+        ai_ratio = rescored['ai_ratio']
+        total_count = len(classes)
+        ai_count = int(np.count_nonzero(classes == _AI_SUSPICIOUS))
+        error_count = int(np.count_nonzero(classes == _ERROR))
+        has_sentences = rescored['total'] > 0
+        return {
+            'model': self.model,
+            'threshold': rescored['threshold'],
+            'natural_scale': rescored['natural_scale'],
+            'aggregation': rescored['aggregation'],
+            'documents': len(self.doc_ids),
+            'total_sentences': total_count,
+            'ai_suspicious_count': ai_count,
+            'natural_count': total_count - ai_count - error_count,
+            'error_count': error_count,
+            'ai_ratio': ai_count / total_count if total_count > 0 else 0.0,
+            # generate_recommendations의 첫 권장사항 구간별 문서 수
+            'documents_over_half': int(np.count_nonzero(ai_ratio >= 0.5)),
+            'documents_over_30_percent': int(np.count_nonzero((ai_ratio >= 0.3) & (ai_ratio < 0.5))),
+            'documents_partial': int(np.count_nonzero((ai_ratio > 0) & (ai_ratio < 0.3))),
+            'documents_clean': int(np.count_nonzero(has_sentences & (ai_ratio == 0))),
+        }
+    
+    def iter_documents(self, rescored: Dict, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """문서 인덱스 [start, stop)의 id, overall_stats, recommendations
+        
+        권장사항은 PerplexityAnalyzer 결과와 같은 규칙으로 만든다.
+        """
+        stop = len(self.doc_ids) if stop is None else min(stop, len(self.doc_ids))
+        if start >= stop:
+            return
+        
+        # 문서별 우선 수정 문장 (confidence > 0.8, confidence 내림차순, 같으면 앞 문장부터 최대 3개)
+        first, last = np.searchsorted(self.documents, [start, stop])
+        classes = rescored['classes'][first:last]
+        confidences = rescored['confidences'][first:last]
+        candidates = np.flatnonzero((classes == _AI_SUSPICIOUS) & (confidences > 0.8))
+        documents = self.documents[first:last][candidates]
+        positions = np.asarray(self.sentences['position'][first:last])[candidates]
+        order = np.lexsort((positions, -confidences[candidates], documents))
+        high_priority = {}
+        for document, position, confidence in zip(
+            documents[order].tolist(), positions[order].tolist(), confidences[candidates][order].tolist()
+        ):
+            priority = high_priority.setdefault(document, [])
+            if len(priority) < 3:
+                priority.append((position, confidence))
+        
+        total = rescored['total']
+        ai_suspicious = rescored['ai_suspicious']
+        errors = rescored['errors']
+        ai_ratio = rescored['ai_ratio']
+        for document in range(start, stop):
+            total_count = int(total[document])
+            ai_count = int(ai_suspicious[document])
+            error_count = int(errors[document])
+            ratio = float(ai_ratio[document])
+            yield {
+                'id': self.doc_ids[document],
+                'overall_stats': {
+                    'total_sentences': total_count,
+                    'ai_suspicious_count': ai_count,
+                    'natural_count': total_count - ai_count - error_count,
+                    'error_count': error_count,
+                    'ai_ratio': ratio
+                },
+                'recommendations': generate_recommendations(high_priority.get(document, []), ratio)
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-classify a token score store without re-running the model")
+    parser.add_argument("store", help="Score store directory written by bulk --score-store")
+    parser.add_argument("--threshold", type=float, help="Perplexity threshold (default: the model's threshold)")
+    parser.add_argument("--natural-scale", type=float, default=NATURAL_CONFIDENCE_SCALE,
+                        help="Perplexity distance above the threshold at which natural confidence reaches 1")
+    parser.add_argument("--aggregation", default="mean", choices=AGGREGATIONS,
+                        help="How token NLLs are aggregated into a sentence score")
+    parser.add_argument("--output", help="Write per-document stats and recommendations as JSONL")
+    args = parser.parse_args(argv)
+    
+    start_time = time.perf_counter()
+    scores = TokenScores(args.store)
+    rescored = scores.rescore(args.threshold, args.natural_scale, args.aggregation)
+    summary = scores.summary(rescored)
+    summary['rescore_seconds'] = time.perf_counter() - start_time
+    logger.info(
+        f"Re-classified {summary['total_sentences']} sentences in {summary['documents']} documents "
+        f"in {summary['rescore_seconds']:.2f}s"
+    )
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for document in scores.iter_documents(rescored):
+                f.write(json.dumps(document, ensure_ascii=False) + '\n')
+        logger.info(f"Wrote per-document results to {args.output}")
+    
+    json.dump(summary, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
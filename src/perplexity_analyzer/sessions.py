@@ -0,0 +1,118 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class DocumentSession:
+    """문서 하나의 마지막 리비전 점수"""
+    sentences: List[str]
+    perplexities: List[float]
+    stages: List[str]
+    # 점수를 계산한 모델 (다른 모델로 분석하면 점수를 재사용하지 않음)
+    model: Optional[str] = None
+    revision: int = 0
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+class DocumentSessionStore:
+    """편집 중인 문서의 문장별 점수를 보관해 변경된 문장만 다시 점수화하도록 돕는 저장소
+    
+    sentence 모드의 perplexity는 문장 내용에만 의존하므로, 이전 리비전과 내용이
+    같은 문장은 위치가 바뀌어도 점수를 그대로 재사용한다. 세션 수는 LRU로 제한하고
+    ttl_seconds 동안 갱신되지 않은 세션은 만료된다.
+    """
+    
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600.0):
+        if max_sessions < 1:
+            raise ValueError(f"max_sessions must be >= 1: {max_sessions}")
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        
+        self._sessions: 'OrderedDict[str, DocumentSession]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'reused_sentences': 0, 'rescored_sentences': 0, 'evictions': 0, 'expirations': 0}
+    
+    def _expire(self, now: float):
+        # 가장 오래 갱신되지 않은 세션부터 순서대로 확인
+        while self._sessions:
+            doc_id, session = next(iter(self._sessions.items()))
+            if now - session.updated_at < self.ttl_seconds:
+                break
+            del self._sessions[doc_id]
+            self._stats['expirations'] += 1
+    
+    def get(self, doc_id: str) -> Optional[DocumentSession]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._sessions.get(doc_id)
+    
+    def diff(self, doc_id: str, sentences: List[str],
+             model: Optional[str] = None) -> Tuple[List[float], List[str], List[int]]:
+        """새 리비전의 문장들을 이전 리비전과 비교
+        
+        Returns:
+            (perplexities, stages, changed) - 이전 리비전에 같은 문장이 있으면 그 점수와
+            단계를 채우고, 새로 점수화해야 할 문장의 인덱스를 changed로 반환
+        """
+        session = self.get(doc_id)
+        previous: Dict[str, Tuple[float, str]] = {}
+        if session is not None and session.model == model:
+            # 점수화에 실패했던 문장은 다시 시도
+            previous = {
+                s: (p, stage) for s, p, stage in zip(session.sentences, session.perplexities, session.stages)
+                if math.isfinite(p)
+            }
+        
+        perplexities = []
+        stages = []
+        changed = []
+        for i, sentence in enumerate(sentences):
+            if sentence in previous:
+                ppl, stage = previous[sentence]
+            else:
+                ppl, stage = float('inf'), ''
+                changed.append(i)
+            perplexities.append(ppl)
+            stages.append(stage)
+        
+        with self._lock:
+            self._stats['reused_sentences'] += len(sentences) - len(changed)
+            self._stats['rescored_sentences'] += len(changed)
+        return perplexities, stages, changed
+    
+    def update(self, doc_id: str, sentences: List[str], perplexities: List[float],
+               stages: List[str], model: Optional[str] = None) -> int:
+        """새 리비전의 점수를 저장하고 리비전 번호 반환"""
+        now = time.monotonic()
+        with self._lock:
+            previous = self._sessions.pop(doc_id, None)
+            revision = previous.revision + 1 if previous is not None else 1
+            self._sessions[doc_id] = DocumentSession(
+                sentences=list(sentences),
+                perplexities=list(perplexities),
+                stages=list(stages),
+                model=model,
+                revision=revision,
+                updated_at=now
+            )
+            
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._stats['evictions'] += 1
+        return revision
+    
+    def delete(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(doc_id, None) is not None
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'sessions': len(self._sessions)}
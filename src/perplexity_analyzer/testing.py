@@ -0,0 +1,56 @@
+"""네트워크 없이 테스트와 벤치마크에 사용할 작은 GPT-2 스타일 모델과 토크나이저"""
+import os
+from typing import List, Optional
+
+import torch
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+TRAIN_CORPUS = [
+    "안녕하세요. 저는 컴퓨터 공학을 전공했습니다.",
+    "프로그래밍에 대한 열정이 있습니다.",
+    "새로운 기술을 배우는 것을 좋아합니다.",
+    "이를 통해 문제 해결 능력을 키웠습니다.",
+    "This is a simple test sentence.",
+]
+
+
+def build_tiny_model(n_layer: int = 2, n_embd: int = 32, n_head: int = 2, n_positions: int = 256,
+                     vocab_size: int = 400, corpus: Optional[List[str]] = None, seed: int = 0) -> tuple:
+    """바이트 단위 BPE 토크나이저와 무작위 초기화된 GPT-2 생성
+    
+    Returns:
+        (model, tokenizer) - ModelManager.load_model과 같은 형태
+    """
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=vocab_size,
+        special_tokens=["</s>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet()
+    )
+    tokenizer.train_from_iterator((corpus or TRAIN_CORPUS) * 10, trainer)
+    
+    fast_tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, eos_token="</s>", pad_token="</s>"
+    )
+    fast_tokenizer.padding_side = 'right'
+    
+    torch.manual_seed(seed)
+    config = GPT2Config(
+        vocab_size=len(fast_tokenizer), n_positions=n_positions,
+        n_embd=n_embd, n_layer=n_layer, n_head=n_head
+    )
+    model = GPT2LMHeadModel(config).eval()
+    
+    return model, fast_tokenizer
+
+
+def save_tiny_model(directory: str, **kwargs) -> str:
+    """작은 모델을 로컬 디렉터리에 저장 (PerplexityAnalyzer의 model_path로 사용)"""
+    model, tokenizer = build_tiny_model(**kwargs)
+    os.makedirs(directory, exist_ok=True)
+    model.save_pretrained(directory)
+    tokenizer.save_pretrained(directory)
+    return directory
@@ -1,6 +1,6 @@
 import re
 import logging
-from typing import List
+from typing import List, Optional, Tuple
 
 
 def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
@@ -19,26 +19,230 @@ def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
     return logger
 
 
+# 전처리 정규식은 문장마다 호출되므로 미리 컴파일
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s가-힣.,!?]')
+
+
 def preprocess_text(text: str) -> str:
     """텍스트 전처리"""
     # 불필요한 공백 제거
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = _WHITESPACE_RE.sub(' ', text.strip())
     
     # 특수문자 정리 (기본적인 것만)
-    text = re.sub(r'[^\w\s가-힣.,!?]', '', text)
+    text = _SPECIAL_CHARS_RE.sub('', text)
     
     return text
 
 
-def split_into_sentences(text: str) -> List[str]:
-    """텍스트를 문장 단위로 분할"""
-    # 한국어 문장 분리 패턴
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
+# 이보다 짧은 조각은 이웃 문장에 합쳐 불필요한 forward를 줄인다 (공백 포함 글자 수)
+DEFAULT_MIN_SENTENCE_LENGTH = 5
+
+# 한국어 종결어미 (문장부호나 줄바꿈이 뒤따르면 문장 끝)
+_KOREAN_ENDINGS = frozenset('다요죠')
+_TERMINAL_PUNCTUATION = '.!?…。'
+_CLOSING_MARKS = '"\'”’)]}」』》〉'
+_OPENING_BRACKETS = '([{「『《〈'
+_CLOSING_BRACKETS = ')]}」』》〉'
+# 마침표가 붙어도 문장이 끝나지 않는 약어 (소문자로 비교)
+_ABBREVIATIONS = frozenset([
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e',
+    'no', 'inc', 'co', 'corp', 'ltd', 'dept', 'approx', 'fig', 'vol', 'jan', 'feb',
+    'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+])
+
+# 문장 경계 후보: 종결 부호(+닫는 따옴표/괄호), 줄바꿈, 괄호
+_BOUNDARY_RE = re.compile(
+    r'(?P<punct>[' + re.escape(_TERMINAL_PUNCTUATION) + r']+'
+    r'(?P<close>[' + re.escape(_CLOSING_MARKS) + r']*))'
+    r'|(?P<newline>\n)'
+    r'|(?P<open>[' + re.escape(_OPENING_BRACKETS) + r'])'
+    r'|(?P<closebr>[' + re.escape(_CLOSING_BRACKETS) + r'])'
+)
+# "1." "가." "a." "iv." 같은 나열 번호 (문장 시작부터 마침표까지가 번호뿐인 경우)
+_ENUMERATION_RE = re.compile(r'\s*(?:[-•·*]\s*)?(?:\d{1,3}|[가나다라마바사아자차카타파하]|[a-zA-Z]|[ivxIVX]{1,4})\.')
+# 줄 맨 앞의 글머리 기호나 번호는 새 문장의 시작
+_LINE_START_MARKER_RE = re.compile(r'[ \t]*(?:[-•·*▪◦○●■□▶]|\d{1,3}[.)]|[가나다라마바사아자차카타파하][.)])')
+_WORD_BEFORE_RE = re.compile(r'[A-Za-z.]+$')
+
+
+def _is_sentence_end(text: str, start: int, match: 're.Match') -> bool:
+    """종결 부호 위치가 실제 문장 끝인지 판단 (소수점, 약어, 나열 번호 제외)"""
+    punct_start = match.start()
+    end = match.end()
+    next_char = text[end] if end < len(text) else ''
+    
+    if next_char and not next_char.isspace():
+        # 공백 없이 이어지면 "3.5점" 같은 소수점/도메인이거나 인용 뒤 조사("..."라고).
+        # 단, 닫는 부호 없이 종결어미 바로 뒤 마침표면 띄어쓰기 누락으로 보고 분리
+        if match.group('close') or punct_start == 0 or text[punct_start - 1] not in _KOREAN_ENDINGS:
+            return False
+        return not next_char.isdigit()
+    
+    if text[punct_start] == '.' and end - punct_start == 1:
+        if _ENUMERATION_RE.fullmatch(text, start, end):
+            return False
+        # 약어는 짧으므로 직전 몇 글자만 확인 (긴 문장에서도 선형 시간 유지)
+        word = _WORD_BEFORE_RE.search(text, max(start, punct_start - 8), punct_start)
+        if word and word.group(0).lower() in _ABBREVIATIONS:
+            return False
+    
+    return True
+
+
+def _is_line_break(text: str, start: int, newline: int) -> bool:
+    """줄바꿈이 문장 경계인지 판단
+    
+    빈 줄, 종결어미/문장부호로 끝난 줄, 글머리 기호 항목, 다음 줄이 글머리 기호나
+    번호로 시작하는 경우만 경계로 보고, 그 외에는 줄바꿈된 한 문장으로 이어 붙인다.
+    """
+    prev = newline - 1
+    while prev >= start and text[prev] in ' \t\r':
+        prev -= 1
+    if prev < start:
+        return False
+    if text[prev] in _KOREAN_ENDINGS or text[prev] in _TERMINAL_PUNCTUATION or text[prev] in _CLOSING_MARKS + ':':
+        return True
+    # 글머리 기호/번호로 시작한 항목은 한 줄이 하나의 문장
+    if _LINE_START_MARKER_RE.match(text, start):
+        return True
+    
+    next_line_end = text.find('\n', newline + 1)
+    next_line = text[newline + 1:next_line_end if next_line_end != -1 else len(text)]
+    if not next_line.strip():
+        return True
+    return _LINE_START_MARKER_RE.match(next_line) is not None
+
+
+def _merge_short_spans(spans: List[Tuple[int, int]], min_length: int) -> List[Tuple[int, int]]:
+    """min_length보다 짧은 조각을 앞 문장(없으면 다음 문장)과 합침"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in spans:
+        if merged and (end - start < min_length or merged[-1][1] - merged[-1][0] < min_length):
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def segment_sentences(text: str, min_length: int = DEFAULT_MIN_SENTENCE_LENGTH) -> List[Tuple[int, int]]:
+    """텍스트를 문장 단위로 나눠 원문 기준 (start, end) 문자 오프셋 목록 반환
+    
+    종결 부호(. ! ? …)와 뒤따르는 닫는 따옴표/괄호, 종결어미(다/요/죠) 뒤 줄바꿈,
+    빈 줄과 글머리 기호를 경계로 본다. 소수점("3.5점"), 약어("e.g."), 나열 번호("1.")와
+    괄호 안의 부호에서는 나누지 않는다. 경계 후보를 한 번만 훑으므로 텍스트 길이에 선형이다.
+    
+    Args:
+        text: 원문
+        min_length: 이보다 짧은 조각은 이웃 문장과 합침 (0이면 합치지 않음)
+    
+    Returns:
+        앞뒤 공백을 제외한 문장 구간 목록. text[start:end]가 문장 원문
+    """
+    spans = []
+    start = 0
+    depth = 0
     
+    def emit(end: int):
+        s, e = start, end
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if s < e:
+            spans.append((s, e))
+    
+    for match in _BOUNDARY_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == 'open':
+            depth += 1
+        elif kind == 'closebr':
+            depth = max(0, depth - 1)
+        elif kind == 'newline':
+            # 짝이 맞지 않는 괄호가 다음 줄로 번지지 않도록 줄마다 초기화
+            depth = 0
+            if _is_line_break(text, start, match.start()):
+                emit(match.start())
+                start = match.end()
+        else:
+            close = match.group('close')
+            depth = max(0, depth - sum(1 for c in close if c in _CLOSING_BRACKETS))
+            if depth == 0 and _is_sentence_end(text, start, match):
+                emit(match.end())
+                start = match.end()
+    emit(len(text))
+    
+    if min_length > 0:
+        spans = _merge_short_spans(spans, min_length)
+    return spans
+
+
+def split_into_sentences(text: str, min_length: int = DEFAULT_MIN_SENTENCE_LENGTH) -> List[str]:
+    """텍스트를 문장 단위로 분할 (segment_sentences 구간의 원문 문자열)"""
+    return [text[start:end] for start, end in segment_sentences(text, min_length)]
+
+
+def load_corpus_sentences(path: str) -> List[str]:
+    """코퍼스 파일(한 줄에 문서 하나)에서 문장 목록 로드"""
+    sentences = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            sentences.extend(split_into_sentences(line))
     return sentences
 
 
+def estimate_token_count(text: str) -> int:
+    """토크나이저 없이 텍스트의 토큰 수를 대략 추정 (한국어 서브워드 기준 약 1.5자당 1토큰)"""
+    return len(text) * 2 // 3 + 1
+
+
+# 분류 코드 (병렬 배열 결과와 토큰 점수 저장소의 값은 이 튜플의 인덱스)
+CLASS_CODES = ('NATURAL', 'AI_SUSPICIOUS', 'ERROR')
+# 자연스러운 문장의 confidence가 1이 되는 임계값 대비 perplexity 차이
+NATURAL_CONFIDENCE_SCALE = 20.0
+
+
+def generate_recommendations(ai_suspicious: List[Tuple[int, float]], ai_ratio: float) -> List[str]:
+    """수정 권장사항 생성 (ai_suspicious는 confidence 내림차순의 (위치, confidence))"""
+    recommendations = []
+    
+    if ai_ratio >= 0.5:
+        recommendations.append("⚠️  전체 문장의 50% 이상이 AI 생성으로 의심됩니다. 전면 수정을 권장합니다.")
+    elif ai_ratio >= 0.3:
+        recommendations.append("⚠️  상당수 문장이 AI 생성으로 의심됩니다. 주요 문장들을 수정해주세요.")
+    elif ai_ratio > 0:
+        recommendations.append("✓ 일부 문장만 AI 생성으로 의심됩니다. 해당 문장들을 확인해주세요.")
+    else:
+        recommendations.append("✅ AI 생성이 의심되는 문장이 없습니다.")
+    
+    # 우선순위가 높은 문장들 (confidence > 0.8) 알림
+    high_priority = [position for position, confidence in ai_suspicious if confidence > 0.8]
+    if high_priority:
+        positions = [str(position + 1) for position in high_priority[:3]]  # 최대 3개만
+        recommendations.append(f"🔥 우선 수정 필요 문장: {', '.join(positions)}번")
+    
+    return recommendations
+
+
+def detect_script(text: str) -> Optional[str]:
+    """텍스트의 주된 문자 체계 ('hangul', 'latin', 글자가 없으면 None)
+    
+    한글 음절 하나는 라틴 글자 여러 개에 해당하는 정보를 담으므로 3배로 가중해,
+    영문 기술 용어가 섞인 한국어 문장은 한국어로 판정한다.
+    """
+    hangul = 0
+    latin = 0
+    for char in text:
+        if '\uac00' <= char <= '\ud7a3' or '\u3131' <= char <= '\u318e':
+            hangul += 1
+        elif char.isascii() and char.isalpha():
+            latin += 1
+    
+    if hangul == 0 and latin == 0:
+        return None
+    return 'hangul' if hangul * 3 >= latin else 'latin'
+
+
 def normalize_score(perplexity: float, min_ppl: float = 1.0, max_ppl: float = 1000.0) -> float:
     """Perplexity를 0-1 스케일로 정규화"""
     # 로그 스케일 적용
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import HTTPException
+
+from src.api.admission import AdmissionController, run_with_deadline
+
+
+class FakeRequest:
+    """is_disconnected만 흉내 내는 요청"""
+    
+    def __init__(self, disconnected=False):
+        self.disconnected = disconnected
+    
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+async def slow_work(cancel, seconds=5.0):
+    """cancel 이벤트가 설정될 때까지 기다리는 작업"""
+    await asyncio.sleep(seconds)
+    return 'done'
+
+
+class TestAdmissionController(unittest.TestCase):
+    
+    def test_too_large_request(self):
+        admission = AdmissionController(max_request_tokens=10)
+        with self.assertRaises(HTTPException) as ctx:
+            with admission.admit(11, hint='; use /jobs'):
+                pass
+        self.assertEqual(ctx.exception.status_code, 413)
+        self.assertIn('/jobs', ctx.exception.detail)
+        self.assertEqual(admission.stats()['rejected_too_large'], 1)
+    
+    def test_overload_is_rejected_only_while_busy(self):
+        admission = AdmissionController(max_request_tokens=100, max_inflight_tokens=100, retry_after_seconds=2.5)
+        with admission.admit(80):
+            self.assertEqual(admission.stats()['inflight_tokens'], 80)
+            with self.assertRaises(HTTPException) as ctx:
+                with admission.admit(30):
+                    pass
+            self.assertEqual(ctx.exception.status_code, 429)
+            self.assertEqual(ctx.exception.headers['Retry-After'], '3')
+            with admission.admit(20):
+                self.assertEqual(admission.stats()['inflight_requests'], 2)
+        
+        stats = admission.stats()
+        self.assertEqual((stats['inflight_tokens'], stats['inflight_requests']), (0, 0))
+        self.assertEqual((stats['admitted'], stats['rejected_overloaded']), (2, 1))
+    
+    def test_zero_limits_disable_checks(self):
+        admission = AdmissionController(max_request_tokens=0, max_inflight_tokens=0)
+        with admission.admit(10 ** 6):
+            with admission.admit(10 ** 6):
+                pass
+
+
+class TestRunWithDeadline(unittest.TestCase):
+    
+    def test_completes_before_deadline(self):
+        admission = AdmissionController()
+        result = asyncio.run(run_with_deadline(
+            admission, FakeRequest(), 1000, lambda cancel: slow_work(cancel, 0.01)
+        ))
+        self.assertEqual(result, 'done')
+        self.assertEqual(admission.stats()['cancelled'], 0)
+    
+    def test_deadline_sets_cancel_event(self):
+        admission = AdmissionController()
+        events = []
+        
+        def work(cancel):
+            events.append(cancel)
+            return slow_work(cancel)
+        
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(run_with_deadline(admission, FakeRequest(), 50, work))
+        self.assertEqual(ctx.exception.status_code, 504)
+        self.assertTrue(events[0].is_set())
+        self.assertEqual(admission.stats()['cancelled'], 1)
+    
+    def test_disconnect_cancels(self):
+        admission = AdmissionController()
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(run_with_deadline(admission, FakeRequest(disconnected=True), None, slow_work))
+        self.assertEqual(ctx.exception.status_code, 499)
+    
+    def test_reservation_is_held_until_running_work_finishes(self):
+        """취소해도 추론 스레드에서 실행 중인 작업이 끝날 때까지 토큰을 처리 중으로 계산"""
+        admission = AdmissionController()
+        running = threading.Event()
+        finish = threading.Event()
+        
+        def micro_batch():
+            running.set()
+            finish.wait(5.0)
+        
+        async def work(cancel):
+            await asyncio.get_running_loop().run_in_executor(None, micro_batch)
+            return 'done'
+        
+        async def scenario():
+            with self.assertRaises(HTTPException) as ctx:
+                with admission.admit(40) as reservation:
+                    await run_with_deadline(admission, FakeRequest(), 50, work, reservation)
+            self.assertEqual(ctx.exception.status_code, 504)
+            self.assertTrue(running.is_set())
+            self.assertEqual(admission.stats()['inflight_tokens'], 40)
+            
+            finish.set()
+            while admission.stats()['inflight_requests']:
+                await asyncio.sleep(0.01)
+            self.assertEqual(admission.stats()['inflight_tokens'], 0)
+        
+        asyncio.run(asyncio.wait_for(scenario(), 5.0))
+    
+    def test_scoring_stops_between_micro_batches(self):
+        """설정된 cancel 이벤트를 받은 분석기는 점수화하지 않고 멈춤"""
+        from src.perplexity_analyzer.analyzer import ScoringCancelled
+        from tests.tiny_model import make_analyzer
+        
+        analyzer = make_analyzer()
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaisesRegex(ScoringCancelled, "2 of 2 texts pending"):
+            analyzer.calculate_perplexities(["첫 번째 문장입니다.", "두 번째 문장입니다."], cancel=cancel)
+    
+    def test_cancelled_message_counts_unscored_texts(self):
+        from unittest import mock
+        from src.perplexity_analyzer.analyzer import ScoringCancelled
+        from tests.tiny_model import make_analyzer
+        
+        analyzer = make_analyzer(batch_size=1, cache_size=0)
+        cancel = threading.Event()
+        score_batch = analyzer._score_batch
+        
+        def score_then_cancel(*args, **kwargs):
+            cancel.set()
+            return score_batch(*args, **kwargs)
+        
+        with mock.patch.object(analyzer, '_score_batch', side_effect=score_then_cancel):
+            with self.assertRaisesRegex(ScoringCancelled, "2 of 3 texts pending"):
+                analyzer.calculate_perplexities(["첫 번째 문장입니다.", "두 번째 문장입니다.", "세 번째 문장"], cancel=cancel)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+import json
+import os
+import sys
+import time
+import unittest
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from tests.tiny_model import patch_pretrained
+
+
+TEXT = "안녕하세요. 저는 컴퓨터 공학을 전공했습니다. 프로그래밍에 대한 열정이 있습니다."
+
+
+def wait_until_ready(client, timeout=30.0):
+    """백그라운드 모델 로드와 워밍업이 끝날 때까지 /ready를 폴링"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get('/ready')
+        if response.status_code == 200:
+            return
+        if response.json()['model_status'] == 'failed':
+            raise RuntimeError("Model loading failed")
+        time.sleep(0.05)
+    raise TimeoutError("Model did not become ready")
+
+
+class TestAPI(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.patcher = patch_pretrained()
+        cls.patcher.start()
+        cls.client = TestClient(app)
+        cls.client.__enter__()
+        wait_until_ready(cls.client)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+        cls.patcher.stop()
+    
+    def test_analyze(self):
+        response = self.client.post('/analyze', json={'text': TEXT})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['overall_stats']['total_sentences'], 3)
+        
+        body = response.json()
+        for sentence in body['ai_suspicious_sentences'] + body['natural_sentences']:
+            self.assertEqual(TEXT[sentence['start']:sentence['end']], sentence['text'])
+    
+    def test_analyze_batch(self):
+        response = self.client.post('/analyze/batch', json={'texts': [TEXT, ""]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['text_id'] for r in response.json()], [0, 1])
+    
+    def test_compact_format(self):
+        """format=compact 또는 Accept 헤더로 문장 텍스트 없는 병렬 배열 응답"""
+        verbose = self.client.post('/analyze', json={'text': TEXT}).json()
+        response = self.client.post('/analyze', params={'format': 'compact'}, json={'text': TEXT})
+        self.assertEqual(response.headers['content-type'], 'application/vnd.resume-filter.compact+json')
+        
+        compact = response.json()
+        self.assertEqual(compact['overall_stats'], verbose['overall_stats'])
+        self.assertEqual(len(compact['classes']), 3)
+        self.assertNotIn('ai_suspicious_sentences', compact)
+        for sentence in verbose['ai_suspicious_sentences'] + verbose['natural_sentences']:
+            self.assertAlmostEqual(compact['perplexities'][sentence['position']], sentence['perplexity'])
+            self.assertEqual(compact['starts'][sentence['position']], sentence['start'])
+        
+        batch = self.client.post(
+            '/analyze/batch', json={'texts': [TEXT, ""]},
+            headers={'Accept': 'application/vnd.resume-filter.compact+json'}
+        ).json()
+        self.assertEqual([r['text_id'] for r in batch], [0, 1])
+        self.assertEqual(batch[1]['classes'], [])
+    
+    def test_duplicates_require_index(self):
+        """near-duplicate 인덱스가 꺼져 있으면 결과 필드는 null, 조회는 400"""
+        response = self.client.post('/analyze', json={'text': TEXT})
+        self.assertIsNone(response.json()['near_duplicates'])
+        self.assertEqual(self.client.post('/duplicates', json={'text': TEXT}).status_code, 400)
+    
+    def test_model_selection(self):
+        """설정된 모델 목록 조회, 알 수 없는 모델을 지정하면 400"""
+        models = self.client.get('/models').json()
+        self.assertEqual([m['name'] for m in models], ['kogpt2'])
+        self.assertTrue(models[0]['loaded'])
+        
+        response = self.client.post('/analyze', json={'text': TEXT, 'model': 'kogpt2'})
+        self.assertEqual(response.json()['model'], 'kogpt2')
+        self.assertEqual(self.client.post('/analyze', json={'text': TEXT, 'model': 'missing'}).status_code, 400)
+        self.assertEqual(
+            self.client.post('/analyze/batch', json={'texts': [TEXT], 'model': 'missing'}).status_code, 400
+        )
+    
+    def test_document_revision(self):
+        """같은 문서의 새 리비전은 바뀐 문장만 다시 점수화하고 전체 결과를 반환"""
+        first = self.client.post('/documents/draft-1/analyze', json={'text': TEXT})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['revision'], 1)
+        self.assertEqual(first.json()['rescored_sentences'], 3)
+        
+        edited = TEXT.replace("열정이 있습니다", "깊은 관심이 있습니다")
+        second = self.client.post('/documents/draft-1/analyze', json={'text': edited}).json()
+        self.assertEqual(second['revision'], 2)
+        self.assertEqual(second['rescored_sentences'], 1)
+        self.assertEqual(second['reused_sentences'], 2)
+        self.assertEqual(second['overall_stats']['total_sentences'], 3)
+        
+        self.assertEqual(self.client.delete('/documents/draft-1').status_code, 200)
+        self.assertEqual(self.client.delete('/documents/draft-1').status_code, 404)
+    
+    def test_async_job(self):
+        """작업 제출 후 상태를 폴링하고 결과를 페이지 단위로 조회"""
+        submitted = self.client.post('/jobs', json={'texts': [TEXT, "", TEXT]})
+        self.assertEqual(submitted.status_code, 202)
+        job_id = submitted.json()['job_id']
+        
+        deadline = time.monotonic() + 30.0
+        while self.client.get(f'/jobs/{job_id}').json()['status'] != 'completed':
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertEqual(self.client.get(f'/jobs/{job_id}').json()['completed'], 3)
+        
+        page = self.client.get(f'/jobs/{job_id}/results', params={'offset': 1, 'limit': 1}).json()
+        self.assertEqual(page['total'], 3)
+        self.assertEqual([r['text_id'] for r in page['results']], [1])
+        self.assertEqual(page['results'][0]['result']['overall_stats']['total_sentences'], 0)
+        
+        response = self.client.get(f'/jobs/{job_id}/results')
+        page = json.loads(response.content)
+        self.assertEqual(
+            {k: v for k, v in page.items() if k != 'results'},
+            {'job_id': job_id, 'status': 'completed', 'total': 3, 'offset': 0}
+        )
+        self.assertEqual([r['text_id'] for r in page['results']], [0, 1, 2])
+        self.assertGreater(page['results'][0]['result']['overall_stats']['total_sentences'], 0)
+        
+        self.assertEqual(self.client.get('/jobs/missing').status_code, 404)
+    
+    def test_batch_stream_ndjson(self):
+        """텍스트별 결과와 진행률이 NDJSON 줄로 스트리밍됨"""
+        texts = [TEXT] * 3 + [""]
+        with self.client.stream('POST', '/analyze/batch/stream', json={'texts': texts}) as response:
+            self.assertEqual(response.headers['content-type'], 'application/x-ndjson')
+            events = [json.loads(line) for line in response.iter_lines() if line]
+        
+        results = [e['data'] for e in events if e['event'] == 'result']
+        progress = [e['data'] for e in events if e['event'] == 'progress']
+        
+        self.assertEqual(sorted(r['text_id'] for r in results), [0, 1, 2, 3])
+        self.assertEqual(progress[-1], {'completed': 4, 'total': 4})
+    
+    def test_batch_stream_sse(self):
+        with self.client.stream('POST', '/analyze/batch/stream?format=sse', json={'texts': [TEXT]}) as response:
+            self.assertTrue(response.headers['content-type'].startswith('text/event-stream'))
+            body = response.read().decode('utf-8')
+        
+        self.assertIn('event: result\ndata: ', body)
+        self.assertIn('event: progress\ndata: {"completed":1,"total":1}', body)
+    
+    def test_metrics(self):
+        """단계별 지연시간과 forward 배치 통계가 Prometheus 형식으로 노출됨"""
+        self.client.post('/analyze', json={'text': TEXT})
+        response = self.client.get('/metrics')
+        
+        self.assertEqual(response.status_code, 200)
+        body = response.text
+        for stage in ('split', 'preprocess', 'tokenize', 'forward', 'loss', 'classify', 'serialize'):
+            self.assertIn(f'resume_filter_stage_seconds_count{{stage="{stage}"}}', body)
+        self.assertIn('resume_filter_forward_batch_size_bucket', body)
+        self.assertIn('resume_filter_queue_wait_seconds_count', body)
+    
+    def test_health_and_ready(self):
+        health = self.client.get('/health').json()
+        self.assertEqual(health['status'], 'healthy')
+        self.assertEqual(health['model_status'], 'ready')
+        
+        ready = self.client.get('/ready')
+        self.assertEqual(ready.status_code, 200)
+        self.assertEqual(ready.json()['status'], 'ready')
+    
+    def test_model_info(self):
+        info = self.client.get('/model/info').json()
+        self.assertEqual(info['scoring_mode'], 'sentence')
+        self.assertEqual(info['execution_strategy'], 'padded')
+    
+    def test_admission(self):
+        """요청 한도를 넘으면 413, /admission으로 상태 확인"""
+        from src.api import main
+        
+        limit = main.admission.max_request_tokens
+        main.admission.max_request_tokens = 5
+        try:
+            response = self.client.post('/analyze', json={'text': TEXT})
+            self.assertEqual(response.status_code, 413)
+            response = self.client.post('/analyze/batch', json={'texts': [TEXT]})
+            self.assertEqual(response.status_code, 413)
+            self.assertIn('/jobs', response.json()['detail'])
+        finally:
+            main.admission.max_request_tokens = limit
+        
+        status = self.client.get('/admission').json()
+        self.assertEqual(status['inflight_requests'], 0)
+        self.assertGreaterEqual(status['rejected_too_large'], 2)
+        
+        response = self.client.post('/analyze', json={'text': TEXT, 'deadline_ms': 60000})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_rescore(self):
+        """토큰 점수 저장소를 새 임계값으로 재분류"""
+        import tempfile
+        from src.api import main
+        from src.perplexity_analyzer.score_store import TokenScoreStore
+        
+        response = self.client.post('/scores/rescore', json={})
+        self.assertEqual(response.status_code, 400)
+        
+        with tempfile.TemporaryDirectory() as path:
+            store = TokenScoreStore(path)
+            store.append('resume-1', 'kogpt2', [2.0, 50.0], [0, 0], [[0.5, 0.9], [3.9]])
+            store.close()
+            main.settings.score_store_path = path
+            try:
+                body = self.client.post('/scores/rescore', json={'threshold': 10}).json()
+                self.assertEqual(body['summary']['ai_suspicious_count'], 1)
+                self.assertEqual(body['documents'][0]['id'], 'resume-1')
+                self.assertEqual(body['documents'][0]['overall_stats']['ai_ratio'], 0.5)
+                
+                body = self.client.post('/scores/rescore', json={'threshold': 100, 'limit': 0}).json()
+                self.assertEqual(body['summary']['ai_suspicious_count'], 2)
+                self.assertEqual(body['documents'], [])
+                
+                response = self.client.post('/scores/rescore', json={'aggregation': 'min'})
+                self.assertEqual(response.status_code, 422)
+            finally:
+                main.settings.score_store_path = None
+                main.token_scores = None
+    
+    def test_invalid_stream_format(self):
+        response = self.client.post('/analyze/batch/stream?format=xml', json={'texts': [TEXT]})
+        self.assertEqual(response.status_code, 422)
+
+
+if __name__ == '__main__':
+    unittest.main()
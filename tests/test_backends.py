@@ -0,0 +1,115 @@
+import copy
+import math
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import torch
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.backends import onnx_artifact_path, resolve_backend_name
+from src.perplexity_analyzer.models import ModelManager
+from src.perplexity_analyzer.testing import save_tiny_model
+from tests.tiny_model import build_tiny_model, make_analyzer
+
+try:
+    import onnxruntime  # noqa: F401
+    HAS_ONNXRUNTIME = True
+except ImportError:
+    HAS_ONNXRUNTIME = False
+
+
+SENTENCES = [
+    "저는 컴퓨터 공학을 전공했습니다",
+    "네",
+    "프로그래밍에 대한 열정이 있으며 새로운 기술을 배우는 것을 좋아합니다",
+]
+
+
+class TestBackendSelection(unittest.TestCase):
+    
+    def test_default_and_env(self):
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('PERPLEXITY_BACKEND', None)
+            self.assertEqual(resolve_backend_name(None), 'torch')
+        with mock.patch.dict(os.environ, {'PERPLEXITY_BACKEND': 'onnx'}):
+            self.assertEqual(resolve_backend_name(None), 'onnx')
+            self.assertEqual(resolve_backend_name('torch'), 'torch')
+    
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            resolve_backend_name('tensorrt')
+
+    
+    def test_onnx_artifact_path_tracks_weights(self):
+        """구성이 같아도 가중치가 다르면 다른 export 파일을 사용"""
+        model, _ = build_tiny_model()
+        tuned = copy.deepcopy(model)
+        with torch.no_grad():
+            next(tuned.parameters()).add_(0.01)
+        
+        path = onnx_artifact_path(model, 'kogpt2', 'fp32', '/tmp/onnx')
+        self.assertEqual(path, onnx_artifact_path(copy.deepcopy(model), 'kogpt2', 'fp32', '/tmp/onnx'))
+        self.assertNotEqual(path, onnx_artifact_path(tuned, 'kogpt2', 'fp32', '/tmp/onnx'))
+
+    
+    def test_onnx_artifact_path_uses_checkpoint_files(self):
+        """디렉터리에서 로드한 모델은 가중치를 읽지 않고 체크포인트 파일로 구분"""
+        with tempfile.TemporaryDirectory() as tmp:
+            save_tiny_model(tmp)
+            model, _ = ModelManager().load_model('tiny', model_path=tmp)
+            with mock.patch.object(model, 'state_dict', side_effect=AssertionError("weights were hashed")):
+                path = onnx_artifact_path(model, 'tiny', 'fp32', '/tmp/onnx')
+            again, _ = ModelManager().load_model('tiny', model_path=tmp)
+            self.assertEqual(path, onnx_artifact_path(again, 'tiny', 'fp32', '/tmp/onnx'))
+            
+            save_tiny_model(tmp, seed=1)
+            tuned, _ = ModelManager().load_model('tiny', model_path=tmp)
+            self.assertNotEqual(path, onnx_artifact_path(tuned, 'tiny', 'fp32', '/tmp/onnx'))
+
+
+@unittest.skipUnless(HAS_ONNXRUNTIME, "onnxruntime not installed")
+class TestOnnxBackend(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.env = mock.patch.dict(os.environ, {'ONNX_CACHE_DIR': cls.tmp.name})
+        cls.env.start()
+        cls.torch_analyzer = make_analyzer(cache_size=0)
+        cls.onnx_analyzer = make_analyzer(cache_size=0, backend='onnx')
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.env.stop()
+        cls.tmp.cleanup()
+    
+    def test_matches_torch(self):
+        """ONNX Runtime 결과가 eager PyTorch와 일치"""
+        expected = self.torch_analyzer.calculate_perplexities(SENTENCES)
+        actual = self.onnx_analyzer.calculate_perplexities(SENTENCES)
+        for got, want in zip(actual, expected):
+            self.assertAlmostEqual(got, want, delta=want * 1e-3)
+    
+    def test_exported_artifact_is_reused(self):
+        """export한 파일은 디스크에 캐시되어 재사용됨"""
+        path = self.onnx_analyzer.backend.model_path
+        self.assertTrue(os.path.exists(path))
+        mtime = os.path.getmtime(path)
+        
+        again = make_analyzer(cache_size=0, backend='onnx')
+        self.assertEqual(again.backend.model_path, path)
+        self.assertEqual(os.path.getmtime(path), mtime)
+    
+    def test_int8(self):
+        analyzer = make_analyzer(cache_size=0, backend='onnx', precision='int8')
+        self.assertEqual(analyzer.get_model_info()['backend'], 'onnx')
+        self.assertTrue(all(math.isfinite(p) for p in analyzer.calculate_perplexities(SENTENCES)))
+
+
+if __name__ == '__main__':
+    unittest.main()
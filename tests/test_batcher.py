@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from unittest import mock
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.api.batcher import InferenceBatcher
+from src.api.metrics import SampledProfiler
+from tests.tiny_model import make_analyzer
+
+
+class TestInferenceBatcher(unittest.IsolatedAsyncioTestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = make_analyzer()
+    
+    async def asyncSetUp(self):
+        self.batcher = InferenceBatcher(self.analyzer, max_batch_tokens=10000, max_wait_ms=50)
+        await self.batcher.start()
+    
+    async def asyncTearDown(self):
+        await self.batcher.stop()
+    
+    async def test_concurrent_requests_are_coalesced(self):
+        """동시 요청들이 하나의 점수화 호출로 합쳐지고 각자 결과를 받음"""
+        requests = [
+            ["저는 컴퓨터 공학을 전공했습니다", "네"],
+            ["프로그래밍에 대한 열정이 있습니다"],
+            ["This is a simple test sentence", "이를 통해 문제 해결 능력을 키웠습니다", "감사합니다"],
+        ]
+        
+        with mock.patch.object(
+            self.analyzer, 'calculate_perplexities', wraps=self.analyzer.calculate_perplexities
+        ) as spy:
+            results = await asyncio.gather(*(self.batcher.score(r) for r in requests))
+        
+        self.assertEqual(spy.call_count, 1)
+        for sentences, result in zip(requests, results):
+            self.assertEqual(result, self.analyzer.calculate_perplexities(sentences))
+    
+    async def test_token_budget_flushes_early(self):
+        """토큰 예산을 넘으면 대기 시간 전에 분리되어 처리됨"""
+        self.batcher.max_batch_tokens = 1
+        
+        with mock.patch.object(
+            self.analyzer, 'calculate_perplexities', wraps=self.analyzer.calculate_perplexities
+        ) as spy:
+            await asyncio.gather(self.batcher.score(["첫 번째 문장"]), self.batcher.score(["두 번째 문장"]))
+        
+        self.assertEqual(spy.call_count, 2)
+    
+    async def test_errors_propagate_to_callers(self):
+        """점수화 실패시 각 요청의 future로 예외 전달"""
+        with mock.patch.object(self.analyzer, 'calculate_perplexities', side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                await self.batcher.score(["문장"])
+    
+    async def test_cancelled_requests_are_skipped(self):
+        """cancel이 설정된 요청은 점수화하지 않고 함께 대기한 다른 요청만 처리"""
+        cancel = threading.Event()
+        cancel.set()
+        
+        with mock.patch.object(
+            self.analyzer, 'calculate_perplexities', wraps=self.analyzer.calculate_perplexities
+        ) as spy:
+            cancelled, kept = await asyncio.gather(
+                self.batcher.score(["첫 번째 문장"], cancel=cancel),
+                self.batcher.score(["두 번째 문장"], cancel=threading.Event()),
+                return_exceptions=True
+            )
+        
+        self.assertIsInstance(cancelled, asyncio.CancelledError)
+        self.assertEqual(spy.call_args[0][0], ["두 번째 문장"])
+        self.assertEqual(kept, self.analyzer.calculate_perplexities(["두 번째 문장"]))
+    
+    async def test_cancel_stops_scoring_in_progress(self):
+        """점수화 중에 묶인 요청이 모두 취소되면 남은 마이크로 배치를 건너뜀"""
+        cancel = threading.Event()
+        calculate = self.analyzer.calculate_perplexities
+        
+        def cancel_then_calculate(sentences, **kwargs):
+            cancel.set()
+            return calculate(sentences, **kwargs)
+        
+        with mock.patch.object(self.analyzer, 'calculate_perplexities', side_effect=cancel_then_calculate):
+            with self.assertRaises(asyncio.CancelledError):
+                await self.batcher.score(["첫 번째 문장", "두 번째 문장"], cancel=cancel)
+    
+    async def test_empty_request(self):
+        self.assertEqual(await self.batcher.score([]), [])
+    
+    async def test_sampled_profiler_writes_trace(self):
+        """프로파일링이 켜지면 추론 호출의 trace 파일이 저장됨"""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.batcher.profiler = SampledProfiler(tmp, sample_rate=1.0)
+            await self.batcher.score(["저는 컴퓨터 공학을 전공했습니다"])
+            self.assertTrue(any(name.endswith('.json') for name in os.listdir(tmp)))
+
+
+if __name__ == '__main__':
+    unittest.main()
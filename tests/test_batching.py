@@ -0,0 +1,163 @@
+import math
+import unittest
+import sys
+import os
+from unittest import mock
+
+import torch
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.scheduler import plan_micro_batches, plan_packed_batches
+from src.perplexity_analyzer.utils import preprocess_text
+from tests.tiny_model import make_analyzer
+
+
+SENTENCES = [
+    "저는 컴퓨터 공학을 전공했습니다",
+    "네",
+    "프로그래밍에 대한 열정이 있으며 새로운 기술을 배우는 것을 좋아합니다",
+    "This is a simple test sentence",
+    "이를 통해 문제 해결 능력을 키웠습니다",
+]
+
+
+class TestBatchedScoring(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = make_analyzer(batch_size=2, cache_size=0)
+    
+    def reference_perplexity(self, text: str) -> float:
+        """배치 크기 1, labels=input_ids 방식의 기존 perplexity 계산"""
+        inputs = self.analyzer.tokenizer(preprocess_text(text), return_tensors='pt')
+        with torch.no_grad():
+            outputs = self.analyzer.model(**inputs, labels=inputs['input_ids'])
+        return math.exp(outputs.loss.item())
+    
+    def test_batched_matches_unbatched(self):
+        """패딩된 배치 결과가 문장별 단독 계산과 동일한지 확인"""
+        batched = self.analyzer.calculate_perplexities(SENTENCES)
+        
+        for sentence, ppl in zip(SENTENCES, batched):
+            expected = self.reference_perplexity(sentence)
+            self.assertAlmostEqual(ppl, expected, delta=expected * 1e-4)
+    
+    def test_single_matches_batched(self):
+        """calculate_perplexity와 calculate_perplexities 결과 일치"""
+        batched = self.analyzer.calculate_perplexities(SENTENCES)
+        for sentence, ppl in zip(SENTENCES, batched):
+            self.assertAlmostEqual(self.analyzer.calculate_perplexity(sentence), ppl, delta=ppl * 1e-4)
+    
+    def test_empty_text_is_inf(self):
+        """빈 텍스트는 inf로 처리"""
+        result = self.analyzer.calculate_perplexities(["", "   ", SENTENCES[0]])
+        self.assertEqual(result[0], float('inf'))
+        self.assertEqual(result[1], float('inf'))
+        self.assertTrue(math.isfinite(result[2]))
+    
+    def test_analyze_sentences_stats(self):
+        """배치 경로를 사용하는 analyze_sentences 통계 검증"""
+        result = self.analyzer.analyze_sentences(". ".join(SENTENCES) + ".")
+        stats = result['overall_stats']
+        
+        # 짧은 조각 "네."는 앞 문장에 합쳐짐
+        self.assertEqual(stats['total_sentences'], len(SENTENCES) - 1)
+        self.assertEqual(
+            stats['total_sentences'],
+            stats['ai_suspicious_count'] + stats['natural_count'] + stats['error_count']
+        )
+
+    
+    def test_analyze_batch_matches_per_text(self):
+        """문서 간 공동 배치 결과가 문서별 분석 결과와 동일한지 확인"""
+        texts = [
+            ". ".join(SENTENCES[:2]) + ".",
+            "",
+            ". ".join(SENTENCES[2:]) + ".",
+        ]
+        results = self.analyzer.analyze_batch(texts)
+        
+        self.assertEqual([r['text_id'] for r in results], [0, 1, 2])
+        for text, result in zip(texts, results):
+            expected = self.analyzer.analyze_sentences(text)
+            self.assertEqual(result['overall_stats'], expected['overall_stats'])
+            
+            got = sorted((s['position'], s['perplexity']) for s in result['natural_sentences'] + result['ai_suspicious_sentences'])
+            want = sorted((s['position'], s['perplexity']) for s in expected['natural_sentences'] + expected['ai_suspicious_sentences'])
+            for (pos, ppl), (want_pos, want_ppl) in zip(got, want):
+                self.assertEqual(pos, want_pos)
+                self.assertAlmostEqual(ppl, want_ppl, delta=want_ppl * 1e-4)
+
+
+class TestPackedScoring(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = make_analyzer(execution_strategy='packed', max_length=32, max_batch_tokens=64, cache_size=0)
+        cls.reference = make_analyzer(max_length=32, cache_size=0)
+    
+    def test_packed_matches_calculate_perplexity(self):
+        """여러 문장을 한 행에 이어 붙여도 문장별 단독 점수와 동일"""
+        sentences = SENTENCES * 3
+        packed = self.analyzer.calculate_perplexities(sentences)
+        
+        for sentence, ppl in zip(sentences, packed):
+            expected = self.reference.calculate_perplexity(sentence)
+            self.assertAlmostEqual(ppl, expected, delta=expected * 1e-4)
+    
+    def test_fewer_padded_tokens(self):
+        """패딩 방식보다 forward에 넣는 토큰 수가 적음"""
+        padded_tokens = {}
+        for analyzer in (self.analyzer, self.reference):
+            observed = []
+            with mock.patch.object(analyzer.instrumentation, 'observe_forward',
+                                   side_effect=lambda **kw: observed.append(kw['padded_tokens'])):
+                analyzer.calculate_perplexities(SENTENCES * 4)
+            padded_tokens[analyzer.execution_strategy] = sum(observed)
+        self.assertLess(padded_tokens['packed'], padded_tokens['padded'])
+    
+    def test_requires_torch_backend(self):
+        with self.assertRaises(ValueError):
+            make_analyzer(execution_strategy='packed', backend='onnx')
+
+
+class TestMicroBatchPlanning(unittest.TestCase):
+    
+    def test_token_budget(self):
+        """패딩 포함 토큰 수가 예산을 넘지 않음"""
+        lengths = [5, 40, 7, 12, 39, 6, 100, 11]
+        batches = plan_micro_batches(lengths, max_batch_tokens=80, max_batch_size=8)
+        
+        self.assertEqual(sorted(i for b in batches for i in b), list(range(len(lengths))))
+        for batch in batches:
+            if len(batch) > 1:
+                self.assertLessEqual(max(lengths[i] for i in batch) * len(batch), 80)
+    
+    def test_length_sorted(self):
+        """비슷한 길이끼리 묶임"""
+        lengths = [30, 2, 31, 3]
+        batches = plan_micro_batches(lengths, max_batch_tokens=1000, max_batch_size=2)
+        self.assertEqual(batches, [[1, 3], [0, 2]])
+    
+    def test_invalid_budget(self):
+        with self.assertRaises(ValueError):
+            plan_micro_batches([1, 2], max_batch_tokens=0, max_batch_size=1)
+    
+    def test_packed_rows_fit(self):
+        """모든 시퀀스가 한 번씩 배치되고 행 길이를 넘지 않음 (긴 시퀀스는 단독 행)"""
+        lengths = [5, 40, 7, 12, 39, 6, 100, 11]
+        batches = plan_packed_batches(lengths, row_length=50, max_batch_tokens=100)
+        rows = [row for batch in batches for row in batch]
+        
+        self.assertEqual(sorted(i for row in rows for i in row), list(range(len(lengths))))
+        self.assertIn([6], rows)
+        for row in rows:
+            if row != [6]:
+                self.assertLessEqual(sum(lengths[i] for i in row), 50)
+        self.assertEqual(len(rows), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.run import bench_analyzer, compare_results, latency_summary, make_corpus
+from tests.tiny_model import make_analyzer
+
+
+class TestBenchmarks(unittest.TestCase):
+    
+    def test_corpus_is_reproducible(self):
+        self.assertEqual(make_corpus(3, 4, seed=1), make_corpus(3, 4, seed=1))
+        self.assertNotEqual(make_corpus(3, 4, seed=1), make_corpus(3, 4, seed=2))
+    
+    def test_latency_summary(self):
+        summary = latency_summary([0.1, 0.2, 0.3, 0.4], sentences=10)
+        self.assertAlmostEqual(summary['sentences_per_second'], 10.0)
+        self.assertAlmostEqual(summary['p50_ms'], 250.0)
+        self.assertLessEqual(summary['p95_ms'], summary['p99_ms'])
+    
+    def test_bench_analyzer(self):
+        results = bench_analyzer(make_analyzer(cache_size=0), doc_sizes=[3], repeats=4, batch_docs=2)
+        self.assertEqual(
+            [r['name'] for r in results],
+            ['calculate_perplexity', 'analyze_sentences[3]', 'analyze_batch[2x3]']
+        )
+        self.assertTrue(all(r['sentences_per_second'] > 0 for r in results))
+    
+    def test_compare_flags_regressions(self):
+        def report(throughput, p95):
+            return {'results': [{'name': 'a', 'sentences_per_second': throughput, 'p95_ms': p95}]}
+        
+        self.assertEqual(compare_results(report(100, 10), report(95, 10.5), tolerance=0.1), [])
+        self.assertEqual(len(compare_results(report(100, 10), report(80, 10), tolerance=0.1)), 1)
+        self.assertEqual(len(compare_results(report(100, 10), report(100, 12), tolerance=0.1)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
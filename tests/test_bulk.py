@@ -0,0 +1,138 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import torch
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer import bulk
+from tests.tiny_model import patch_pretrained
+
+
+DOCS = [
+    "안녕하세요. 저는 컴퓨터 공학을 전공했습니다.",
+    "프로그래밍에 대한 열정이 있습니다.",
+    "",
+    "새로운 기술을 배우는 것을 좋아합니다. 감사합니다.",
+    "이를 통해 문제 해결 능력을 키웠습니다.",
+]
+
+
+class TestBulkScoring(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patcher = patch_pretrained()
+        self.patcher.start()
+    
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp.cleanup()
+    
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+    
+    def run_bulk(self, input_path: str, output_path: str, **kwargs):
+        return bulk.run_bulk(
+            input_path, output_path, workers=0, chunk_size=2,
+            threads_per_worker=torch.get_num_threads(),
+            analyzer_kwargs={'model_name': 'kogpt2', 'max_length': 128}, **kwargs
+        )
+    
+    def read_output(self, path: str):
+        with open(path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+    
+    def test_jsonl_and_csv_input(self):
+        jsonl_path = self.path('in.jsonl')
+        with open(jsonl_path, 'w', encoding='utf-8') as f:
+            for i, doc in enumerate(DOCS):
+                f.write(json.dumps({'id': f"doc-{i}", 'text': doc}, ensure_ascii=False) + '\n')
+        
+        csv_path = self.path('in.csv')
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            f.write('body\n' + '\n'.join(f'"{doc}"' for doc in DOCS) + '\n')
+        
+        summary = self.run_bulk(jsonl_path, self.path('out.jsonl'))
+        self.assertEqual(summary['docs'], len(DOCS))
+        rows = self.read_output(self.path('out.jsonl'))
+        self.assertEqual([r['id'] for r in rows], [f"doc-{i}" for i in range(len(DOCS))])
+        self.assertEqual(rows[0]['overall_stats']['total_sentences'], 2)
+        
+        self.run_bulk(csv_path, self.path('csv_out.jsonl'), text_field='body')
+        csv_rows = self.read_output(self.path('csv_out.jsonl'))
+        self.assertEqual([r['id'] for r in csv_rows], [str(i) for i in range(len(DOCS))])
+    
+    def test_resume_from_checkpoint(self):
+        """중단된 실행은 체크포인트 이후부터 이어서 처리됨"""
+        input_path = self.path('in.jsonl')
+        with open(input_path, 'w', encoding='utf-8') as f:
+            for i, doc in enumerate(DOCS):
+                f.write(json.dumps({'id': i, 'text': doc}, ensure_ascii=False) + '\n')
+        output_path = self.path('out.jsonl')
+        
+        original = bulk._analyze_chunk
+        calls = []
+        
+        def interrupted(records):
+            calls.append(records)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return original(records)
+        
+        with mock.patch.object(bulk, '_analyze_chunk', side_effect=interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_bulk(input_path, output_path)
+        
+        with open(output_path + '.ckpt', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['records_done'], 2)
+        
+        summary = self.run_bulk(input_path, output_path)
+        self.assertEqual(summary['docs'], 3)
+        self.assertEqual([r['id'] for r in self.read_output(output_path)], [str(i) for i in range(len(DOCS))])
+
+    
+    def test_score_store_follows_checkpoint(self):
+        """재개한 실행의 토큰 점수 저장소에 문서가 중복 없이 입력 순서대로 기록됨"""
+        from src.perplexity_analyzer.score_store import TokenScores
+        
+        input_path = self.path('in.jsonl')
+        with open(input_path, 'w', encoding='utf-8') as f:
+            for i, doc in enumerate(DOCS):
+                f.write(json.dumps({'id': i, 'text': doc}, ensure_ascii=False) + '\n')
+        output_path = self.path('out.jsonl')
+        store_path = self.path('store')
+        
+        original = bulk._analyze_chunk
+        calls = []
+        
+        def interrupted(records, **kwargs):
+            calls.append(records)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return original(records, **kwargs)
+        
+        with mock.patch.object(bulk, '_analyze_chunk', side_effect=interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_bulk(input_path, output_path, score_store_path=store_path)
+        self.run_bulk(input_path, output_path, score_store_path=store_path)
+        
+        rows = self.read_output(output_path)
+        self.assertNotIn('token_scores', rows[0])
+        scores = TokenScores(store_path)
+        self.assertEqual(scores.doc_ids, [str(i) for i in range(len(DOCS))])
+        self.assertEqual(scores.model, 'kogpt2')
+        rescored = scores.rescore()
+        self.assertEqual(
+            [d['overall_stats'] for d in scores.iter_documents(rescored)],
+            [row['overall_stats'] for row in rows]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.cache import PerplexityCache
+from tests.tiny_model import make_analyzer
+
+
+class TestPerplexityCache(unittest.TestCase):
+    
+    def test_lru_eviction(self):
+        """메모리 계층은 가장 오래 사용되지 않은 항목부터 제거"""
+        cache = PerplexityCache('test:512', max_entries=2)
+        a, b, c = (cache.make_key(t) for t in ("가", "나", "다"))
+        
+        cache.put_many({a: 1.0, b: 2.0})
+        cache.get_many([a])
+        cache.put_many({c: 3.0})
+        
+        self.assertEqual(cache.get_many([a, b, c]), {a: 1.0, c: 3.0})
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['memory_hits'], 3)
+    
+    def test_namespace_separates_keys(self):
+        """모델/설정이 다르면 같은 문장도 다른 키"""
+        self.assertNotEqual(
+            PerplexityCache('kogpt2:512').make_key("문장"),
+            PerplexityCache('kogpt2:256').make_key("문장")
+        )
+    
+    def test_disk_tier_persists(self):
+        """디스크 계층은 새 인스턴스(재시작, 다른 워커)에서도 조회됨"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.db')
+            writer = PerplexityCache('test:512', db_path=path)
+            key = writer.make_key("저는 컴퓨터 공학을 전공했습니다")
+            writer.put_many({key: 12.5})
+            
+            reader = PerplexityCache('test:512', db_path=path)
+            self.assertEqual(reader.get_many([key]), {key: 12.5})
+            self.assertEqual(reader.stats()['disk_hits'], 1)
+            
+            # 디스크에서 읽은 값은 메모리 계층으로 승격
+            reader.get_many([key])
+            self.assertEqual(reader.stats()['memory_hits'], 1)
+    
+    def test_disk_only_does_not_count_evictions(self):
+        """메모리 계층을 끄면 디스크 적중을 승격하지 않고 제거 횟수도 늘지 않음"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PerplexityCache('test:512', max_entries=0, db_path=os.path.join(tmp, 'cache.db'))
+            key = cache.make_key("저는 컴퓨터 공학을 전공했습니다")
+            cache.put_many({key: 12.5})
+            self.assertEqual(cache.get_many([key]), {key: 12.5})
+            self.assertEqual(cache.get_many([key]), {key: 12.5})
+            
+            stats = cache.stats()
+            self.assertEqual((stats['disk_hits'], stats['memory_hits']), (2, 0))
+            self.assertEqual((stats['evictions'], stats['memory_size']), (0, 0))
+    
+    def test_reconnects_after_fork(self):
+        """다른 프로세스(fork된 워커)에서는 SQLite 연결을 새로 연다"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = PerplexityCache('test:512', db_path=os.path.join(tmp, 'cache.db'))
+            parent_db = cache._db
+            
+            cache._db_pid = -1  # fork 이후 상황 흉내
+            key = cache.make_key("문장")
+            cache.put_many({key: 3.0})
+            
+            self.assertIsNot(cache._db, parent_db)
+            self.assertEqual(cache._db_pid, os.getpid())
+
+
+class TestAnalyzerCache(unittest.TestCase):
+    
+    def test_repeated_sentences_skip_model(self):
+        """캐시된 문장은 모델을 다시 실행하지 않음"""
+        analyzer = make_analyzer(cache_size=100)
+        sentences = ["저는 컴퓨터 공학을 전공했습니다", "프로그래밍에 대한 열정이 있습니다"]
+        
+        first = analyzer.calculate_perplexities(sentences)
+        with mock.patch.object(analyzer, '_score_batch') as score_batch:
+            second = analyzer.calculate_perplexities(sentences)
+        
+        score_batch.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(analyzer.get_model_info()['cache']['memory_hits'], 2)
+    
+    def test_cache_disabled(self):
+        analyzer = make_analyzer(cache_size=0)
+        self.assertIsNone(analyzer.cache)
+        self.assertIsNone(analyzer.get_model_info()['cache'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.api import gunicorn_conf
+from src.perplexity_analyzer import cpu_plan
+from src.perplexity_analyzer.cpu_plan import (
+    WorkerPlan, autotune, cgroup_cpu_limit, measure_plan, parse_cpu_sets, physical_cores, plan_workers
+)
+from src.perplexity_analyzer.testing import save_tiny_model
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class TestTopology(unittest.TestCase):
+    
+    def test_cgroup_v2_quota(self):
+        with tempfile.TemporaryDirectory() as root:
+            write(os.path.join(root, 'cpu.max'), "250000 100000\n")
+            self.assertEqual(cgroup_cpu_limit(root), 2.5)
+            write(os.path.join(root, 'cpu.max'), "max 100000\n")
+            self.assertIsNone(cgroup_cpu_limit(root))
+    
+    def test_cgroup_v1_quota(self):
+        with tempfile.TemporaryDirectory() as root:
+            write(os.path.join(root, 'cpu', 'cpu.cfs_quota_us'), "200000")
+            write(os.path.join(root, 'cpu', 'cpu.cfs_period_us'), "100000")
+            self.assertEqual(cgroup_cpu_limit(root), 2.0)
+            write(os.path.join(root, 'cpu', 'cpu.cfs_quota_us'), "-1")
+            self.assertIsNone(cgroup_cpu_limit(root))
+    
+    def test_quota_limits_cpu_count(self):
+        """컨테이너 할당량이 호스트 코어 수보다 작으면 할당량 기준"""
+        with tempfile.TemporaryDirectory() as root:
+            write(os.path.join(root, 'cpu.max'), "150000 100000")
+            with mock.patch.object(cpu_plan, 'available_cpus', return_value=list(range(64))):
+                self.assertEqual(cpu_plan.effective_cpu_count(root), 2)
+    
+    def test_smt_siblings_are_grouped(self):
+        with tempfile.TemporaryDirectory() as root:
+            for cpu, core in [(0, 0), (1, 1), (2, 0), (3, 1)]:
+                write(os.path.join(root, f'cpu{cpu}', 'topology', 'physical_package_id'), "0")
+                write(os.path.join(root, f'cpu{cpu}', 'topology', 'core_id'), str(core))
+            self.assertEqual(physical_cores([0, 1, 2, 3], root), [[0, 2], [1, 3]])
+
+
+class TestWorkerPlan(unittest.TestCase):
+    
+    def test_plan_does_not_oversubscribe(self):
+        with mock.patch.object(cpu_plan, 'available_cpus', return_value=list(range(16))):
+            plan = plan_workers(cpu_count=8)
+            self.assertEqual((plan.workers, plan.threads_per_worker), (2, 4))
+            
+            plan = plan_workers(workers=3, cpu_count=8)
+            self.assertEqual(plan.threads_per_worker, 2)
+            self.assertLessEqual(plan.workers * plan.threads_per_worker, 8)
+    
+    def test_pinned_cpu_sets_are_disjoint(self):
+        with mock.patch.object(cpu_plan, 'available_cpus', return_value=list(range(8))):
+            plan = plan_workers(threads_per_worker=2, pin=True, cpu_count=8)
+        
+        cpus = [cpu for cpu_set in plan.cpu_sets for cpu in cpu_set]
+        self.assertEqual(len(plan.cpu_sets), 4)
+        self.assertEqual(sorted(cpus), list(range(8)))
+        self.assertEqual(parse_cpu_sets(plan.env()['WORKER_CPU_SETS']), plan.cpu_sets)
+    
+    def test_save_and_load(self):
+        plan = WorkerPlan(workers=2, threads_per_worker=3, cpu_sets=[[0, 1, 2], [3, 4, 5]], cpus=6,
+                          sentences_per_second=120.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'plan.json')
+            plan.save(path)
+            self.assertEqual(WorkerPlan.load(path), plan)
+        self.assertEqual(plan.env()['TORCH_NUM_THREADS'], '3')
+    
+    def test_gunicorn_slots_are_reused(self):
+        """재시작된 워커는 죽은 워커의 슬롯(CPU 집합)을 이어받음"""
+        server = SimpleNamespace(WORKERS={})
+        for pid in (100, 101, 102):
+            worker = SimpleNamespace()
+            gunicorn_conf.pre_fork(server, worker)
+            server.WORKERS[pid] = worker
+        self.assertEqual([w.cpu_slot for w in server.WORKERS.values()], [0, 1, 2])
+        
+        del server.WORKERS[101]
+        worker = SimpleNamespace()
+        gunicorn_conf.pre_fork(server, worker)
+        self.assertEqual(worker.cpu_slot, 1)
+    
+    def test_measure_plan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = save_tiny_model(tmp)
+            throughput = measure_plan(
+                WorkerPlan(workers=1, threads_per_worker=1),
+                {'model_name': 'tiny', 'model_path': model_path, 'max_length': 128},
+                ["저는 컴퓨터 공학을 전공했습니다."],
+                duration=0.2
+            )
+        self.assertGreater(throughput, 0)
+    
+    def test_failed_worker_is_unmeasurable(self):
+        """모델 로드에 실패한 워커가 있으면 기다리지 않고 None"""
+        with tempfile.TemporaryDirectory() as tmp:
+            throughput = measure_plan(
+                WorkerPlan(workers=1, threads_per_worker=1),
+                {'model_name': 'tiny', 'model_path': os.path.join(tmp, 'missing')},
+                ["저는 컴퓨터 공학을 전공했습니다."],
+                duration=0.2,
+                timeout=60.0
+            )
+        self.assertIsNone(throughput)
+    
+    def test_autotune_falls_back_when_nothing_is_measured(self):
+        with mock.patch('src.perplexity_analyzer.cpu_plan.measure_plan', return_value=None):
+            plan = autotune({}, cpu_count=4)
+        self.assertEqual(plan.cpus, 4)
+        self.assertIsNone(plan.sentences_per_second)
+
+
+if __name__ == '__main__':
+    unittest.main()
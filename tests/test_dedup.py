@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.dedup import DuplicateIndex
+from tests.tiny_model import make_analyzer
+
+
+TEMPLATE = [
+    "저는 대학에서 컴퓨터 공학을 전공하며 다양한 프로젝트를 수행했습니다.",
+    "특히 데이터베이스 설계와 백엔드 개발에 깊은 관심을 가지고 있습니다.",
+    "팀 프로젝트에서 리더를 맡아 일정 관리와 협업을 주도했습니다.",
+    "이러한 경험을 바탕으로 귀사에 기여하고 싶습니다.",
+]
+EDITED = TEMPLATE[:3] + ["이러한 경험을 바탕으로 귀사의 성장에 기여하고 싶습니다."]
+UNRELATED = ["오늘은 날씨가 맑아서 공원에 산책을 다녀왔습니다.", "저녁에는 친구와 영화를 봤습니다."]
+
+
+class TestDuplicateIndex(unittest.TestCase):
+    
+    def test_finds_near_duplicates(self):
+        index = DuplicateIndex('test:512')
+        index.add('template', TEMPLATE, [10.0, 20.0, 30.0, 40.0])
+        index.add('other', UNRELATED, [50.0, 60.0])
+        
+        matches = index.query(EDITED)
+        self.assertEqual([m['doc_id'] for m in matches], ['template'])
+        self.assertGreater(matches[0]['similarity'], 0.5)
+        self.assertLess(matches[0]['similarity'], 1.0)
+    
+    def test_reuses_matched_sentences(self):
+        index = DuplicateIndex('test:512')
+        index.add('template', TEMPLATE, [10.0, 20.0, float('inf'), 40.0])
+        
+        near_duplicates, reused = index.match(EDITED)
+        self.assertEqual(near_duplicates[0]['doc_id'], 'template')
+        # 점수화에 실패했던 문장과 바뀐 문장은 재사용하지 않음
+        self.assertEqual(reused, {0: 10.0, 1: 20.0})
+        
+        _, reused = index.match(EDITED, exclude='template')
+        self.assertEqual(reused, {})
+    
+    def test_eviction(self):
+        index = DuplicateIndex('test:512', max_documents=1)
+        index.add('template', TEMPLATE, [10.0] * 4)
+        index.add('other', UNRELATED, [10.0] * 2)
+        
+        self.assertEqual(index.query(TEMPLATE), [])
+        self.assertEqual(index.stats()['evictions'], 1)
+    
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'dedup.db')
+            DuplicateIndex('test:512', db_path=path).add('template', TEMPLATE, [10.0] * 4)
+            
+            reloaded = DuplicateIndex('test:512', db_path=path)
+            self.assertEqual(reloaded.match(EDITED)[1][0], 10.0)
+            # 다른 모델 설정의 점수는 불러오지 않음
+            self.assertEqual(DuplicateIndex('other:512', db_path=path).stats()['documents'], 0)
+
+
+class TestDuplicateReuse(unittest.TestCase):
+    
+    def test_copied_sentences_skip_the_model(self):
+        analyzer = make_analyzer(cache_size=0, dedup_max_documents=100)
+        first = analyzer.analyze_sentences(" ".join(TEMPLATE), doc_id='template')
+        self.assertEqual(first['near_duplicates'], [])
+        
+        with mock.patch.object(analyzer, 'calculate_perplexities', wraps=analyzer.calculate_perplexities) as calculate:
+            result = analyzer.analyze_sentences(" ".join(EDITED), doc_id='edited')
+        
+        self.assertEqual(calculate.call_args[0][0], [EDITED[3]])
+        self.assertEqual(result['near_duplicates'][0]['doc_id'], 'template')
+        sentences = result['ai_suspicious_sentences'] + result['natural_sentences']
+        stages = {s['text']: s['stage'] for s in sentences}
+        self.assertEqual(stages[EDITED[0]], 'duplicate')
+        self.assertEqual(stages[EDITED[3]], 'model')
+    
+    def test_batch_matches_earlier_documents(self):
+        analyzer = make_analyzer(cache_size=0, dedup_max_documents=100)
+        analyzer.analyze_batch([" ".join(TEMPLATE)], doc_ids=['template'])
+        results = analyzer.analyze_batch([" ".join(EDITED), " ".join(UNRELATED)])
+        
+        self.assertEqual(results[0]['near_duplicates'][0]['doc_id'], 'template')
+        self.assertEqual(results[1]['near_duplicates'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
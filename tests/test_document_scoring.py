@@ -0,0 +1,85 @@
+import math
+import unittest
+import sys
+import os
+
+import torch
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.analyzer import token_negative_log_likelihood
+from tests.tiny_model import make_analyzer
+
+
+SENTENCES = [
+    "안녕하세요",
+    "저는 컴퓨터 공학을 전공했습니다",
+    "프로그래밍에 대한 열정이 있습니다",
+    "새로운 기술을 배우는 것을 좋아합니다",
+    "이를 통해 문제 해결 능력을 키웠습니다",
+]
+
+
+class TestDocumentScoring(unittest.TestCase):
+    
+    def full_pass_token_nll(self, analyzer, document: str):
+        encoding = analyzer.tokenizer(document, return_tensors='pt')
+        with torch.no_grad():
+            logits = analyzer.model(**encoding).logits
+        return [float('nan')] + token_negative_log_likelihood(logits, encoding['input_ids'])[0].tolist()
+    
+    def test_single_window_matches_full_pass(self):
+        """윈도우 하나로 충분한 문서는 전체 단일 forward 결과와 동일"""
+        analyzer = make_analyzer(max_length=256, scoring_mode='document')
+        document = ' '.join(SENTENCES)
+        
+        expected = self.full_pass_token_nll(analyzer, document)
+        actual = analyzer._document_token_nll(analyzer.tokenizer(document)['input_ids'])
+        
+        self.assertTrue(math.isnan(actual[0]))
+        for got, want in zip(actual[1:], expected[1:]):
+            self.assertAlmostEqual(got, want, places=4)
+    
+    def test_sliding_window_scores_every_token(self):
+        """max_length보다 긴 문서도 잘리지 않고 모든 문장이 점수화됨"""
+        analyzer = make_analyzer(max_length=16, window_stride=8, scoring_mode='document')
+        input_ids = analyzer.tokenizer(' '.join(SENTENCES))['input_ids']
+        self.assertGreater(len(input_ids), 16)
+        
+        token_nll = analyzer._document_token_nll(input_ids)
+        self.assertEqual(len(token_nll), len(input_ids))
+        self.assertTrue(all(math.isfinite(v) for v in token_nll[1:]))
+        
+        perplexities = analyzer.calculate_document_perplexities(SENTENCES)
+        self.assertTrue(all(math.isfinite(p) for p in perplexities))
+    
+    def test_sentence_perplexity_from_token_spans(self):
+        """문장 perplexity는 해당 문장 토큰들의 평균 NLL로 계산"""
+        analyzer = make_analyzer(max_length=256, scoring_mode='document')
+        document = ' '.join(SENTENCES)
+        token_nll = self.full_pass_token_nll(analyzer, document)
+        offsets = analyzer.tokenizer(document, return_offsets_mapping=True)['offset_mapping']
+        
+        start = document.index(SENTENCES[2])
+        end = start + len(SENTENCES[2])
+        values = [token_nll[t] for t, (s, e) in enumerate(offsets) if t > 0 and start <= e - 1 < end]
+        
+        perplexities = analyzer.calculate_document_perplexities(SENTENCES)
+        self.assertAlmostEqual(perplexities[2], math.exp(sum(values) / len(values)), places=3)
+    
+    def test_analyze_sentences_document_mode(self):
+        analyzer = make_analyzer(scoring_mode='document')
+        result = analyzer.analyze_sentences(". ".join(SENTENCES) + ".")
+        self.assertEqual(result['overall_stats']['total_sentences'], len(SENTENCES))
+        self.assertEqual(analyzer.analyze_sentences("")['overall_stats']['total_sentences'], 0)
+    
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            make_analyzer(scoring_mode='paragraph')
+        with self.assertRaises(ValueError):
+            make_analyzer(max_length=16, window_stride=16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.api.jobs import JobQueue, JobWorker
+
+
+async def fake_analyze(texts, model, start):
+    return [json.dumps({'text_id': start + i, 'text': text}) for i, text in enumerate(texts)]
+
+
+class TestJobQueue(unittest.TestCase):
+    
+    def test_chunks_are_recorded_in_order(self):
+        queue = JobQueue()
+        job = queue.submit(["a", "b", "c"], model='kogpt2')
+        self.assertEqual((job['status'], job['total'], job['completed']), ('queued', 3, 0))
+        
+        claimed = queue.claim()
+        self.assertEqual(claimed['id'], job['id'])
+        self.assertIsNone(queue.claim())
+        
+        self.assertEqual(queue.texts(job['id'], 0, 2), ["a", "b"])
+        self.assertTrue(queue.complete_chunk(job['id'], 0, ['r0', 'r1']))
+        self.assertEqual(queue.get(job['id'])['status'], 'running')
+        self.assertTrue(queue.complete_chunk(job['id'], 2, ['r2']))
+        
+        self.assertEqual(queue.get(job['id'])['status'], 'completed')
+        self.assertEqual(queue.results(job['id'], offset=1, limit=5), ['r1', 'r2'])
+    
+    def test_retry_then_fail(self):
+        queue = JobQueue(max_attempts=2)
+        job = queue.submit(["a"])
+        
+        queue.claim()
+        self.assertEqual(queue.fail(job['id'], "boom"), 'queued')
+        # 백오프 동안은 다시 가져가지 않음
+        self.assertIsNone(queue.claim())
+        with mock.patch('src.api.jobs.time.time', return_value=queue.get(job['id'])['updated_at'] + 5):
+            self.assertIsNotNone(queue.claim())
+            self.assertEqual(queue.fail(job['id'], "boom"), 'failed')
+        
+        failed = queue.get(job['id'])
+        self.assertEqual((failed['status'], failed['attempts'], failed['error']), ('failed', 2, "boom"))
+    
+    def test_expired_lease_is_resumed_by_another_worker(self):
+        """lease가 만료된 작업은 다른 프로세스가 남은 텍스트부터 이어서 처리"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'jobs.sqlite3')
+            first = JobQueue(db_path=path, lease_seconds=10.0)
+            second = JobQueue(db_path=path, lease_seconds=10.0)
+            job = first.submit(["a", "b"])
+            
+            first.claim()
+            first.complete_chunk(job['id'], 0, ['r0'])
+            self.assertIsNone(second.claim())
+            
+            now = first.get(job['id'])['updated_at']
+            with mock.patch('src.api.jobs.time.time', return_value=now + 11):
+                resumed = second.claim()
+            self.assertEqual(resumed['completed'], 1)
+            
+            # 이전 소유자는 lease를 잃어 결과를 기록하지 못함
+            self.assertFalse(first.complete_chunk(job['id'], 1, ['stale']))
+            self.assertTrue(second.complete_chunk(job['id'], 1, ['r1']))
+            self.assertEqual(second.results(job['id']), ['r0', 'r1'])
+    
+    def test_stale_worker_cannot_fail_a_resumed_job(self):
+        """lease를 잃은 워커의 실패 기록은 새 소유자의 작업을 바꾸지 않음"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'jobs.sqlite3')
+            first = JobQueue(db_path=path, lease_seconds=10.0, max_attempts=2)
+            second = JobQueue(db_path=path, lease_seconds=10.0, max_attempts=2)
+            job = first.submit(["a"])
+            
+            first.claim()
+            now = first.get(job['id'])['updated_at']
+            with mock.patch('src.api.jobs.time.time', return_value=now + 11):
+                self.assertIsNotNone(second.claim())
+            
+            # 재시도 횟수를 다 쓴 뒤에도 이전 소유자는 작업을 실패로 바꾸지 못함
+            self.assertEqual(first.fail(job['id'], "stale"), 'running')
+            self.assertTrue(second.complete_chunk(job['id'], 0, ['r0']))
+            self.assertEqual(second.get(job['id'])['status'], 'completed')
+    
+    def test_ttl_purge(self):
+        queue = JobQueue(ttl_seconds=60.0)
+        job = queue.submit([])
+        self.assertEqual(queue.get(job['id'])['status'], 'completed')
+        
+        self.assertEqual(queue.purge(), 0)
+        with mock.patch('src.api.jobs.time.time', return_value=job['updated_at'] + 61):
+            self.assertEqual(queue.purge(), 1)
+        self.assertIsNone(queue.get(job['id']))
+
+
+class TestJobWorker(unittest.TestCase):
+    
+    def run_worker(self, queue, analyze, until):
+        async def main():
+            worker = JobWorker(queue, analyze, chunk_size=2, poll_interval=0.01)
+            await worker.start()
+            for _ in range(500):
+                if until():
+                    break
+                await asyncio.sleep(0.01)
+            await worker.stop()
+        asyncio.run(main())
+    
+    def test_drains_queue(self):
+        queue = JobQueue()
+        job = queue.submit(["a", "b", "c", "d", "e"])
+        self.run_worker(queue, fake_analyze, lambda: queue.get(job['id'])['status'] == 'completed')
+        
+        results = [json.loads(r) for r in queue.results(job['id'])]
+        self.assertEqual([r['text_id'] for r in results], [0, 1, 2, 3, 4])
+        self.assertEqual([r['text'] for r in results], ["a", "b", "c", "d", "e"])
+    
+    def test_failure_is_recorded(self):
+        async def failing(texts, model, start):
+            raise RuntimeError("model crashed")
+        
+        queue = JobQueue(max_attempts=1)
+        job = queue.submit(["a"])
+        self.run_worker(queue, failing, lambda: queue.get(job['id'])['status'] == 'failed')
+        self.assertEqual(queue.get(job['id'])['error'], "model crashed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import unittest
+import sys
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import copy
+import subprocess
+import tempfile
+
+import torch
+
+from src.perplexity_analyzer.models import ModelManager, apply_precision
+from src.perplexity_analyzer.precision_report import compare_precision
+from src.perplexity_analyzer.testing import save_tiny_model
+from tests.tiny_model import build_tiny_model, make_analyzer
+
+
+class TestModelManager(unittest.TestCase):
+    
+    def test_load_local_safetensors_dir(self):
+        """로컬 디렉터리의 safetensors 가중치를 허브 조회 없이 로드"""
+        with tempfile.TemporaryDirectory() as tmp:
+            save_tiny_model(tmp)
+            self.assertTrue(os.path.exists(os.path.join(tmp, 'model.safetensors')))
+            
+            model, tokenizer = ModelManager().load_model('tiny', model_path=tmp)
+            reference, _ = build_tiny_model()
+            for (name, param), ref in zip(model.state_dict().items(), reference.state_dict().values()):
+                self.assertTrue(torch.equal(param, ref), name)
+            self.assertEqual(tokenizer.padding_side, 'right')
+    
+    def test_api_import_is_lazy(self):
+        """API 모듈 임포트시 torch/transformers를 불러오지 않아 기동이 빠름"""
+        code = (
+            "import sys; import src.api.main; import src.perplexity_analyzer; "
+            "print('torch' in sys.modules, 'transformers' in sys.modules)"
+        )
+        root = os.path.join(os.path.dirname(__file__), '..')
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), 'False False')
+    
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires fork")
+    def test_forked_worker_uses_shared_weights(self):
+        """fork된 프로세스에서 preload한 가중치를 copy-on-write로 공유해 추론 가능"""
+        model, tokenizer = build_tiny_model()
+        
+        pid = os.fork()
+        if pid == 0:
+            try:
+                inputs = tokenizer("안녕하세요", return_tensors='pt')
+                model(**inputs)
+                os._exit(0)
+            except BaseException:
+                os._exit(1)
+        
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+
+
+class TestPrecision(unittest.TestCase):
+    
+    def test_int8_replaces_conv1d_and_stays_close(self):
+        """int8 모드는 Conv1D를 Linear로 바꿔 양자화하며 출력이 fp32와 근접"""
+        model, tokenizer = build_tiny_model()
+        quantized = apply_precision(copy.deepcopy(model), 'int8')
+        
+        module_names = {type(m).__name__ for m in quantized.modules()}
+        self.assertNotIn('Conv1D', module_names)
+        self.assertTrue(any(
+            isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in quantized.modules()
+        ))
+        
+        inputs = tokenizer("저는 컴퓨터 공학을 전공했습니다", return_tensors='pt')
+        with torch.no_grad():
+            expected = model(**inputs).logits
+            actual = quantized(**inputs).logits
+        self.assertLess((actual - expected).abs().max().item(), 0.1)
+    
+    def test_invalid_precision(self):
+        with self.assertRaises(ValueError):
+            make_analyzer(precision='fp8')
+    
+    def test_precision_report(self):
+        """fp32 대비 perplexity 변화와 분류 일치율 보고"""
+        reference = make_analyzer(precision='fp32', cache_size=0)
+        candidate = make_analyzer(precision='bf16', cache_size=0)
+        self.assertEqual(candidate.get_model_info()['precision'], 'bf16')
+        
+        sentences = ["저는 컴퓨터 공학을 전공했습니다", "프로그래밍에 대한 열정이 있습니다", "감사합니다"]
+        report = compare_precision(reference, candidate, sentences)
+        
+        self.assertEqual(report['compared_sentences'], 3)
+        self.assertGreaterEqual(report['classification_agreement'], 0.0)
+        self.assertLessEqual(report['classification_agreement'], 1.0)
+        self.assertLess(report['relative_drift']['max'], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,41 +5,41 @@ import os
 # 프로젝트 루트 디렉토리를 Python 경로에 추가
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.perplexity_analyzer import PerplexityAnalyzer
+from tests.tiny_model import make_analyzer
 
 
 class TestPerplexityAnalyzer(unittest.TestCase):
     
     @classmethod
     def setUpClass(cls):
-        """테스트 클래스 초기화 (모델 로딩은 한 번만)"""
-        cls.analyzer = PerplexityAnalyzer(model_name='gpt2')
+        """테스트 클래스 초기화 (모델 로딩은 한 번만, 네트워크 없이 작은 모델 사용)"""
+        cls.analyzer = make_analyzer()
     
     def test_analyzer_initialization(self):
         """분석기 초기화 테스트"""
         self.assertIsNotNone(self.analyzer.model)
         self.assertIsNotNone(self.analyzer.tokenizer)
-        self.assertEqual(self.analyzer.LOG_PPL_THRESHOLD, 1.474)
+        self.assertEqual(self.analyzer.perplexity_threshold, 28.0)
     
-    def test_log_perplexity_calculation(self):
-        """로그 perplexity 계산 테스트"""
+    def test_perplexity_calculation(self):
+        """perplexity 계산 테스트"""
         test_text = "This is a simple test sentence."
-        log_ppl = self.analyzer.calculate_log_perplexity(test_text)
+        ppl = self.analyzer.calculate_perplexity(test_text)
         
-        self.assertIsInstance(log_ppl, float)
-        self.assertGreater(log_ppl, 0)
-        self.assertNotEqual(log_ppl, float('inf'))
+        self.assertIsInstance(ppl, float)
+        self.assertGreater(ppl, 1.0)
+        self.assertNotEqual(ppl, float('inf'))
     
     def test_sentence_classification(self):
         """문장 분류 테스트"""
-        # AI 의심 문장 (낮은 로그 perplexity)
-        ai_result = self.analyzer.classify_sentence(1.0)
+        # AI 의심 문장 (낮은 perplexity)
+        ai_result = self.analyzer.classify_sentence(10.0)
         self.assertEqual(ai_result['classification'], 'AI_SUSPICIOUS')
         self.assertTrue(ai_result['ai_suspicious'])
         self.assertGreater(ai_result['confidence'], 0)
         
-        # 자연스러운 문장 (높은 로그 perplexity)
-        natural_result = self.analyzer.classify_sentence(2.0)
+        # 자연스러운 문장 (높은 perplexity)
+        natural_result = self.analyzer.classify_sentence(50.0)
         self.assertEqual(natural_result['classification'], 'NATURAL')
         self.assertFalse(natural_result['ai_suspicious'])
         
@@ -94,14 +94,39 @@ class TestPerplexityAnalyzer(unittest.TestCase):
             self.assertEqual(result['text_id'], i)
             self.assertIn('overall_stats', result)
     
+    def test_warmup(self):
+        """워밍업은 대표 길이로 forward만 실행하고 캐시를 채우지 않음"""
+        analyzer = make_analyzer(cache_size=100)
+        runs = analyzer.warmup(lengths=[8, 64, 1000])
+        
+        self.assertEqual(runs, 6)
+        self.assertEqual(analyzer.cache.stats()['memory_size'], 0)
+    
+    def test_columns_match_result(self):
+        """병렬 배열 결과가 문장별 결과와 같은 분류, 통계, 권장사항을 가짐"""
+        perplexities = [10.0, 50.0, float('inf'), 2.0]
+        spans = [(0, 5), (6, 10), (11, 12), (13, 20)]
+        stages = ['model', 'prefilter', 'model', 'duplicate']
+        columns = self.analyzer.build_columns(perplexities, spans, stages)
+        result = self.analyzer.build_result(['a', 'b', 'c', 'd'], perplexities, spans, stages)
+        
+        self.assertEqual(columns['classes'], [1, 0, 2, 1])
+        self.assertEqual(columns['stages'], [0, 1, 0, 2])
+        self.assertEqual(columns['perplexities'][2], None)
+        self.assertEqual(columns['starts'], [0, 6, 11, 13])
+        self.assertEqual(columns['overall_stats'], result['overall_stats'])
+        self.assertEqual(columns['recommendations'], result['recommendations'])
+        for sentence in result['ai_suspicious_sentences'] + result['natural_sentences']:
+            self.assertEqual(columns['confidences'][sentence['position']], sentence['confidence'])
+    
     def test_model_info(self):
         """모델 정보 테스트"""
         info = self.analyzer.get_model_info()
         
         self.assertIn('model_name', info)
         self.assertIn('device', info)
-        self.assertIn('log_ppl_threshold', info)
-        self.assertEqual(info['model_name'], 'gpt2')
+        self.assertIn('perplexity_threshold', info)
+        self.assertEqual(info['model_name'], 'kogpt2')
 
 
 if __name__ == '__main__':
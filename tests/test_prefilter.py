@@ -0,0 +1,116 @@
+import math
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.prefilter import CharNgramModel, compare_cascade, needs_escalation
+from tests.tiny_model import make_analyzer
+
+
+CORPUS = [
+    "저는 컴퓨터 공학을 전공했습니다.",
+    "프로그래밍에 대한 열정이 있습니다.",
+    "새로운 기술을 배우는 것을 좋아합니다.",
+    "팀 프로젝트에서 백엔드 개발을 담당했습니다.",
+    "문제 해결 능력을 키웠습니다.",
+] * 20
+
+
+class TestCharNgramModel(unittest.TestCase):
+    
+    def setUp(self):
+        self.model = CharNgramModel(order=3).fit(CORPUS)
+    
+    def test_seen_text_is_less_perplexing(self):
+        seen = self.model.log_perplexity("저는 컴퓨터 공학을 전공했습니다.")
+        unseen = self.model.log_perplexity("qzx 뷁 쿆 xqz")
+        self.assertLess(seen, unseen)
+        self.assertEqual(self.model.log_perplexity(""), float('inf'))
+    
+    def test_calibration_maps_to_model_scale(self):
+        sentences = CORPUS[:5] + ["완전히 다른 종류의 문장입니다", "qzx 뷁 쿆"]
+        # 목표값을 n-gram 값의 선형 함수로 만들어 정확히 복원되는지 확인
+        targets = [math.exp(2.0 * self.model.log_perplexity(s) + 1.0) for s in sentences]
+        report = self.model.calibrate(sentences, targets)
+        
+        self.assertAlmostEqual(report['slope'], 2.0, places=6)
+        self.assertAlmostEqual(report['intercept'], 1.0, places=6)
+        self.assertAlmostEqual(self.model.estimate_perplexity(sentences[-1]), targets[-1], places=4)
+    
+    def test_save_and_load(self):
+        self.model.calibration = (1.5, 0.3)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'prefilter.json')
+            self.model.save(path)
+            loaded = CharNgramModel.load(path)
+        
+        text = "컴퓨터 공학에 열정이 있습니다."
+        self.assertAlmostEqual(loaded.estimate_perplexity(text), self.model.estimate_perplexity(text))
+    
+    def test_needs_escalation(self):
+        self.assertTrue(needs_escalation(28.0, 28.0, 0.4))
+        self.assertTrue(needs_escalation(float('inf'), 28.0, 0.4))
+        self.assertFalse(needs_escalation(5.0, 28.0, 0.4))
+        self.assertFalse(needs_escalation(200.0, 28.0, 0.4))
+
+
+class TestCascadeScoring(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp.name, 'prefilter.json')
+        CharNgramModel(order=3).fit(CORPUS).save(cls.path)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+    
+    def test_wide_band_matches_full_scoring(self):
+        """모든 문장이 모델로 넘어가면 캐스케이드 없는 결과와 같음"""
+        analyzer = make_analyzer(prefilter_path=self.path, cascade_band=100.0, cache_size=0)
+        sentences = CORPUS[:5]
+        perplexities, stages = analyzer.score_sentences(sentences)
+        
+        self.assertEqual(stages, ['model'] * 5)
+        self.assertEqual(perplexities, analyzer.calculate_perplexities(sentences))
+    
+    def test_zero_band_skips_the_model(self):
+        analyzer = make_analyzer(prefilter_path=self.path, cascade_band=0.0, cache_size=0)
+        with mock.patch.object(analyzer, '_score_batch') as score_batch:
+            result = analyzer.analyze_sentences(" ".join(CORPUS[:5]))
+        
+        score_batch.assert_not_called()
+        sentences = result['ai_suspicious_sentences'] + result['natural_sentences']
+        self.assertEqual(len(sentences), 5)
+        self.assertTrue(all(s['stage'] == 'prefilter' for s in sentences))
+    
+    def test_estimates_are_not_reused_as_duplicates(self):
+        """n-gram 추정치는 near-duplicate 인덱스에 재사용할 점수로 등록되지 않음"""
+        analyzer = make_analyzer(prefilter_path=self.path, cascade_band=0.0, cache_size=0,
+                                 dedup_max_documents=100)
+        text = " ".join(CORPUS[:5])
+        analyzer.analyze_sentences(text, doc_id='first')
+        result = analyzer.analyze_sentences(text, doc_id='second')
+        
+        self.assertEqual(result['near_duplicates'][0]['doc_id'], 'first')
+        sentences = result['ai_suspicious_sentences'] + result['natural_sentences']
+        self.assertTrue(all(s['stage'] == 'prefilter' for s in sentences))
+    
+    def test_compare_cascade(self):
+        analyzer = make_analyzer(cache_size=0)
+        report = compare_cascade(analyzer, CharNgramModel.load(self.path), CORPUS[:5], bands=[0.0, 100.0])
+        
+        self.assertEqual(report['compared_sentences'], 5)
+        self.assertEqual(report['bands'][0]['prefilter_ratio'], 1.0)
+        self.assertEqual(report['bands'][1]['prefilter_ratio'], 0.0)
+        self.assertEqual(report['bands'][1]['classification_agreement'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
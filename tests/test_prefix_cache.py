@@ -0,0 +1,124 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+import torch
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.prefix_cache import PrefixCache
+from tests.tiny_model import make_analyzer
+
+
+# 같은 표현으로 시작하는 이력서 문장들
+SENTENCES = [
+    "저는 책임감이 강한 사람으로서 맡은 일을 끝까지 해냅니다",
+    "저는 책임감이 강한 사람으로서 팀원들과 협력했습니다",
+    "이를 통해 문제 해결 능력을 키웠습니다",
+    "이를 통해 문제 해결 능력을 키울 수 있었습니다",
+    "저는 책임감이 강한 사람입니다",
+    "This is a simple test sentence",
+    "이를 통해 고객의 입장에서 생각하는 법을 배웠습니다",
+]
+
+
+class TestPrefixCachedScoring(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = make_analyzer(prefix_cache_mb=8, cache_size=0)
+        cls.reference = make_analyzer(cache_size=0)
+    
+    def test_matches_uncached(self):
+        """캐시된 prefix 이후만 forward 해도 전체 forward와 점수가 동일"""
+        for sentences in (SENTENCES * 2, SENTENCES[::-1]):
+            expected_nll = [[] for _ in sentences]
+            actual_nll = [[] for _ in sentences]
+            expected = self.reference.calculate_perplexities(sentences, token_nll=expected_nll)
+            actual = self.analyzer.calculate_perplexities(sentences, token_nll=actual_nll)
+            
+            for ppl, expected_ppl in zip(actual, expected):
+                self.assertAlmostEqual(ppl, expected_ppl, delta=expected_ppl * 1e-5)
+            for nll, expected_values in zip(actual_nll, expected_nll):
+                self.assertEqual(len(nll), len(expected_values))
+                for value, expected_value in zip(nll, expected_values):
+                    self.assertAlmostEqual(value, expected_value, places=4)
+    
+    def test_reuses_shared_prefixes(self):
+        """반복되는 앞부분은 저장되어 이후 문장의 forward 토큰이 줄어듦"""
+        analyzer = make_analyzer(prefix_cache_mb=8, cache_size=0)
+        forwarded = {}
+        for name, target in (('cached', analyzer), ('reference', self.reference)):
+            observed = []
+            with mock.patch.object(target.instrumentation, 'observe_forward',
+                                   side_effect=lambda **kw: observed.append(kw['tokens'])):
+                target.calculate_perplexities(SENTENCES * 2)
+            forwarded[name] = sum(observed)
+        self.assertLess(forwarded['cached'], forwarded['reference'])
+        
+        stats = analyzer.get_model_info()['prefix_cache']
+        self.assertGreater(stats['hits'], 0)
+        self.assertGreater(stats['reused_tokens'], 0)
+        self.assertGreater(stats['entries'], 0)
+        self.assertLessEqual(stats['memory_bytes'], 8 * 1024 * 1024)
+    
+    def test_requires_padded_torch_execution(self):
+        with self.assertRaises(ValueError):
+            make_analyzer(prefix_cache_mb=8, execution_strategy='packed')
+        with self.assertRaises(ValueError):
+            make_analyzer(prefix_cache_mb=8, backend='onnx')
+
+
+class TestPrefixCache(unittest.TestCase):
+    
+    def make_layers(self, length: int):
+        return [(torch.zeros(2, length, 4), torch.zeros(2, length, 4))]
+    
+    def test_stores_only_repeated_prefixes(self):
+        cache = PrefixCache(max_bytes=1 << 20, min_prefix_tokens=2)
+        self.assertEqual(cache.observe([1, 2, 3, 4]), 0)
+        self.assertEqual(cache.observe([1, 2, 3, 5]), 3)
+        cache.insert([1, 2, 3], self.make_layers(3), torch.zeros(2))
+        # 이미 저장된 prefix는 다시 저장하지 않음
+        self.assertEqual(cache.observe([1, 2, 3, 6]), 0)
+        
+        depth, entry = cache.lookup([1, 2, 3, 7, 8])
+        self.assertEqual(depth, 3)
+        self.assertEqual(entry.tokens, (1, 2, 3))
+        # 저장된 prefix보다 짧게 일치해도 그 길이만큼 재사용
+        self.assertEqual(cache.lookup([1, 2, 9])[0], 2)
+        self.assertEqual(cache.lookup([4, 5, 6]), (0, None))
+        
+        stats = cache.stats()
+        self.assertEqual((stats['lookups'], stats['hits']), (3, 2))
+        self.assertEqual(stats['reused_tokens'], 2 + 1)
+    
+    def test_evicts_least_recently_used(self):
+        cache = PrefixCache(max_bytes=1 << 20, min_prefix_tokens=2)
+        cache.insert([1, 2], self.make_layers(2), torch.zeros(1))
+        entry_bytes = cache.stats()['memory_bytes']
+        
+        cache = PrefixCache(max_bytes=entry_bytes * 2, min_prefix_tokens=2)
+        cache.insert([1, 2], self.make_layers(2), torch.zeros(1))
+        cache.insert([3, 4], self.make_layers(2), torch.zeros(1))
+        cache.lookup([1, 2, 5])
+        cache.insert([5, 6], self.make_layers(2), torch.zeros(1))
+        
+        self.assertEqual(cache.lookup([3, 4, 5]), (0, None))
+        self.assertEqual(cache.lookup([1, 2, 5])[0], 2)
+        self.assertEqual(cache.lookup([5, 6, 7])[0], 2)
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertLessEqual(stats['memory_bytes'], entry_bytes * 2)
+    
+    def test_prunes_unshared_paths(self):
+        cache = PrefixCache(max_bytes=1 << 20, max_prefix_tokens=4, min_prefix_tokens=2, max_nodes=40)
+        for start in range(20):
+            cache.observe([100 + start, 1, 2, 3])
+        self.assertLessEqual(cache.stats()['nodes'], 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.models import model_memory_bytes
+from src.perplexity_analyzer.registry import ModelRegistry, parse_model_specs
+from src.perplexity_analyzer.utils import detect_script
+from tests.tiny_model import build_tiny_model, make_analyzer
+
+
+class TestModelRegistry(unittest.TestCase):
+    
+    def setUp(self):
+        self.model, _ = build_tiny_model()
+        self.loads = []
+        
+        def loader(spec):
+            self.loads.append(spec.name)
+            return SimpleNamespace(model=self.model, perplexity_threshold=spec.perplexity_threshold)
+        
+        self.specs = parse_model_specs('kogpt2:hangul,gpt2:latin,extra', thresholds='gpt2=35')
+        self.loader = loader
+    
+    def test_parse_model_specs(self):
+        self.assertEqual([s.scripts for s in self.specs], [('hangul',), ('latin',), ()])
+        self.assertEqual(self.specs[1].perplexity_threshold, 35.0)
+        with self.assertRaises(ValueError):
+            parse_model_specs('kogpt2:cyrillic')
+    
+    def test_resolve_by_script(self):
+        registry = ModelRegistry(self.specs, self.loader)
+        self.assertEqual(registry.resolve(text="저는 Python과 Django로 백엔드를 개발했습니다."), 'kogpt2')
+        self.assertEqual(registry.resolve(text="I built the backend with Django."), 'gpt2')
+        self.assertEqual(registry.resolve(text="2024-01"), 'kogpt2')
+        self.assertEqual(registry.resolve('extra', text="I built it."), 'extra')
+        with self.assertRaises(ValueError):
+            registry.resolve('missing')
+    
+    def test_lazy_load_and_lru_eviction(self):
+        """예산을 넘으면 가장 오래 사용하지 않은 모델부터 제거하고, 다시 요청하면 로드"""
+        budget_mb = model_memory_bytes(self.model) * 2.5 / (1024 * 1024)
+        registry = ModelRegistry(self.specs, self.loader, memory_budget_mb=budget_mb)
+        self.assertEqual(registry.loaded(), [])
+        
+        registry.get('kogpt2')
+        registry.get('gpt2')
+        registry.get('kogpt2')
+        registry.get('extra')
+        self.assertEqual(registry.loaded(), ['kogpt2', 'extra'])
+        
+        registry.get('gpt2')
+        self.assertEqual(self.loads, ['kogpt2', 'gpt2', 'extra', 'gpt2'])
+        self.assertEqual(registry.stats()['evictions'], 2)
+    
+    def test_default_model_is_not_evicted(self):
+        """예산이 모델 하나뿐이어도 preload한 기본 모델은 남기고 다른 모델만 교체"""
+        budget_mb = model_memory_bytes(self.model) * 1.5 / (1024 * 1024)
+        registry = ModelRegistry(self.specs, self.loader, memory_budget_mb=budget_mb)
+        registry.put('kogpt2', self.loader(self.specs[0]))
+        
+        registry.get('gpt2')
+        self.assertEqual(registry.loaded(), ['kogpt2', 'gpt2'])
+        registry.get('extra')
+        self.assertEqual(registry.loaded(), ['kogpt2', 'extra'])
+        
+        registry.get('kogpt2')
+        self.assertEqual(self.loads, ['kogpt2', 'gpt2', 'extra'])
+        self.assertEqual(registry.stats()['evictions'], 1)
+    
+    def test_info(self):
+        registry = ModelRegistry(self.specs, self.loader, default='gpt2')
+        registry.get('gpt2')
+        info = {m['name']: m for m in registry.info()}
+        
+        self.assertTrue(info['gpt2']['default'])
+        self.assertTrue(info['gpt2']['loaded'])
+        self.assertGreater(info['gpt2']['memory_mb'], 0)
+        self.assertEqual(info['kogpt2']['perplexity_threshold'], 28.0)
+
+
+class TestModelThreshold(unittest.TestCase):
+    
+    def test_threshold_is_per_model(self):
+        analyzer = make_analyzer(perplexity_threshold=40.0)
+        self.assertEqual(analyzer.classify_sentence(35.0)['classification'], 'AI_SUSPICIOUS')
+        self.assertEqual(analyzer.get_model_info()['perplexity_threshold'], 40.0)
+    
+    def test_detect_script(self):
+        self.assertEqual(detect_script("안녕하세요"), 'hangul')
+        self.assertEqual(detect_script("Hello world"), 'latin')
+        self.assertIsNone(detect_script("123 - 456"))
+
+
+if __name__ == '__main__':
+    unittest.main()
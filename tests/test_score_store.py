@@ -0,0 +1,185 @@
+import json
+import math
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.analyzer import CLASS_CODES
+from src.perplexity_analyzer.score_store import TokenScores, TokenScoreStore, main
+from tests.tiny_model import make_analyzer
+
+
+TEXTS = [
+    "안녕하세요. 저는 컴퓨터 공학을 전공했습니다. 프로그래밍에 대한 열정이 있습니다.",
+    "",
+    "새로운 기술을 배우는 것을 좋아합니다. 이를 통해 문제 해결 능력을 키웠습니다.",
+]
+
+
+class TestTokenScoreStore(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'store')
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def write(self, documents, state=None):
+        store = TokenScoreStore(self.path, state=state)
+        for doc_id, token_nll in documents:
+            perplexities = [math.exp(sum(nll) / len(nll)) if nll else float('inf') for nll in token_nll]
+            store.append(doc_id, 'kogpt2', perplexities, [0] * len(token_nll), token_nll)
+        store.flush()
+        state = store.state()
+        store.close()
+        return state
+    
+    def test_aggregations(self):
+        self.write([
+            ('a', [[1.0, 2.0, 6.0], None]),
+            ('b', []),
+            ('c', [[3.0], [4.0, 1.0]]),
+        ])
+        scores = TokenScores(self.path)
+        self.assertEqual(scores.doc_ids, ['a', 'b', 'c'])
+        self.assertEqual(scores.model, 'kogpt2')
+        
+        expected = {
+            'mean': [3.0, float('inf'), 3.0, 2.5],
+            'median': [2.0, float('inf'), 3.0, 2.5],
+            'max': [6.0, float('inf'), 3.0, 4.0],
+        }
+        for aggregation, log_ppl in expected.items():
+            np.testing.assert_allclose(scores.sentence_perplexities(aggregation), np.exp(log_ppl), rtol=1e-6)
+        with self.assertRaises(ValueError):
+            scores.sentence_perplexities('min')
+    
+    def test_rescore_stats(self):
+        self.write([('a', [[1.0], [2.0], [5.0], None]), ('b', [])])
+        scores = TokenScores(self.path)
+        # e^1 < e^2 <= 10 < e^5
+        rescored = scores.rescore(threshold=10.0)
+        self.assertEqual(rescored['classes'].tolist(), [1, 1, 0, 2])
+        documents = list(scores.iter_documents(rescored))
+        self.assertEqual(documents[0]['overall_stats'], {
+            'total_sentences': 4, 'ai_suspicious_count': 2, 'natural_count': 1, 'error_count': 1, 'ai_ratio': 0.5
+        })
+        self.assertEqual(documents[1]['overall_stats']['total_sentences'], 0)
+        # confidence (10 - e) / 10 = 0.73
+        self.assertIn("50%", documents[0]['recommendations'][0])
+        self.assertEqual(len(documents[0]['recommendations']), 1)
+        
+        strict = scores.rescore(threshold=3.0)
+        self.assertEqual(strict['classes'].tolist(), [1, 0, 0, 2])
+        summary = scores.summary(strict)
+        self.assertEqual((summary['documents'], summary['ai_suspicious_count']), (2, 1))
+        self.assertEqual(summary['documents_partial'], 1)
+    
+    def test_truncates_to_checkpoint_state(self):
+        state = self.write([('a', [[1.0, 2.0]])])
+        self.write([('b', [[3.0]])])
+        self.assertEqual(TokenScores(self.path).doc_ids, ['a', 'b'])
+        
+        self.write([('c', [[4.0]])], state=state)
+        scores = TokenScores(self.path)
+        self.assertEqual(scores.doc_ids, ['a', 'c'])
+        self.assertEqual(scores.tokens.tolist(), [1.0, 2.0, 4.0])
+        self.assertEqual(scores.sentences['document'].tolist(), [0, 1])
+    
+    def test_model_mismatch(self):
+        self.write([('a', [[1.0]])])
+        store = TokenScoreStore(self.path)
+        with self.assertRaises(ValueError):
+            store.append('b', 'gpt2', [1.0], [0], [[0.0]])
+        store.close()
+    
+    def test_unfinished_document_is_ignored(self):
+        """문서 ID가 기록되기 전의 문장 레코드는 읽지 않음"""
+        self.write([('a', [[1.0]])])
+        store = TokenScoreStore(self.path)
+        store.append('b', 'kogpt2', [1.0], [0], [[0.0]])
+        store.flush()
+        with open(os.path.join(self.path, 'documents.jsonl'), 'r+b') as f:
+            f.truncate(len(b'"a"\n'))
+        store.close()
+        
+        scores = TokenScores(self.path)
+        self.assertEqual(len(scores.sentences), 1)
+        self.assertEqual(scores.rescore()['total'].tolist(), [1])
+    
+    def test_concurrent_reader_sees_complete_documents(self):
+        """flush 전에도 ID가 기록된 문서의 문장과 토큰은 모두 읽을 수 있음"""
+        store = TokenScoreStore(self.path)
+        for i in range(3):
+            store.append(f'doc-{i}', 'kogpt2', [math.e, math.e], [0, 0], [[1.0] * 500, [1.0] * 300])
+            scores = TokenScores(self.path)
+            self.assertEqual(scores.doc_ids, [f'doc-{j}' for j in range(i + 1)])
+            self.assertEqual(len(scores.sentences), 2 * (i + 1))
+            self.assertEqual(len(scores.tokens), 800 * (i + 1))
+            np.testing.assert_allclose(scores.sentence_perplexities('median'), math.e, rtol=1e-6)
+        store.close()
+    
+    def test_cli(self):
+        self.write([('a', [[1.0], [5.0]])])
+        output = os.path.join(self.tmp.name, 'rescored.jsonl')
+        main([self.path, '--threshold', '10', '--aggregation', 'max', '--output', output])
+        with open(output, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(rows[0]['id'], 'a')
+        self.assertEqual(rows[0]['overall_stats']['ai_suspicious_count'], 1)
+
+
+class TestAnalyzerTokenScores(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def check_matches_analyzer(self, analyzer):
+        """저장소 재분류 결과가 같은 임계값의 분석 결과와 같음"""
+        results = analyzer.analyze_batch(TEXTS, compact=True, token_scores=True)
+        path = os.path.join(self.tmp.name, analyzer.scoring_mode + analyzer.execution_strategy)
+        store = TokenScoreStore(path)
+        for i, result in enumerate(results):
+            token_scores = result.pop('token_scores')
+            for ppl, nll in zip(token_scores['perplexities'], token_scores['token_nll']):
+                self.assertAlmostEqual(math.log(ppl), sum(nll) / len(nll), places=4)
+            store.append(str(i), result['model'], **token_scores)
+        store.close()
+        
+        scores = TokenScores(path)
+        rescored = scores.rescore(threshold=analyzer.perplexity_threshold)
+        expected = [c for result in results for c in result['classes']]
+        self.assertEqual(rescored['classes'].tolist(), expected)
+        np.testing.assert_allclose(
+            rescored['confidences'], [c for result in results for c in result['confidences']]
+        )
+        for result, document in zip(results, scores.iter_documents(rescored)):
+            self.assertEqual(document['overall_stats'], result['overall_stats'])
+            self.assertEqual(document['recommendations'], result['recommendations'])
+        
+        # 임계값을 최대로 올리면 점수화된 모든 문장이 AI 의심
+        everything = scores.rescore(threshold=1e9)
+        self.assertTrue(all(CLASS_CODES[c] == 'AI_SUSPICIOUS' for c in everything['classes']))
+    
+    def test_padded(self):
+        self.check_matches_analyzer(make_analyzer(perplexity_threshold=1000.0))
+    
+    def test_packed(self):
+        self.check_matches_analyzer(make_analyzer(execution_strategy='packed'))
+    
+    def test_document_mode(self):
+        self.check_matches_analyzer(make_analyzer(scoring_mode='document'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.utils import preprocess_text, segment_sentences, split_into_sentences
+
+
+class TestSegmentation(unittest.TestCase):
+    
+    def test_korean_endings(self):
+        text = "학점은 3.5점입니다. 토익은 900점이에요! 정말이죠?"
+        self.assertEqual(split_into_sentences(text), ["학점은 3.5점입니다.", "토익은 900점이에요!", "정말이죠?"])
+    
+    def test_offsets_point_into_original(self):
+        text = "  안녕하세요.\n\n저는   컴퓨터 공학을 전공했습니다.  "
+        spans = segment_sentences(text)
+        self.assertEqual([text[s:e] for s, e in spans], ["안녕하세요.", "저는   컴퓨터 공학을 전공했습니다."])
+    
+    def test_missing_space_after_ending(self):
+        self.assertEqual(
+            split_into_sentences("열심히 했습니다.그 결과 성공했습니다."),
+            ["열심히 했습니다.", "그 결과 성공했습니다."]
+        )
+    
+    def test_quotes_and_brackets(self):
+        """인용부호 뒤 조사와 괄호 안의 마침표에서는 나누지 않음"""
+        text = '그는 "좋습니다."라고 말했다. (예: 3개. 5개) 준비했습니다.'
+        self.assertEqual(split_into_sentences(text), ['그는 "좋습니다."라고 말했다.', "(예: 3개. 5개) 준비했습니다."])
+    
+    def test_abbreviations_and_enumerations(self):
+        self.assertEqual(
+            split_into_sentences("저는 e.g. 파이썬을 씁니다. 가. 첫째 항목입니다. 나. 둘째 항목입니다."),
+            ["저는 e.g. 파이썬을 씁니다.", "가. 첫째 항목입니다.", "나. 둘째 항목입니다."]
+        )
+    
+    def test_newlines(self):
+        """줄바꿈으로 이어진 문장은 합치고, 목록 항목과 종결어미 뒤 줄바꿈은 나눔"""
+        text = "주요 경험:\n1. 백엔드 개발 경험\n2. 데이터 분석\n이 문장은 줄바꿈으로\n이어지는 문장입니다\n새 문장입니다"
+        self.assertEqual(split_into_sentences(text), [
+            "주요 경험:", "1. 백엔드 개발 경험", "2. 데이터 분석",
+            "이 문장은 줄바꿈으로\n이어지는 문장입니다", "새 문장입니다"
+        ])
+    
+    def test_merge_short_fragments(self):
+        text = "네. 저는 컴퓨터 공학을 전공했습니다. 감사. 열정이 있습니다."
+        self.assertEqual(split_into_sentences(text), ["네. 저는 컴퓨터 공학을 전공했습니다. 감사.", "열정이 있습니다."])
+        self.assertEqual(len(split_into_sentences(text, min_length=0)), 4)
+    
+    def test_empty(self):
+        self.assertEqual(segment_sentences(""), [])
+        self.assertEqual(segment_sentences(" \n "), [])
+    
+    def test_preprocess_text(self):
+        self.assertEqual(preprocess_text("  저는\n\t개발자★입니다!  "), "저는 개발자입니다!")
+
+
+if __name__ == '__main__':
+    unittest.main()
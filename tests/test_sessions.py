@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.perplexity_analyzer.sessions import DocumentSessionStore
+
+
+class TestDocumentSessionStore(unittest.TestCase):
+    
+    def test_only_changed_sentences_are_rescored(self):
+        store = DocumentSessionStore()
+        store.update('doc', ["가 문장", "나 문장", "다 문장"], [10.0, 20.0, 30.0], ['model'] * 3)
+        
+        perplexities, stages, changed = store.diff('doc', ["다 문장", "가 문장", "새 문장"])
+        
+        self.assertEqual(changed, [2])
+        self.assertEqual(perplexities[:2], [30.0, 10.0])
+        self.assertEqual(stages[:2], ['model', 'model'])
+        self.assertEqual(store.stats()['reused_sentences'], 2)
+    
+    def test_failed_scores_are_retried(self):
+        store = DocumentSessionStore()
+        store.update('doc', ["가 문장", "나 문장"], [10.0, float('inf')], ['model'] * 2)
+        
+        _, _, changed = store.diff('doc', ["가 문장", "나 문장"])
+        self.assertEqual(changed, [1])
+    
+    def test_revision_and_lru_eviction(self):
+        store = DocumentSessionStore(max_sessions=2)
+        self.assertEqual(store.update('a', [], [], []), 1)
+        self.assertEqual(store.update('a', [], [], []), 2)
+        store.update('b', [], [], [])
+        store.update('c', [], [], [])
+        
+        self.assertIsNone(store.get('a'))
+        self.assertEqual(store.stats()['evictions'], 1)
+        self.assertEqual(store.stats()['sessions'], 2)
+    
+    def test_expiration(self):
+        store = DocumentSessionStore(ttl_seconds=10.0)
+        with mock.patch('src.perplexity_analyzer.sessions.time.monotonic', return_value=100.0):
+            store.update('doc', ["가 문장"], [10.0], ['model'])
+        with mock.patch('src.perplexity_analyzer.sessions.time.monotonic', return_value=111.0):
+            _, _, changed = store.diff('doc', ["가 문장"])
+        
+        self.assertEqual(changed, [0])
+        self.assertEqual(store.stats()['expirations'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+"""네트워크 없이 테스트에 사용할 작은 GPT-2 모델과 토크나이저"""
+import copy
+from unittest import mock
+
+from src.perplexity_analyzer import PerplexityAnalyzer
+from src.perplexity_analyzer.models import ModelManager
+from src.perplexity_analyzer.testing import build_tiny_model as _build_tiny_model
+
+_cached = None
+
+
+def build_tiny_model():
+    """테스트용 작은 모델 (한 번만 생성해 캐시)"""
+    global _cached
+    if _cached is None:
+        _cached = _build_tiny_model()
+    return _cached
+
+
+def patch_pretrained():
+    """ModelManager가 허깅페이스 대신 작은 모델을 로드하도록 패치"""
+    model, tokenizer = build_tiny_model()
+    return mock.patch.object(
+        ModelManager, '_load_pretrained', side_effect=lambda path: (copy.deepcopy(model), tokenizer)
+    )
+
+
+def make_analyzer(**kwargs) -> PerplexityAnalyzer:
+    """작은 모델을 사용하는 PerplexityAnalyzer 생성 (허깅페이스 다운로드만 대체)"""
+    kwargs.setdefault('model_name', 'kogpt2')
+    kwargs.setdefault('max_length', 128)
+    with patch_pretrained():
+        return PerplexityAnalyzer(**kwargs)